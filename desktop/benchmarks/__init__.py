@@ -0,0 +1,6 @@
+"""
+Performance benchmarks for the desktop core. Run from the desktop directory:
+
+    python -m benchmarks.corpus --entries 100000 --out /tmp/corpus
+    python -m benchmarks.run --entries 100000 --output results.json
+"""
@@ -0,0 +1,95 @@
+"""
+Synthetic vocabulary generator for benchmarks.
+
+Produces deterministic TXT ("word | meaning", some bare words) and JSON files of any size.
+A share of the entries lack pronunciation, meaning or example, and some words repeat,
+so the Claude and dedupe paths get realistic work.
+"""
+import argparse
+import json
+import os
+import random
+
+
+_SYLLABLES = [
+    "ab", "ac", "al", "an", "ar", "ba", "be", "ca", "co", "de", "di", "el", "en", "er",
+    "fa", "fi", "ga", "go", "ha", "in", "is", "la", "li", "lo", "ma", "mi", "na", "ne",
+    "no", "or", "pa", "pe", "ra", "re", "ri", "sa", "se", "ta", "te", "ti", "to", "ul",
+    "un", "va", "ve", "vi", "xa", "ze",
+]
+_WORDS = ["the", "a", "to", "of", "with", "quickly", "old", "new", "small", "state", "act",
+          "make", "person", "place", "idea", "feeling", "kind", "large", "move", "hold"]
+
+
+def _word(rng):
+    return "".join(rng.choice(_SYLLABLES) for _ in range(rng.randint(2, 5)))
+
+
+def _phrase(rng, low, high):
+    return " ".join(rng.choice(_WORDS) for _ in range(rng.randint(low, high)))
+
+
+def generate_entries(count, seed=0, missing_rate=0.3, duplicate_rate=0.05):
+    """Yield `count` entry dicts. The same seed always yields the same corpus."""
+    rng = random.Random(seed)
+    seen = []
+    for _ in range(count):
+        if seen and rng.random() < duplicate_rate:
+            word = rng.choice(seen)
+        else:
+            word = _word(rng)
+            if len(seen) < 10000:
+                seen.append(word)
+        entry = {
+            "word": word,
+            "pronunciation": f"/{word}/",
+            "meaning": _phrase(rng, 3, 8),
+            "example_sentence": f"{_phrase(rng, 2, 5).capitalize()} {word} {_phrase(rng, 2, 6)}.",
+        }
+        if rng.random() < missing_rate:
+            entry[rng.choice(["pronunciation", "meaning", "example_sentence"])] = ""
+        yield entry
+
+
+def write_txt(entries, path):
+    """Write entries in the import format: `word | meaning`, or just the word."""
+    with open(path, "w", encoding="utf-8") as f:
+        f.write("# Synthetic benchmark corpus\n")
+        for entry in entries:
+            if entry["meaning"]:
+                f.write(f"{entry['word']} | {entry['meaning']}\n")
+            else:
+                f.write(f"{entry['word']}\n")
+
+
+def write_json(entries, path):
+    """Write entries in the {"vocabulary": [...]} layout the app saves."""
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump({"vocabulary": list(entries)}, f, ensure_ascii=False, indent=2)
+
+
+def generate_corpus(out_dir, count, seed=0):
+    """Write corpus_<count>.txt and corpus_<count>.json into out_dir; returns both paths."""
+    os.makedirs(out_dir, exist_ok=True)
+    txt_path = os.path.join(out_dir, f"corpus_{count}.txt")
+    json_path = os.path.join(out_dir, f"corpus_{count}.json")
+    write_txt(generate_entries(count, seed), txt_path)
+    write_json(generate_entries(count, seed), json_path)
+    return txt_path, json_path
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Generate synthetic vocabulary files.")
+    parser.add_argument("--entries", type=int, nargs="+", default=[1000],
+                        help="corpus sizes to generate (e.g. 1000 100000 1000000)")
+    parser.add_argument("--out", default="benchmark_data", help="output directory")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+    for count in args.entries:
+        for path in generate_corpus(args.out, count, args.seed):
+            print(f"{path}  ({os.path.getsize(path) / 1e6:.1f} MB)")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
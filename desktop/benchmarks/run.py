@@ -0,0 +1,293 @@
+"""
+Timed benchmark scenarios for the desktop core, written as JSON for comparing commits.
+
+Each scenario runs `--repeat` times on a synthetic corpus (see benchmarks.corpus).
+The Claude scenario talks to tools/fake_claude.py, whose latency, failure rate and
+output size come from the command line, so it measures our overhead rather than the API.
+
+    python -m benchmarks.run --entries 100000 --output before.json
+    python -m benchmarks.run --entries 100000 --output after.json --only parse_txt load_json
+"""
+import argparse
+import datetime
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+from benchmarks.corpus import generate_corpus
+from core.vocabulary_processor import parse_vocabulary_file, load_vocabulary_json, divide_into_batches
+
+
+DESKTOP_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+FAKE_CLAUDE = os.path.join(DESKTOP_DIR, "tools", "fake_claude.py")
+
+
+class Context:
+    """
+    Corpus paths and settings shared by the scenarios. `entries` (the loaded JSON corpus) is
+    filled by load_entries(), which run_scenario calls before timing the scenarios that use it.
+    """
+
+    def __init__(self, args, txt_path, json_path, work_dir):
+        self.args = args
+        self.txt_path = txt_path
+        self.json_path = json_path
+        self.work_dir = work_dir
+        self.entries = None
+
+    def load_entries(self):
+        if self.entries is None:
+            self.entries = load_vocabulary_json(self.json_path)
+
+
+def bench_parse_txt(ctx):
+    return len(parse_vocabulary_file(ctx.txt_path))
+
+
+def bench_load_json(ctx):
+    return len(load_vocabulary_json(ctx.json_path))
+
+
+def bench_divide(ctx):
+    divide_into_batches(ctx.entries, ctx.args.batch_size)
+    return len(ctx.entries)
+
+
+def bench_process_all_batches(ctx):
+    from core.claude_integration import process_all_batches, EnrichmentOptions
+    entries = ctx.entries[:ctx.args.claude_entries]
+    options = EnrichmentOptions(max_workers=ctx.args.workers, protocol=ctx.args.protocol, backoff=0.05)
+    results = process_all_batches(divide_into_batches(entries, ctx.args.batch_size), options=options)
+    return len(results)
+
+
+def bench_build_theme_zip(ctx):
+    from core.theme_builder import build_theme_zip
+    build_theme_zip("simple", ctx.entries, os.path.join(ctx.work_dir, "bench_theme.zip"))
+    return len(ctx.entries)
+
+
+def bench_build_all_themes(ctx):
+    from core.theme_builder import build_theme_zips
+    build_theme_zips(None, ctx.entries, os.path.join(ctx.work_dir, "themes"))
+    return len(ctx.entries)
+
+
+def bench_binary_store(ctx):
+    from core.binary_store import write_binary_vocabulary, BinaryVocabulary
+    path = os.path.join(ctx.work_dir, "corpus.vmb")
+    write_binary_vocabulary(ctx.entries, path)
+    with BinaryVocabulary(path) as store:
+        for index in range(0, len(store), max(1, len(store) // 1000)):
+            store[index]
+    return len(ctx.entries)
+
+
+def setup_open_binary(ctx):
+    from core.binary_store import write_binary_vocabulary
+    write_binary_vocabulary(ctx.entries, os.path.join(ctx.work_dir, "open.vmb"))
+
+
+def bench_open_binary(ctx):
+    """Open a store and read its middle entry; should not grow with the corpus."""
+    from core.binary_store import BinaryVocabulary
+    with BinaryVocabulary(os.path.join(ctx.work_dir, "open.vmb")) as store:
+        store[len(store) // 2]
+    return 1
+
+
+def bench_search_index(ctx):
+    from core.search_index import SearchIndex
+    SearchIndex(ctx.entries)
+    return len(ctx.entries)
+
+
+def setup_search(ctx):
+    from core.search_index import SearchIndex
+    ctx.search_index = SearchIndex(ctx.entries)
+
+
+def bench_search(ctx):
+    """A typed-out substring query, a prefix query and a missing-field filter."""
+    from core.search_index import PREFIX, SUBSTRING, MISSING_PRONUNCIATION
+    index = ctx.search_index
+    queries = 0
+    for query in ("f", "fe", "fee", "feel"):
+        index.search(query, SUBSTRING)
+        queries += 1
+    index.search("se", PREFIX)
+    index.search("", missing=[MISSING_PRONUNCIATION])
+    return queries + 2
+
+
+def _traced_bytes(load):
+    """Memory still allocated after load() returns (i.e. held by its result), and the result."""
+    tracemalloc.start()
+    try:
+        result = load()
+        return tracemalloc.get_traced_memory()[0], result
+    finally:
+        tracemalloc.stop()
+
+
+def bench_entry_memory(ctx):
+    """
+    Memory per loaded entry: plain dicts (json.load, the old representation) against
+    VocabEntry (load_vocabulary_json), strings included.
+    """
+    def load_dicts():
+        with open(ctx.json_path, encoding="utf-8") as f:
+            return json.load(f)["vocabulary"]
+
+    dict_bytes, dicts = _traced_bytes(load_dicts)
+    del dicts
+    entry_bytes, entries = _traced_bytes(lambda: load_vocabulary_json(ctx.json_path))
+    count = len(entries)
+    return count, {
+        "dict_bytes_per_entry": round(dict_bytes / count, 1),
+        "entry_bytes_per_entry": round(entry_bytes / count, 1),
+    }
+
+
+SCENARIOS = {
+    "parse_txt": bench_parse_txt,
+    "load_json": bench_load_json,
+    "divide_into_batches": bench_divide,
+    "process_all_batches": bench_process_all_batches,
+    "build_theme_zip": bench_build_theme_zip,
+    "build_all_themes": bench_build_all_themes,
+    "binary_store": bench_binary_store,
+    "open_binary": bench_open_binary,
+    "search_index": bench_search_index,
+    "search": bench_search,
+    "entry_memory": bench_entry_memory,
+}
+
+
+# Scenarios that work on the loaded corpus; it is loaded before their timing starts
+USES_ENTRIES = {
+    "divide_into_batches", "process_all_batches", "build_theme_zip", "build_all_themes",
+    "binary_store", "open_binary", "search_index", "search",
+}
+
+# Untimed preparation some scenarios need before they run
+SETUPS = {
+    "open_binary": setup_open_binary,
+    "search": setup_search,
+}
+
+
+def _git_commit():
+    try:
+        out = subprocess.run(["git", "rev-parse", "HEAD"], cwd=DESKTOP_DIR,
+                             capture_output=True, text=True, timeout=10)
+    except (OSError, subprocess.TimeoutExpired):
+        return None
+    return out.stdout.strip() or None
+
+
+def _configure_fake_claude(args):
+    """Point claude_integration at the fake CLI (unless --claude-cmd is given) and set its knobs."""
+    os.environ["VOCABMASTER_CLAUDE_CMD"] = args.claude_cmd or f'"{sys.executable}" "{FAKE_CLAUDE}"'
+    os.environ["FAKE_CLAUDE_DELAY"] = str(args.latency)
+    os.environ["FAKE_CLAUDE_JITTER"] = str(args.jitter)
+    os.environ["FAKE_CLAUDE_FAIL_RATE"] = str(args.failure_rate)
+    os.environ["FAKE_CLAUDE_PAD"] = str(args.output_pad)
+
+
+def run_scenario(name, ctx, repeat):
+    """Time one scenario; returns its result record."""
+    func = SCENARIOS[name]
+    if name in USES_ENTRIES:
+        ctx.load_entries()
+    if name in SETUPS:
+        SETUPS[name](ctx)
+    times = []
+    count = 0
+    extra = {}
+    for _ in range(repeat):
+        start = time.perf_counter()
+        count = func(ctx)
+        times.append(time.perf_counter() - start)
+        if isinstance(count, tuple):
+            # (count, measurements to add to the record)
+            count, extra = count
+    best = min(times)
+    return {
+        "name": name,
+        "entries": count,
+        "repeat": repeat,
+        "times": [round(t, 6) for t in times],
+        "best": round(best, 6),
+        "median": round(statistics.median(times), 6),
+        "entries_per_second": round(count / best, 1) if best > 0 else None,
+        **extra,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run VocabMaster core benchmarks.")
+    parser.add_argument("--entries", type=int, default=10000, help="corpus size (default 10000)")
+    parser.add_argument("--data-dir", help="reuse/generate corpora here (default: a temp dir)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--only", nargs="+", choices=sorted(SCENARIOS), help="run only these scenarios")
+    parser.add_argument("--output", help="write JSON results here (default: stdout)")
+
+    claude = parser.add_argument_group("process_all_batches")
+    claude.add_argument("--claude-entries", type=int, default=300,
+                        help="entries sent through Claude (default 300)")
+    claude.add_argument("--batch-size", type=int, default=15)
+    claude.add_argument("--workers", type=int, default=3)
+    claude.add_argument("--protocol", choices=["compact", "full"], default="compact")
+    claude.add_argument("--latency", type=float, default=0.0, help="fake claude delay per prompt (s)")
+    claude.add_argument("--jitter", type=float, default=0.0, help="extra random delay per prompt (s)")
+    claude.add_argument("--failure-rate", type=float, default=0.0, help="share of prompts that fail")
+    claude.add_argument("--output-pad", type=int, default=0, help="extra characters per example sentence")
+    claude.add_argument("--claude-cmd", help="command to use instead of the bundled fake")
+    args = parser.parse_args(argv)
+
+    _configure_fake_claude(args)
+    with tempfile.TemporaryDirectory(prefix="vocabmaster-bench-") as work_dir:
+        data_dir = args.data_dir or work_dir
+        txt_path = os.path.join(data_dir, f"corpus_{args.entries}.txt")
+        json_path = os.path.join(data_dir, f"corpus_{args.entries}.json")
+        if not (os.path.exists(txt_path) and os.path.exists(json_path)):
+            generate_corpus(data_dir, args.entries, args.seed)
+        ctx = Context(args, txt_path, json_path, work_dir)
+
+        results = []
+        for name in args.only or list(SCENARIOS):
+            record = run_scenario(name, ctx, args.repeat)
+            print(f"{name:22} {record['best'] * 1000:10.1f} ms  "
+                  f"({record['entries_per_second']} entries/s)", file=sys.stderr)
+            if "entry_bytes_per_entry" in record:
+                print(f"{'':22} {record['dict_bytes_per_entry']:10.1f} bytes/entry as dicts, "
+                      f"{record['entry_bytes_per_entry']:.1f} as VocabEntry", file=sys.stderr)
+            results.append(record)
+
+    report = {
+        "commit": _git_commit(),
+        "timestamp": datetime.datetime.now(datetime.timezone.utc).isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "settings": {key: value for key, value in vars(args).items() if key not in ("output", "only")},
+        "scenarios": results,
+    }
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,10 @@
+"""
+Headless entry point: `python -m core` (run from the desktop directory).
+"""
+import sys
+
+from core.cli import main
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,32 @@
+"""
+Atomic file output: write to a temporary file next to the target and rename it into
+place only once everything was written, so an interrupted export never leaves a
+truncated file behind (or clobbers the previous good one).
+"""
+import os
+import secrets
+from contextlib import contextmanager
+
+
+@contextmanager
+def atomic_output(path):
+    """
+    Yield a temporary path in the target's directory; on success it replaces `path`.
+    If the block raises, the temporary file is removed and `path` is left untouched.
+
+        with atomic_output("out.zip") as tmp:
+            with zipfile.ZipFile(tmp, "w") as zf:
+                ...
+    """
+    directory = os.path.dirname(os.path.abspath(path))
+    # Not mkstemp: its files are private (0600), while an export should get the usual permissions
+    tmp_path = os.path.join(directory, f".{os.path.basename(path)}.{secrets.token_hex(4)}.tmp")
+    try:
+        yield tmp_path
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        raise
@@ -0,0 +1,188 @@
+"""
+Binary vocabulary store: a compact file that opens in constant time and is read through
+mmap, so entry i can be decoded on its own without loading the deck.
+
+Layout (all integers little-endian):
+  header   magic b"VMB1", format version (u16), columns per entry (u16), entry count (u64),
+           heap offset (u64), heap size (u64), offset table position (u64),
+           presence table position (u64, format 2 and later)
+  heap     the UTF-8 strings, back to back
+  offsets  entry_count * COLUMNS + 1 u64 heap offsets; string j spans offsets[j]:offsets[j+1]
+  presence entry_count bytes; bit k is set if field k of FIELDS is present in the entry
+
+Each entry has one string per field in FIELDS plus a last column holding any other keys
+as JSON (empty if there are none). An absent field is stored as an empty string with its
+presence bit clear, so converting JSON -> binary -> JSON gives back the same objects as
+long as the four fields hold strings. Format 1 files have no presence table; their fields
+all read as present.
+"""
+import json
+import mmap
+import struct
+import sys
+from array import array
+
+from core.atomic_file import atomic_output
+from core.entry import FIELDS, VocabEntry, to_plain
+from core.vocabulary_processor import (
+    iter_vocabulary_file, iter_vocabulary_json, save_vocabulary_json, save_vocabulary_txt,
+)
+
+
+MAGIC = b"VMB1"
+FORMAT_VERSION = 2
+COLUMNS = len(FIELDS) + 1
+_HEADER_V1 = struct.Struct("<4sHHQQQQ")
+_HEADER = struct.Struct("<4sHHQQQQQ")
+_OFFSET = struct.Struct("<Q")
+_ENTRY_OFFSETS = struct.Struct(f"<{COLUMNS + 1}Q")
+
+
+def write_binary_vocabulary(entries, path):
+    """
+    Write entries (any iterable of VocabEntry or dicts) to a binary store at `path`, streaming
+    the string heap to disk; only the offset table (8 bytes per field, in an array) and one
+    presence byte per entry are kept in memory.
+    The file is replaced atomically. Returns the number of entries written.
+    """
+    offsets = array("Q", [0])
+    presence = bytearray()
+    count = 0
+    with atomic_output(path) as tmp_path, open(tmp_path, "wb") as f:
+        f.write(b"\0" * _HEADER.size)
+        position = 0
+        for entry in map(to_plain, entries):
+            extra = {key: value for key, value in entry.items() if key not in FIELDS}
+            mask = 0
+            values = []
+            for bit, field in enumerate(FIELDS):
+                value = entry.get(field)
+                if value is not None:
+                    mask |= 1 << bit
+                values.append(value or "")
+            values.append(json.dumps(extra, ensure_ascii=False, separators=(",", ":")) if extra else "")
+            for value in values:
+                data = str(value).encode("utf-8")
+                f.write(data)
+                position += len(data)
+                offsets.append(position)
+            presence.append(mask)
+            count += 1
+        table_at = _HEADER.size + position
+        if sys.byteorder != "little":
+            offsets.byteswap()
+        offsets.tofile(f)
+        presence_at = table_at + len(offsets) * _OFFSET.size
+        f.write(presence)
+        f.seek(0)
+        f.write(_HEADER.pack(MAGIC, FORMAT_VERSION, COLUMNS, count, _HEADER.size, position, table_at,
+                             presence_at))
+    return count
+
+
+class BinaryVocabulary:
+    """
+    Read-only view of a binary store. Opening only reads the header; entries are decoded
+    from the memory-mapped file when they are accessed.
+    Behaves like a sequence of entry dicts (len, indexing, iteration). Use as a context
+    manager or call close() when done.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._file = open(path, "rb")
+        try:
+            size = self._file.seek(0, 2)
+            if size < _HEADER_V1.size:
+                raise ValueError(f"{path} is not a VocabMaster binary store")
+            self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        except BaseException:
+            self._file.close()
+            raise
+        magic, version, columns, count, heap_at, heap_size, table_at = _HEADER_V1.unpack_from(self._map)
+        if magic != MAGIC or columns != COLUMNS:
+            self.close()
+            raise ValueError(f"{path} is not a VocabMaster binary store")
+        if version > FORMAT_VERSION:
+            self.close()
+            raise ValueError(f"{path} uses binary format {version}; this version reads up to {FORMAT_VERSION}")
+        self._count = count
+        self._heap_at = heap_at
+        self._table_at = table_at
+        # Format 1 has no presence table: every field counts as present
+        self._presence_at = _HEADER.unpack_from(self._map)[-1] if version >= 2 else None
+
+    def _present(self, index):
+        if self._presence_at is None:
+            return (1 << len(FIELDS)) - 1
+        if index < 0:
+            index += self._count
+        return self._map[self._presence_at + index]
+
+    def __len__(self):
+        return self._count
+
+    def _offsets(self, index):
+        if index < 0:
+            index += self._count
+        if not 0 <= index < self._count:
+            raise IndexError("entry index out of range")
+        return _ENTRY_OFFSETS.unpack_from(self._map, self._table_at + index * COLUMNS * _OFFSET.size)
+
+    def _string(self, start, end):
+        return str(self._map[self._heap_at + start:self._heap_at + end], "utf-8")
+
+    def field(self, index, name):
+        """Decode a single field of entry `index` (e.g. just the word, for a list view); "" if absent."""
+        column = FIELDS.index(name)
+        offsets = self._offsets(index)
+        return self._string(offsets[column], offsets[column + 1])
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(self._count))]
+        offsets = self._offsets(index)
+        present = self._present(index)
+        entry = VocabEntry(*[self._string(offsets[k], offsets[k + 1]) if present >> k & 1 else None
+                             for k in range(len(FIELDS))])
+        if offsets[-1] > offsets[-2]:
+            entry.update(json.loads(self._string(offsets[-2], offsets[-1])))
+        return entry
+
+    def __iter__(self):
+        for index in range(self._count):
+            yield self[index]
+
+    def close(self):
+        if getattr(self, "_map", None) is not None:
+            self._map.close()
+            self._map = None
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def json_to_binary(json_path, binary_path):
+    """Convert a {"vocabulary": [...]} JSON file to a binary store, streaming. Returns the entry count."""
+    return write_binary_vocabulary(iter_vocabulary_json(json_path), binary_path)
+
+
+def txt_to_binary(txt_path, binary_path):
+    """Convert a vocabulary TXT file to a binary store, streaming. Returns the entry count."""
+    return write_binary_vocabulary(iter_vocabulary_file(txt_path), binary_path)
+
+
+def binary_to_json(binary_path, json_path, compact=False):
+    """Write a binary store back out as vocabulary JSON."""
+    with BinaryVocabulary(binary_path) as store:
+        save_vocabulary_json(iter(store), json_path, compact)
+
+
+def binary_to_txt(binary_path, txt_path):
+    """Write a binary store back out as pipe-separated TXT."""
+    with BinaryVocabulary(binary_path) as store:
+        save_vocabulary_txt(iter(store), txt_path)
@@ -2,10 +2,36 @@
 Claude CLI integration: send vocabulary batches to Claude for checking and enrichment.
 Uses the `claude` CLI (Claude Code) as a subprocess.
 """
+import bisect
 import json
-import subprocess
+import os
+import queue
+import random
 import re
+import shlex
+import subprocess
+import sys
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+from core.entry import VocabEntry, as_entry, entry_json_default
+
 
+# Bump whenever PROMPT_TEMPLATE / COMPACT_PROMPT_TEMPLATE change in a way that affects
+# the output, so cached enrichments from the old prompt are not reused.
+PROMPT_VERSION = "2"
+
+# Hard limit for a single `claude` call, in seconds.
+CLAUDE_TIMEOUT = 120
+
+# CLI errors that mean "slow down and try again" (rate limits, overload) rather than a bad batch
+RETRYABLE_ERROR = re.compile(
+    r"rate[ _-]?limit|too many requests|overloaded|temporarily unavailable|try again later|\b(?:429|503|529)\b",
+    re.IGNORECASE,
+)
+_RETRY_AFTER = re.compile(r"retry[ _-]?after\D{0,3}(\d+(?:\.\d+)?)", re.IGNORECASE)
 
 PROMPT_TEMPLATE = """You are a vocabulary checker and enricher. I will give you a list of vocabulary entries in JSON format. For each entry, please:
 
@@ -28,57 +54,1239 @@ Return ONLY a valid JSON array (no markdown, no explanation) with the corrected
 Here are the vocabulary entries to process:
 {vocabulary_json}"""
 
+# Short keys used by the compact protocol, and the entry fields they stand for.
+COMPACT_FIELDS = {
+    "w": "word",
+    "p": "pronunciation",
+    "m": "meaning",
+    "s": "example_sentence",
+}
+
+COMPACT_PROMPT_TEMPLATE = """You are a vocabulary checker and enricher. Each input entry has an "id" and short keys: w = word, p = pronunciation (IPA), m = meaning, s = example sentence. Missing keys are empty. For each entry:
+
+1. Fix spelling mistakes in w
+2. Fix the accuracy and grammar of m; if m is missing, write a clear, concise definition
+3. If s is missing, write a natural example sentence that demonstrates the word's usage
+4. If p is missing, add the pronunciation in IPA format if possible
+
+Return ONLY a minified JSON array (no markdown, no explanation) with one object per input entry, in input order. Each object holds the entry's "id" plus ONLY the keys you changed or added; use {{"id":N}} if nothing changed. Example:
+[{{"id":0,"p":"/əˈbændən/","s":"She had to abandon her plans."}},{{"id":1,"w":"benevolent"}}]
+
+Entries:
+{entries_json}"""
+
+
+def claude_command():
+    """
+    Command used to start the Claude CLI, as an argument list.
+    Defaults to `claude`; set VOCABMASTER_CLAUDE_CMD to use another executable
+    (e.g. "python tools/fake_claude.py" to work offline).
+    """
+    command = os.environ.get("VOCABMASTER_CLAUDE_CMD")
+    if not command:
+        return ["claude"]
+    return shlex.split(command, posix=not sys.platform.startswith("win"))
+
+
+# Flags that make the CLI print newline-delimited JSON events, including partial text deltas.
+STREAM_OUTPUT_ARGS = ["--output-format", "stream-json", "--verbose", "--include-partial-messages"]
+
+
+class RateLimitError(RuntimeError):
+    """
+    The CLI reported a rate-limit or overload error (see RETRYABLE_ERROR).
+    `retry_after` is the wait it asked for in seconds, or None.
+    """
+
+    def __init__(self, message, retry_after=None):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+def _cli_error(message):
+    """The exception for a CLI error message: RateLimitError if it is retryable, else RuntimeError."""
+    if not RETRYABLE_ERROR.search(message):
+        return RuntimeError(message)
+    match = _RETRY_AFTER.search(message)
+    return RateLimitError(message, float(match.group(1)) if match else None)
+
+
+class _ResponseCollector:
+    """Assemble Claude's answer from stream-json events, forwarding text to `on_text` as it arrives."""
+
+    def __init__(self, on_text=None):
+        self.on_text = on_text
+        self.texts = []
+        self.streamed = False
+
+    def handle(self, event):
+        """Process one event; returns the final response text once the `result` event arrives."""
+        kind = event.get("type")
+        if kind == "stream_event":
+            delta = event.get("event", {}).get("delta", {})
+            if delta.get("type") == "text_delta":
+                self.streamed = True
+                if self.on_text:
+                    self.on_text(delta.get("text", ""))
+        elif kind == "assistant":
+            for block in event.get("message", {}).get("content", []):
+                if block.get("type") == "text":
+                    self.texts.append(block.get("text", ""))
+                    # Without partial messages the whole text arrives here at once
+                    if self.on_text and not self.streamed:
+                        self.on_text(block.get("text", ""))
+        elif kind == "result":
+            if event.get("is_error"):
+                raise _cli_error(f"Claude CLI error: {event.get('result') or event.get('subtype')}")
+            return event.get("result") or "".join(self.texts)
+        return None
+
+
+def _run_claude_once(prompt, on_text=None, metrics=None):
+    """
+    Run one `claude -p` process for a prompt and return its response text.
+    With `on_text`, the CLI streams its output and on_text(chunk) is called as text arrives.
+    If `metrics` is a dict, the time taken to start the process is stored in it.
+    """
+    if on_text is not None:
+        return _run_claude_once_streaming(prompt, on_text, metrics)
+    started = time.perf_counter()
+    process = subprocess.Popen(
+        claude_command() + ["--no-input", "-p", prompt],
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+        text=True,
+        encoding="utf-8",
+    )
+    if metrics is not None:
+        metrics["spawn_seconds"] = time.perf_counter() - started
+    try:
+        stdout, stderr = process.communicate(timeout=CLAUDE_TIMEOUT)
+    except subprocess.TimeoutExpired:
+        process.kill()
+        process.communicate()
+        raise RuntimeError(f"Claude CLI timed out ({CLAUDE_TIMEOUT}s). Try a smaller batch size.")
+
+    if process.returncode != 0:
+        raise _cli_error(f"Claude CLI error: {stderr.strip()}")
+    return stdout
+
+
+def _run_claude_once_streaming(prompt, on_text, metrics=None):
+    started = time.perf_counter()
+    process = subprocess.Popen(
+        claude_command() + ["--no-input", "-p", prompt] + STREAM_OUTPUT_ARGS,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+        text=True,
+        encoding="utf-8",
+    )
+    if metrics is not None:
+        metrics["spawn_seconds"] = time.perf_counter() - started
+    stderr = []
+    stderr_thread = threading.Thread(target=lambda: stderr.extend(process.stderr), daemon=True)
+    stderr_thread.start()
+    timed_out = threading.Event()
+
+    def kill():
+        timed_out.set()
+        process.kill()
+
+    watchdog = threading.Timer(CLAUDE_TIMEOUT, kill)
+    watchdog.start()
+
+    collector = _ResponseCollector(on_text)
+    response_text = None
+    try:
+        for line in process.stdout:
+            try:
+                event = json.loads(line)
+            except json.JSONDecodeError:
+                continue
+            text = collector.handle(event)
+            if text is not None:
+                response_text = text
+    finally:
+        watchdog.cancel()
+        process.stdout.close()
+        process.wait()
+        stderr_thread.join(timeout=1)
+
+    if response_text is None:
+        if timed_out.is_set():
+            raise RuntimeError(f"Claude CLI timed out ({CLAUDE_TIMEOUT}s). Try a smaller batch size.")
+        raise _cli_error(f"Claude CLI error: {''.join(stderr).strip() or 'no result'}")
+    return response_text
+
+
+class StreamingEntryParser:
+    """
+    Pick complete top-level JSON objects out of a response while it is still streaming.
+    feed(text) returns the objects (dicts) completed by that chunk, in order.
+    """
+
+    def __init__(self):
+        self._buf = []
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+
+    def feed(self, text):
+        found = []
+        for ch in text:
+            if not self._depth:
+                if ch == "{":
+                    self._depth = 1
+                    self._buf = [ch]
+                continue
+            self._buf.append(ch)
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif ch == "\\":
+                    self._escape = True
+                elif ch == '"':
+                    self._in_string = False
+            elif ch == '"':
+                self._in_string = True
+            elif ch == "{":
+                self._depth += 1
+            elif ch == "}":
+                self._depth -= 1
+                if not self._depth:
+                    try:
+                        obj = json.loads("".join(self._buf))
+                    except json.JSONDecodeError:
+                        continue
+                    if isinstance(obj, dict):
+                        found.append(obj)
+        return found
+
+
+_JSON_START = re.compile(r"[\[{]")
 
-def process_batch_with_claude(batch):
+
+def parse_claude_response(response_text):
+    """
+    Extract the entries from Claude's response text.
+    Candidate JSON values are decoded with JSONDecoder.raw_decode at every '[' / '{', so prose,
+    markdown fences or stray brackets around the answer do not matter. The first array of
+    objects wins; if there is none (e.g. the array was cut off), the complete standalone
+    objects found are returned instead.
+    """
+    decoder = json.JSONDecoder()
+    objects = []
+    i = 0
+    while True:
+        match = _JSON_START.search(response_text, i)
+        if not match:
+            break
+        try:
+            value, end = decoder.raw_decode(response_text, match.start())
+        except json.JSONDecodeError:
+            i = match.start() + 1
+            continue
+        if isinstance(value, list) and all(isinstance(item, dict) for item in value):
+            return value
+        if isinstance(value, dict):
+            objects.append(value)
+        i = end
+    if objects:
+        return objects
+    raise ValueError(f"Could not find JSON array in Claude's response: {response_text.strip()[:200]}")
+
+
+def encode_compact_batch(batch, first_id=0):
+    """
+    Minified compact-protocol payload: the entry's id is first_id plus its batch position
+    and non-empty fields are sent under their short keys.
+    """
+    rows = []
+    for i, entry in enumerate(batch, first_id):
+        row = {"id": i}
+        for code, field in COMPACT_FIELDS.items():
+            if entry.get(field):
+                row[code] = entry[field]
+        rows.append(row)
+    return json.dumps(rows, ensure_ascii=False, separators=(",", ":"))
+
+
+def apply_compact_diff(entry, diff):
+    """Rebuild a full entry from its input and a compact-protocol diff (short or full keys)."""
+    merged = {field: entry.get(field) or "" for field in COMPACT_FIELDS.values()}
+    merged.update((key, value) for key, value in entry.items() if key not in merged)
+    for key, value in diff.items():
+        field = COMPACT_FIELDS.get(key, key)
+        if field in merged and field != "id" and isinstance(value, str):
+            merged[field] = value
+    return merged
+
+
+def _diff_id(diff, size, first_id=0):
+    """The batch index a diff refers to, or None if it has no usable id."""
+    try:
+        i = int(diff.get("id")) - first_id
+    except (TypeError, ValueError):
+        return None
+    return i if 0 <= i < size else None
+
+
+def is_valid_entry(obj):
+    """Schema check for a full-protocol entry: a non-empty word and string-valued fields."""
+    if not isinstance(obj, dict) or not isinstance(obj.get("word"), str) or not obj["word"].strip():
+        return False
+    return all(isinstance(obj.get(field, ""), str) for field in COMPACT_FIELDS.values())
+
+
+def is_valid_diff(obj, size, first_id=0):
+    """Schema check for a compact-protocol diff: an id inside the batch and string-valued fields."""
+    if not isinstance(obj, dict) or _diff_id(obj, size, first_id) is None:
+        return False
+    for key, value in obj.items():
+        field = COMPACT_FIELDS.get(key, key)
+        if field in COMPACT_FIELDS.values():
+            if not isinstance(value, str) or (field == "word" and not value.strip()):
+                return False
+    return True
+
+
+def align_compact_response(batch, diffs, first_id=0):
+    """
+    Merge a compact response back into full entries, aligned to the batch by id
+    (numbered from first_id, see encode_compact_batch).
+    Returns {batch index: corrected entry}; indices without a valid diff are absent.
+    """
+    aligned = {}
+    for diff in diffs:
+        if is_valid_diff(diff, len(batch), first_id):
+            i = _diff_id(diff, len(batch), first_id)
+            aligned[i] = apply_compact_diff(batch[i], diff)
+    return aligned
+
+
+class IncompleteResponseError(RuntimeError):
+    """
+    Claude's answer left out some entries of the batch (or returned them malformed).
+    `entries` maps batch index -> corrected entry for the ones it did answer and
+    `missing` lists the batch indices that need to be requested again.
+    """
+
+    def __init__(self, entries, missing):
+        super().__init__(f"Claude answered {len(entries)} of {len(entries) + len(missing)} entries")
+        self.entries = entries
+        self.missing = missing
+
+
+def process_batch_with_claude(batch, engine=None, on_entry=None, protocol="compact", metrics=None):
     """
     Send a batch of vocabulary entries to Claude CLI for checking.
-    Returns the corrected/enriched entries.
+    By default every call starts its own `claude` process; pass a ClaudeSessionEngine
+    to reuse long-lived sessions instead.
+    protocol="compact" sends minified entries with ids and has Claude return only the fields
+    it changed, which are merged back locally; protocol="full" sends and receives whole
+    entries (PROMPT_TEMPLATE).
+    With `on_entry` and the compact protocol, the response is streamed and on_entry(index, entry)
+    is called for each corrected entry as soon as its JSON object is complete. Full-protocol
+    entries carry no id, so they are only matched to the inputs once the whole answer is in.
+    Through a session, compact ids continue from the session's earlier batches, so a diff
+    for an entry of a previous turn is never taken for one of this batch.
+    Returns the corrected/enriched entries. With the compact protocol, if some ids are missing
+    from the answer an IncompleteResponseError carrying the answered entries is raised, so
+    only the missing ones need to be requested again. A full-protocol answer with a different
+    number of valid entries than the batch cannot be aligned and raises ValueError.
+    If `metrics` is a dict, it is filled with mode, spawn_seconds, prompt_bytes,
+    response_bytes and parse_seconds for this call (see core.metrics).
     """
-    vocab_json = json.dumps(batch, ensure_ascii=False, indent=2)
-    prompt = PROMPT_TEMPLATE.format(vocabulary_json=vocab_json)
+    if metrics is None:
+        metrics = {}
+    compact = protocol == "compact"
+    first_id = 0
+
+    def build_prompt(first=0):
+        nonlocal first_id
+        first_id = first
+        if compact:
+            return COMPACT_PROMPT_TEMPLATE.format(entries_json=encode_compact_batch(batch, first))
+        vocab_json = json.dumps(batch, ensure_ascii=False, indent=2, default=entry_json_default)
+        return PROMPT_TEMPLATE.format(vocabulary_json=vocab_json)
 
+    on_text = None
+    if on_entry is not None and compact:
+        parser = StreamingEntryParser()
+
+        def on_text(chunk):
+            for obj in parser.feed(chunk):
+                if is_valid_diff(obj, len(batch), first_id):
+                    i = _diff_id(obj, len(batch), first_id)
+                    on_entry(i, apply_compact_diff(batch[i], obj))
+
+    metrics["mode"] = "process" if engine is None else "session"
+    if engine is None:
+        prompt = build_prompt()
+        metrics["prompt_bytes"] = len(prompt.encode("utf-8"))
+        response_text = _run_claude_once(prompt, on_text, metrics)
+    else:
+        response_text = engine.run(build_prompt, on_text, metrics, ids=len(batch) if compact else 0)
+    metrics["response_bytes"] = len(response_text.encode("utf-8"))
+    started = time.perf_counter()
     try:
-        result = subprocess.run(
-            ["claude", "--no-input", "-p", prompt],
-            capture_output=True,
+        answer = parse_claude_response(response_text)
+    finally:
+        metrics["parse_seconds"] = time.perf_counter() - started
+    if not compact:
+        corrected = [obj for obj in answer if is_valid_entry(obj)]
+        if len(corrected) != len(batch):
+            # Without ids there is no telling which entry is missing, so the batch is failed
+            # and goes through retry/split instead of shifting later entries up a row
+            raise ValueError(f"Claude's response had {len(corrected)} valid entries for {len(batch)} inputs")
+        return corrected
+
+    aligned = align_compact_response(batch, answer, first_id)
+    if len(aligned) < len(batch):
+        raise IncompleteResponseError(aligned, [i for i in range(len(batch)) if i not in aligned])
+    return [aligned[i] for i in range(len(batch))]
+
+
+class _SessionCrashed(RuntimeError):
+    """The session's `claude` process exited or stopped accepting input."""
+
+
+class ClaudeSession:
+    """
+    One persistent `claude` process in streaming JSON mode.
+    Prompts are written to stdin as user messages and answered by a `result` event on stdout.
+    """
+
+    ARGS = ["-p", "--input-format", "stream-json"] + STREAM_OUTPUT_ARGS
+
+    def __init__(self, command=None):
+        self.process = subprocess.Popen(
+            (command or claude_command()) + self.ARGS,
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
             text=True,
-            timeout=120,
             encoding="utf-8",
+            bufsize=1,
         )
+        self.batches = 0
+        self.next_id = 0  # compact-protocol ids handed out so far in this conversation
+        self._lines = queue.Queue()
+        self._stderr = deque(maxlen=20)
+        threading.Thread(target=self._pump_stdout, daemon=True).start()
+        threading.Thread(target=self._pump_stderr, daemon=True).start()
+
+    def _pump_stdout(self):
+        for line in self.process.stdout:
+            self._lines.put(line)
+        self._lines.put(None)
+
+    def _pump_stderr(self):
+        for line in self.process.stderr:
+            self._stderr.append(line.rstrip())
+
+    @property
+    def alive(self):
+        return self.process.poll() is None
+
+    def send(self, prompt, timeout=CLAUDE_TIMEOUT, on_text=None):
+        """Send one prompt and return the text of Claude's answer; on_text(chunk) sees it stream in."""
+        message = {"type": "user", "message": {"role": "user", "content": [{"type": "text", "text": prompt}]}}
+        try:
+            self.process.stdin.write(json.dumps(message, ensure_ascii=False) + "\n")
+            self.process.stdin.flush()
+        except (OSError, ValueError) as e:
+            raise _SessionCrashed(f"Claude session closed: {e}")
+        self.batches += 1
+
+        deadline = time.monotonic() + timeout
+        collector = _ResponseCollector(on_text)
+        while True:
+            try:
+                line = self._lines.get(timeout=max(0.0, deadline - time.monotonic()))
+            except queue.Empty:
+                self.process.kill()
+                raise RuntimeError(f"Claude CLI timed out ({timeout}s). Try a smaller batch size.")
+            if line is None:
+                raise _SessionCrashed(f"Claude session exited: {' '.join(self._stderr)}")
+            try:
+                event = json.loads(line)
+            except json.JSONDecodeError:
+                continue
+            text = collector.handle(event)
+            if text is not None:
+                return text
+
+    def close(self):
+        if self.alive:
+            try:
+                self.process.stdin.close()
+            except OSError:
+                pass
+            try:
+                self.process.wait(timeout=5)
+            except subprocess.TimeoutExpired:
+                self.process.kill()
+                self.process.wait()
+
+
+class ClaudeSessionEngine:
+    """
+    Keep up to `size` `claude` sessions open and hand batches to them, so the CLI start-up
+    cost is paid once per session instead of once per batch.
+
+    A session that crashes before answering is restarted and the prompt re-sent transparently
+    (a crash after part of the answer was streamed is reported as an error instead).
 
-        if result.returncode != 0:
-            raise RuntimeError(f"Claude CLI error: {result.stderr}")
+    A session is one conversation, so every prompt is sent again with the whole history before
+    it: the n-th batch of a session costs about n batches of input tokens. Sessions are therefore
+    recycled after `max_batches_per_session` prompts. Small values keep tokens close to one
+    process per batch while still skipping most start-ups; large values save start-ups (a few
+    seconds each) at a cost in tokens and latency that grows with every batch.
+    Use as a context manager or call close() when done.
+    """
+
+    def __init__(self, size=1, command=None, max_batches_per_session=3, timeout=CLAUDE_TIMEOUT):
+        self.command = command
+        self.max_batches_per_session = max_batches_per_session
+        self.timeout = timeout
+        self._slots = threading.BoundedSemaphore(max(1, size))
+        self._idle = []
+        self._lock = threading.Lock()
+
+    def run(self, prompt, on_text=None, metrics=None, ids=0):
+        """
+        Send a prompt through an idle session and return the response text.
+        `prompt` is a function prompt(first_id) returning the text; with `ids`, the session
+        reserves that many ids for it, starting at first_id, which never repeat in its conversation.
+        If `metrics` is a dict, it gets the time spent starting a new session (0 if one was
+        reused) and the prompt size.
+        """
+        if metrics is None:
+            metrics = {}
+        with self._slots:
+            with self._lock:
+                session = self._idle.pop() if self._idle else None
+            metrics["spawn_seconds"] = 0.0
+            if session is None or not session.alive:
+                session = self._start_session(metrics)
+            streamed = []
+
+            def forward(chunk):
+                streamed.append(True)
+                on_text(chunk)
+
+            try:
+                try:
+                    text = session.send(self._prompt(session, prompt, ids, metrics), self.timeout,
+                                        forward if on_text else None)
+                except _SessionCrashed:
+                    session.close()
+                    if streamed:
+                        raise
+                    session = self._start_session(metrics)
+                    text = session.send(self._prompt(session, prompt, ids, metrics), self.timeout, on_text)
+            except Exception:
+                session.close()
+                raise
+            if session.alive and session.batches < self.max_batches_per_session:
+                with self._lock:
+                    self._idle.append(session)
+            else:
+                session.close()
+            return text
+
+    @staticmethod
+    def _prompt(session, prompt, ids, metrics):
+        text = prompt(session.next_id)
+        session.next_id += ids
+        metrics["prompt_bytes"] = len(text.encode("utf-8"))
+        return text
+
+    def _start_session(self, metrics):
+        started = time.perf_counter()
+        session = ClaudeSession(self.command)
+        metrics["spawn_seconds"] += time.perf_counter() - started
+        return session
+
+    def close(self):
+        with self._lock:
+            sessions, self._idle = self._idle, []
+        for session in sessions:
+            session.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class BatchProcessingError(RuntimeError):
+    """
+    Raised by process_all_batches when one or more batches fail.
+    `results` holds the merged entries of every batch that did complete (in input order)
+    and `failures` maps input batch index (0-based, in the order the batches were given)
+    -> error message.
+    """
+
+    def __init__(self, message, results, failures):
+        super().__init__(message)
+        self.results = results
+        self.failures = failures
+
+
+# Rough per-entry allowance for what Claude writes back (IPA, meaning, example sentence).
+OUTPUT_TOKENS_PER_ENTRY = 40
+
+
+def estimate_tokens(entry):
+    """Cheap token estimate for sending one entry and receiving its enriched version (~4 chars/token)."""
+    chars = sum(len(str(value)) for value in entry.values()) + 12 * len(entry)
+    return chars // 4 + OUTPUT_TOKENS_PER_ENTRY
+
+
+class AdaptiveBatchSizer:
+    """
+    Size batches by an estimated token budget instead of a fixed entry count,
+    and tune that budget from how long batches actually take.
+
+    After each batch the budget grows while calls finish well under `target_latency`,
+    shrinks proportionally when they run over it, and is halved when a call fails
+    (typically a timeout), so batches stay as large as possible without timing out.
+
+    Args:
+        target_tokens: starting token budget per batch
+        min_tokens / max_tokens: bounds for the budget
+        target_latency: desired seconds per call (defaults to a third of CLAUDE_TIMEOUT)
+        max_entries: never put more than this many entries in one batch
+    """
+
+    def __init__(self, target_tokens=1500, min_tokens=200, max_tokens=12000,
+                 target_latency=None, max_entries=200):
+        self.target_tokens = target_tokens
+        self.min_tokens = min_tokens
+        self.max_tokens = max_tokens
+        self.target_latency = target_latency or CLAUDE_TIMEOUT / 3
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+
+    def record(self, tokens, seconds, ok=True):
+        """Feed back the outcome of one batch of `tokens` estimated tokens."""
+        with self._lock:
+            if not ok:
+                target = self.target_tokens * 0.5
+            elif seconds > self.target_latency:
+                target = min(self.target_tokens, tokens) * self.target_latency / seconds
+            elif seconds < self.target_latency * 0.5 and tokens >= self.target_tokens * 0.8:
+                target = self.target_tokens * 1.25
+            else:
+                return
+            self.target_tokens = int(min(self.max_tokens, max(self.min_tokens, target)))
+
+
+class _TokenBucket:
+    """Refills at `per_minute` / 60 per second, holding at most BURST_SECONDS worth."""
+
+    BURST_SECONDS = 10
+
+    def __init__(self, per_minute):
+        self.limit = per_minute / 60
+        self.rate = self.limit
+        self.level = self.capacity
+        self.updated = time.monotonic()
+
+    @property
+    def capacity(self):
+        return max(1.0, self.rate * self.BURST_SECONDS)
+
+    def refill(self, now):
+        self.level = min(self.capacity, self.level + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_for(self, amount):
+        """Seconds until `amount` (capped at the capacity, so large asks are not starved) is available."""
+        shortfall = min(amount, self.capacity) - self.level
+        return shortfall / self.rate if shortfall > 0 else 0.0
+
+    def take(self, amount):
+        self.level -= min(amount, self.capacity)
+
+
+class RateLimiter:
+    """
+    Pace Claude calls across all workers of a run.
+
+    Calls wait in acquire() until a request bucket and an estimated-token bucket both have
+    room (each refills continuously at its per-minute rate). When the backend still reports
+    rate-limit or overload errors, throttled() pauses every worker for an exponential backoff
+    with jitter (or the wait the error asked for) and halves the rates, down to a tenth of
+    the configured ones; each successful call raises them again by 5%, so a long run settles
+    near the highest rate the backend accepts instead of stalling or hammering it.
+    Without limits only the shared backoff applies.
+
+    Args:
+        requests_per_minute: request budget, or None for no request limit
+        tokens_per_minute: estimated-token budget (see estimate_tokens), or None
+        backoff: pause after the first throttle, in seconds; doubled for each consecutive one
+        max_backoff: longest single pause, in seconds
+    """
+
+    def __init__(self, requests_per_minute=None, tokens_per_minute=None, backoff=2.0, max_backoff=60.0):
+        self.requests = _TokenBucket(requests_per_minute) if requests_per_minute else None
+        self.tokens = _TokenBucket(tokens_per_minute) if tokens_per_minute else None
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.consecutive = 0  # throttles since the last successful call
+        self.paused_until = 0.0
+        self._lock = threading.Lock()
+
+    def acquire(self, tokens=0):
+        """Block until a call of `tokens` estimated tokens may start; returns the seconds waited."""
+        waited = 0.0
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                wait = self.paused_until - now
+                if self.requests is not None:
+                    self.requests.refill(now)
+                    wait = max(wait, self.requests.wait_for(1))
+                if self.tokens is not None:
+                    self.tokens.refill(now)
+                    wait = max(wait, self.tokens.wait_for(tokens))
+                if wait <= 0:
+                    if self.requests is not None:
+                        self.requests.take(1)
+                    if self.tokens is not None:
+                        self.tokens.take(tokens)
+                    return waited
+            time.sleep(wait)
+            waited += wait
+
+    def throttled(self, retry_after=None):
+        """Record a rate-limit error: pause all calls and slow down. Returns the pause in seconds."""
+        with self._lock:
+            now = time.monotonic()
+            if now < self.paused_until:
+                # Another worker's call hit the limit first; its pause covers this one too
+                return self.paused_until - now
+            delay = min(self.max_backoff, self.backoff * 2 ** self.consecutive)
+            # "Equal jitter": never less than half the backoff, so workers do not retry in lockstep
+            delay = delay / 2 + random.uniform(0, delay / 2)
+            if retry_after:
+                delay = max(delay, retry_after)
+            self.consecutive += 1
+            self.paused_until = now + delay
+            for bucket in (self.requests, self.tokens):
+                if bucket is not None:
+                    bucket.rate = max(bucket.limit / 10, bucket.rate / 2)
+                    bucket.level = min(bucket.level, bucket.capacity)
+            return delay
+
+    def succeeded(self):
+        """Record a successful call: ease the rates back up towards the configured ones."""
+        with self._lock:
+            self.consecutive = 0
+            for bucket in (self.requests, self.tokens):
+                if bucket is not None:
+                    bucket.rate = min(bucket.limit, bucket.rate + bucket.limit * 0.05)
+
+
+# With priority ordering, input is read this many queued entries ahead so there is
+# something to choose from
+PRIORITY_LOOKAHEAD = 1000
+
+
+def enrichment_priority(entry):
+    """Send-order rank of an entry: 0 without a meaning, 1 without a pronunciation, 2 otherwise."""
+    if not str(entry.get("meaning") or "").strip():
+        return 0
+    if not str(entry.get("pronunciation") or "").strip():
+        return 1
+    return 2
 
-        response_text = result.stdout.strip()
 
-        # Try to extract JSON from the response
-        # Claude might wrap it in markdown code blocks
-        json_match = re.search(r'\[.*\]', response_text, re.DOTALL)
-        if json_match:
-            corrected = json.loads(json_match.group())
-            return corrected
+class _PendingQueue:
+    """Positions waiting to be sent: lower ranks first, input order within a rank."""
+
+    def __init__(self, ranks=3):
+        self._queues = [deque() for _ in range(ranks)]
+        self._count = 0
+
+    def __len__(self):
+        return self._count
+
+    def append(self, position, rank=0):
+        self._queues[rank].append(position)
+        self._count += 1
+
+    def _head(self):
+        for queue_ in self._queues:
+            if queue_:
+                return queue_
+        raise IndexError("no pending positions")
+
+    def peek(self):
+        return self._head()[0]
+
+    def popleft(self):
+        position = self._head().popleft()
+        self._count -= 1
+        return position
+
+
+class _EnrichmentRun:
+    """
+    Bookkeeping for one process_all_batches call.
+    Every input entry gets a running position; its outputs are collected in `slots`
+    and merged into `results` strictly in input order, after which the input is dropped.
+    """
+
+    def __init__(self, cache, journal, batch_sizer, dictionary=None, priority=None):
+        self.cache = cache
+        self.journal = journal
+        self.dictionary = dictionary
+        self.batch_sizer = batch_sizer
+        self.priority = priority  # entry -> rank, or None to send in input order
+        self.inputs = {}        # position -> input entry, until merged
+        self.costs = {}         # position -> estimated tokens, while pending (adaptive sizing only)
+        self.pending_tokens = 0
+        self.slots = {}         # position -> list of corrected entries
+        self.pending = _PendingQueue()  # positions waiting to be sent to Claude
+        self.retry_queue = deque()  # (positions, tokens, attempt, delay) of failed batches to re-send
+        self.batch_ends = deque()
+        self.batch_starts = []  # first position of every input batch, for input_batch()
+        self.batch_size = 1
+        self.read = 0
+        self.merged = 0
+        self.results = []
+        self.batches_read = 0
+        self.batches_done = 0
+        self.resumed = 0
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self.dictionary_hits = 0
+        self.suspected_misspellings = 0
+        self.succeeded = 0
+        self.retried = set()
+        self.throttled = 0  # calls rejected by a rate limit and re-queued
+        self.quarantined = []
+        self._quarantined_at = {}  # position -> its quarantined item, until merged
+        self.units = {}         # in-flight batch number -> positions
+        self.streamed = queue.Queue()  # (batch number, index, entry) from streaming responses
+
+    def input_batch(self, position):
+        """Index of the input batch a position was read from."""
+        return bisect.bisect_right(self.batch_starts, position) - 1
+
+    def is_done(self, position):
+        return position < self.merged or position in self.slots
+
+    def apply_streamed(self):
+        """Accept entries that streamed in (by batch index) before their batch finished."""
+        filled = []
+        while True:
+            try:
+                n, k, entry = self.streamed.get_nowait()
+            except queue.Empty:
+                break
+            positions = self.units.get(n)
+            if positions and not self.is_done(positions[k]):
+                self.slots[positions[k]] = [entry]
+                filled.append(positions[k])
+        self._remember(filled)
+
+    def _remember(self, positions):
+        """Journal and cache newly filled positions."""
+        if not positions:
+            return
+        if self.cache is not None:
+            self.cache.put_many([(self.inputs[p], self.slots[p][0]) for p in positions], PROMPT_VERSION)
+        if self.journal is not None:
+            self.journal.record([(p, self.inputs[p], self.slots[p]) for p in positions])
+
+    def add_batch(self, batch):
+        """Register an input batch; answer what the journal, cache and dictionary know, queue the rest."""
+        start = self.read
+        positions = range(start, start + len(batch))
+        self.read += len(batch)
+        self.batches_read += 1
+        self.batch_ends.append(self.read)
+        self.batch_starts.append(start)
+        self.batch_size = max(self.batch_size, len(batch))
+
+        todo = []
+        for position, entry in zip(positions, batch):
+            self.inputs[position] = entry
+            done = self.journal.lookup(position, entry) if self.journal is not None else None
+            if done is None:
+                todo.append(position)
+            else:
+                self.slots[position] = done
+                self.resumed += 1
+
+        if self.cache is not None and todo:
+            hits = self.cache.get_many([self.inputs[p] for p in todo], PROMPT_VERSION)
+            self.cache_hits += len(hits)
+            self.cache_misses += len(todo) - len(hits)
+            for k, corrected in hits.items():
+                self.slots[todo[k]] = [corrected]
+            if self.journal is not None and hits:
+                self.journal.record([(todo[k], self.inputs[todo[k]], [hits[k]]) for k in sorted(hits)])
+            todo = [p for p in todo if p not in self.slots]
+
+        suspects = set()
+        if self.dictionary is not None and todo:
+            known = []
+            for position in todo:
+                entry = self.inputs[position]
+                completed = self.dictionary.complete(entry)
+                if completed is not None:
+                    self.slots[position] = [completed]
+                    known.append(position)
+                elif self.dictionary.suggest(entry.get("word", ""), limit=1):
+                    # One edit away from a known word: probably misspelled
+                    suspects.add(position)
+            self.suspected_misspellings += len(suspects)
+            self.dictionary_hits += len(known)
+            if self.journal is not None and known:
+                self.journal.record([(p, self.inputs[p], self.slots[p]) for p in known])
+            todo = [p for p in todo if p not in self.slots]
+
+        for position in todo:
+            rank = 0
+            if self.priority is not None and position not in suspects:
+                rank = self.priority(self.inputs[position])
+            self.pending.append(position, rank)
+        if self.batch_sizer is not None:
+            for position in todo:
+                self.costs[position] = estimate_tokens(self.inputs[position])
+                self.pending_tokens += self.costs[position]
+
+    def next_work(self, final):
+        """
+        Pop the next batch to send, or None if a full batch is not ready yet.
+        Re-sends of failed batches go first.
+        Returns (positions, estimated_tokens, attempt, delay_seconds).
+        """
+        if self.retry_queue:
+            return self.retry_queue.popleft()
+
+        sizer = self.batch_sizer
+        if sizer is None:
+            if len(self.pending) >= self.batch_size or (final and self.pending):
+                positions = [self.pending.popleft() for _ in range(min(self.batch_size, len(self.pending)))]
+                return positions, 0, 0, 0
+            return None
+
+        budget = sizer.target_tokens
+        if not self.pending or (self.pending_tokens < budget and len(self.pending) < sizer.max_entries
+                                and not final):
+            return None
+        positions = []
+        tokens = 0
+        while self.pending and len(positions) < sizer.max_entries:
+            cost = self.costs[self.pending.peek()]
+            if positions and tokens + cost > budget:
+                break
+            positions.append(self.pending.popleft())
+            tokens += cost
+            del self.costs[positions[-1]]
+        self.pending_tokens -= tokens
+        return positions, tokens, 0, 0
+
+    def recover(self, positions, tokens, attempt, error, retries, backoff):
+        """
+        Decide what to do with a failed batch: re-send it after an exponential backoff
+        while it has retries left, then split it in half, and finally quarantine single
+        entries with their error. Quarantined entries are passed through unchanged.
+        """
+        self.retried.update(positions)
+        if attempt < retries:
+            self.retry_queue.append((positions, tokens, attempt + 1, backoff * 2 ** attempt))
+        elif len(positions) > 1:
+            half = len(positions) // 2
+            share = tokens // len(positions)
+            # Halves are not retried as a whole; a failing half is split again right away
+            self.retry_queue.append((positions[:half], share * half, retries, 0))
+            self.retry_queue.append((positions[half:], share * (len(positions) - half), retries, 0))
         else:
-            raise ValueError("Could not find JSON array in Claude's response")
+            position = positions[0]
+            item = {"position": position, "entry": self.inputs[position], "error": str(error)}
+            self.quarantined.append(item)
+            self._quarantined_at[position] = item
+            # A copy, so editing the result does not change the loaded vocabulary too
+            self.slots[position] = [VocabEntry.from_dict(self.inputs[position])]
 
-    except subprocess.TimeoutExpired:
-        raise RuntimeError("Claude CLI timed out (120s). Try a smaller batch size.")
-    except json.JSONDecodeError as e:
-        raise RuntimeError(f"Failed to parse Claude's response as JSON: {e}\nResponse: {response_text[:500]}")
+    def complete(self, positions, corrected):
+        """
+        Store Claude's output for a sent batch: the k-th corrected entry belongs to the k-th
+        input (process_batch_with_claude returns exactly one per input), unless it already
+        streamed in.
+        """
+        self.succeeded += len(positions)
+        filled = []
+        for position, entry in zip(positions, corrected):
+            if not self.is_done(position):
+                self.slots[position] = [entry]
+                filled.append(position)
+        self._remember(filled)
 
+    def fill(self, positions, entries):
+        """Store the entries ({batch index: entry}) a failed batch did answer."""
+        filled = []
+        for k, entry in entries.items():
+            if not self.is_done(positions[k]):
+                self.slots[positions[k]] = [entry]
+                filled.append(positions[k])
+        self._remember(filled)
 
-def process_all_batches(batches, progress_callback=None):
+    def keep_streamed(self, positions):
+        """After a failed batch, keep what streamed in; return the positions still without output."""
+        remaining = [p for p in positions if not self.is_done(p)]
+        self.succeeded += len(positions) - len(remaining)
+        return remaining
+
+    def merge(self, results_callback=None):
+        """
+        Move finished outputs into `results` in input order, passing the newly merged entries
+        to results_callback. Returns the number of input batches completed.
+        """
+        start = len(self.results)
+        while self.merged in self.slots:
+            item = self._quarantined_at.pop(self.merged, None)
+            if item is not None:
+                item["result"] = len(self.results)
+            # Claude, the cache and the journal answer with dicts; results hold compact entries
+            self.results.extend(map(as_entry, self.slots.pop(self.merged)))
+            del self.inputs[self.merged]
+            self.merged += 1
+        if results_callback and len(self.results) > start:
+            results_callback(self.results[start:])
+        finished = 0
+        while self.batch_ends and self.batch_ends[0] <= self.merged:
+            self.batch_ends.popleft()
+            finished += 1
+        self.batches_done += finished
+        return finished
+
+    def partial_results(self):
+        """Everything that finished, in input order, including outputs stuck behind a failed batch."""
+        results = list(self.results)
+        for position in sorted(self.slots):
+            results.extend(map(as_entry, self.slots[position]))
+        return results
+
+
+def quarantined_positions(stats):
+    """Indexes, in the list process_all_batches returned, of the entries it passed through unchanged."""
+    return {item["result"] for item in stats.get("quarantined", ()) if "result" in item}
+
+
+def _timed_batch(batch, delay=0, engine=None, on_entry=None, protocol="compact", metrics=None,
+                 limiter=None, tokens=0):
+    """
+    Wait `delay` seconds (retry backoff) and for the RateLimiter, run one batch and return
+    (corrected_entries, seconds). The call's measurements, including wall_seconds and
+    throttle_seconds, are stored in `metrics` even if it fails.
+    """
+    if metrics is None:
+        metrics = {}
+    if delay:
+        time.sleep(delay)
+    if limiter is not None:
+        if not tokens and limiter.tokens is not None:
+            tokens = sum(map(estimate_tokens, batch))
+        metrics["throttle_seconds"] = limiter.acquire(tokens)
+    started = time.monotonic()
+    try:
+        corrected = process_batch_with_claude(batch, engine, on_entry, protocol, metrics)
+    finally:
+        metrics["wall_seconds"] = time.monotonic() - started
+    return corrected, metrics["wall_seconds"]
+
+
+class EnrichmentOptions:
+    """
+    How process_all_batches sends a run to Claude. The defaults send the input batches as
+    they are, one call at a time, with retries and no local answers.
+
+    Failed calls (CLI error, timeout, unparseable response) are re-sent up to `retries` times
+    with exponential backoff, then split in half down to single entries; an entry that still
+    fails is quarantined (passed through unchanged). A call rejected by a rate limit or
+    overload (RateLimitError) pauses every worker and is re-sent without using up a retry,
+    until `throttle_retries` throttles in a row.
+
+    Args:
+        max_workers: calls in flight at once
+        protocol: wire format, "compact" (diff-only) or "full"; see process_batch_with_claude
+        engine: a ClaudeSessionEngine (sized to max_workers) to reuse long-lived sessions
+        batch_sizer: an AdaptiveBatchSizer to re-pack entries by token budget
+        cache: an EnrichmentCache that answers entries it already knows
+        journal: a RunJournal that reuses recorded entries and records completed batches
+        dictionary: a DictionaryIndex that answers complete, known words (see DictionaryIndex.complete)
+        limiter: a RateLimiter pacing the calls (default: one without limits)
+        priority: send entries without a meaning, then without a pronunciation, first
+            (see enrichment_priority); results stay in input order
+        retries / backoff: re-sends per failed call, and the first wait in seconds
+        split_failures: split a call that keeps failing instead of failing the run
+        throttle_retries: consecutive throttles before a rejected call counts as failed
+    """
+
+    def __init__(self, max_workers=1, protocol="compact", engine=None, batch_sizer=None,
+                 cache=None, journal=None, dictionary=None, limiter=None, priority=True,
+                 retries=2, backoff=2.0, split_failures=True, throttle_retries=8):
+        self.max_workers = max_workers
+        self.protocol = protocol
+        self.engine = engine
+        self.batch_sizer = batch_sizer
+        self.cache = cache
+        self.journal = journal
+        self.dictionary = dictionary
+        self.limiter = limiter
+        self.priority = priority
+        self.retries = retries
+        self.backoff = backoff
+        self.split_failures = split_failures
+        self.throttle_retries = throttle_retries
+
+
+def process_all_batches(batches, progress_callback=None, *, options=None, results_callback=None,
+                        metrics_callback=None, stats=None):
     """
-    Process all vocabulary batches through Claude.
-    progress_callback(current, total) is called after each batch.
-    Returns list of all corrected entries.
+    Process all vocabulary batches through Claude, as set up by `options` (EnrichmentOptions).
+    `batches` may be a list or any iterable (e.g. iter_batches over iter_vocabulary_file);
+    it is consumed lazily, so the first batch is sent before the input is fully read.
+    progress_callback(completed, total) is called as input batches complete; when `batches`
+    has no len() the total is the number of batches read so far.
+    results_callback(entries) receives corrected entries in input order as soon as they are
+    known; responses are then streamed, so entries arrive while their call is still running.
+    metrics_callback(record) is called once per call with its timings (see core.metrics).
+    If `stats` is a dict it is filled with resumed, cache_hits, cache_misses, dictionary_hits,
+    suspected_misspellings, batches_sent, succeeded, retried, throttled, quarantined (see
+    quarantined_positions) and callback_seconds.
+    If a batch fails for good, the calls already running finish and a BatchProcessingError
+    carrying their results is raised.
+    Returns list of all corrected entries, in input order.
     """
-    all_results = []
-    total = len(batches)
+    options = options or EnrichmentOptions()
+    batch_sizer = options.batch_sizer
+    priority = enrichment_priority if options.priority else None
+    run = _EnrichmentRun(options.cache, options.journal, batch_sizer, options.dictionary, priority)
+    limiter = options.limiter or RateLimiter(backoff=options.backoff)
+    retries = options.retries
+    source = iter(batches)
+    known_total = len(batches) if hasattr(batches, "__len__") else None
+    workers = max(1, options.max_workers)
+    exhausted = False
+    sent = 0
+    failures = {}
+    in_flight = {}
+    callback_seconds = 0.0
 
-    for i, batch in enumerate(batches):
-        corrected = process_batch_with_claude(batch)
-        all_results.extend(corrected)
-        if progress_callback:
-            progress_callback(i + 1, total)
+    def report():
+        nonlocal callback_seconds
+        started = time.perf_counter()
+        if run.merge(results_callback) and progress_callback:
+            progress_callback(run.batches_done, known_total or run.batches_read)
+        callback_seconds += time.perf_counter() - started
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        while True:
+            while not failures and len(in_flight) < workers:
+                # Read ahead so the priority order has something to choose from
+                ahead = run.priority is not None and not exhausted and len(run.pending) < PRIORITY_LOOKAHEAD
+                work = None if ahead and not run.retry_queue else run.next_work(final=exhausted)
+                if work is not None:
+                    positions, tokens, attempt, delay = work
+                    on_entry = None
+                    if results_callback is not None:
+                        on_entry = lambda k, entry, n=sent: run.streamed.put((n, k, entry))
+                    metrics = {"batch": sent, "entries": len(positions), "attempt": attempt}
+                    future = pool.submit(_timed_batch, [run.inputs[p] for p in positions], delay,
+                                         options.engine, on_entry, options.protocol, metrics, limiter, tokens)
+                    in_flight[future] = (sent, positions, tokens, attempt, time.monotonic() + delay, metrics)
+                    run.units[sent] = positions
+                    sent += 1
+                    continue
+                if exhausted:
+                    break
+                try:
+                    run.add_batch(next(source))
+                except StopIteration:
+                    exhausted = True
+                report()
+
+            if not in_flight:
+                break
+
+            # While streaming, wake up regularly to pass on entries from unfinished batches
+            timeout = 0.1 if results_callback is not None else None
+            done, _ = wait(in_flight, timeout=timeout, return_when=FIRST_COMPLETED)
+            run.apply_streamed()
+            for future in done:
+                n, positions, tokens, attempt, started, metrics = in_flight.pop(future)
+                del run.units[n]
+                try:
+                    corrected, seconds = future.result()
+                except Exception as e:
+                    metrics.update(ok=False, error=str(e))
+                    throttled = isinstance(e, RateLimitError) and limiter.consecutive < options.throttle_retries
+                    if throttled:
+                        # Not the batch's fault: wait out the shared pause and send it again as it is
+                        metrics["throttled"] = True
+                        limiter.throttled(e.retry_after)
+                        run.throttled += 1
+                    elif batch_sizer is not None:
+                        batch_sizer.record(tokens, time.monotonic() - started, ok=False)
+                    incomplete = isinstance(e, IncompleteResponseError)
+                    if incomplete:
+                        run.fill(positions, e.entries)
+                    remaining = run.keep_streamed(positions)
+                    if throttled:
+                        if remaining:
+                            share = tokens * len(remaining) // len(positions)
+                            run.retry_queue.append((remaining, share, attempt, 0))
+                    # OSError means the CLI could not be launched at all; retrying will not help
+                    elif isinstance(e, OSError) or (attempt >= retries and not options.split_failures):
+                        # Reported per input batch; a re-packed call can span several
+                        for index in sorted({run.input_batch(p) for p in positions}):
+                            failures.setdefault(index, str(e))
+                    elif remaining:
+                        # Only the entries still missing are requested again; no need to wait
+                        # when the call itself worked but left some entries out
+                        share = tokens * len(remaining) // len(positions)
+                        run.recover(remaining, share, attempt, e, retries, 0 if incomplete else options.backoff)
+                else:
+                    metrics.update(ok=True, error=None)
+                    limiter.succeeded()
+                    run.complete(positions, corrected)
+                    if batch_sizer is not None:
+                        batch_sizer.record(tokens, seconds)
+                if metrics_callback is not None:
+                    metrics_callback(metrics)
+            report()
+
+    if stats is not None:
+        stats["resumed"] = run.resumed
+        stats["cache_hits"] = run.cache_hits
+        stats["cache_misses"] = run.cache_misses
+        stats["dictionary_hits"] = run.dictionary_hits
+        stats["suspected_misspellings"] = run.suspected_misspellings
+        stats["batches_sent"] = sent
+        stats["succeeded"] = run.succeeded
+        stats["retried"] = sorted(run.retried)
+        stats["throttled"] = run.throttled
+        stats["quarantined"] = sorted(run.quarantined, key=lambda q: q["position"])
+        stats["callback_seconds"] = callback_seconds
+
+    if failures:
+        first = min(failures)
+        raise BatchProcessingError(
+            f"{len(failures)} of {known_total or run.batches_read} batches failed "
+            f"(batch {first + 1}: {failures[first]})",
+            run.partial_results(),
+            failures,
+        )
 
-    return all_results
+    return run.results
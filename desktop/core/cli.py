@@ -0,0 +1,296 @@
+"""
+Command-line pipeline: import -> Claude check -> save JSON/TXT -> build theme zips.
+Runs without PyQt, for cron jobs and CI. Optional stages import their modules lazily.
+
+    python -m core words.txt -o checked.json --workers 4 --all-themes --zip-dir dist/
+"""
+import argparse
+import os
+import sys
+
+from core.metrics import MetricsLog, format_summary
+from core.bulk_import import bulk_import, expand_import_paths, format_import_report
+from core.vocabulary_processor import (
+    iter_vocabulary, iter_batches, save_vocabulary_json, save_vocabulary_txt, DedupPlan,
+)
+
+
+def _build_parser():
+    parser = argparse.ArgumentParser(
+        prog="python -m core",
+        description="Import vocabulary, check it with Claude, save it and build theme packages.",
+    )
+    parser.add_argument("inputs", nargs="+",
+                        help="vocabulary .txt, .json or .vmb (binary store) files, directories or glob patterns")
+    parser.add_argument("--import-workers", type=int, default=None,
+                        help="processes for reading several input files (default: one per CPU; 1 streams them)")
+    parser.add_argument("-o", "--output-json", help="save the result as JSON")
+    parser.add_argument("--output-txt", help="save the result as pipe-separated TXT")
+    parser.add_argument("--output-bin", help="save the result as a binary store (.vmb)")
+    parser.add_argument("--compact", action="store_true", help="write minified JSON (files and zips)")
+
+    check = parser.add_argument_group("Claude check")
+    check.add_argument("--no-check", action="store_true", help="skip Claude and only convert/package")
+    check.add_argument("--batch-size", type=int, default=15, help="entries per batch (default 15)")
+    check.add_argument("--adaptive", action="store_true", help="size batches by an adaptive token budget")
+    check.add_argument("--token-budget", type=int, default=1500, help="starting budget for --adaptive")
+    check.add_argument("-j", "--workers", type=int, default=3, help="batches sent in parallel (default 3)")
+    check.add_argument("--sessions", action="store_true", help="keep claude sessions open between batches")
+    check.add_argument("--session-batches", type=int, default=3,
+                       help="batches per session before it is restarted (default 3); each batch "
+                            "re-sends the session's history, so higher values cost more tokens")
+    check.add_argument("--protocol", choices=["compact", "full"], default="compact",
+                       help="wire format for batches (default compact)")
+    check.add_argument("--no-dedupe", action="store_true", help="send duplicate words separately")
+    check.add_argument("--no-cache", action="store_true", help="do not use the local enrichment cache")
+    check.add_argument("--cache-path", help="enrichment cache file (default: in the user data dir)")
+    check.add_argument("--dictionary", action="store_true",
+                       help="answer known, complete words from the local dictionary and add the results to it")
+    check.add_argument("--word-list", action="append", default=[], metavar="FILE",
+                       help="add a list of correctly spelled words to the local dictionary (repeatable)")
+    check.add_argument("--resume", action="store_true",
+                       help="continue an interrupted run of the same input from its journal")
+    check.add_argument("--retries", type=int, default=2, help="re-sends of a failed batch before splitting it")
+    check.add_argument("--requests-per-minute", type=float, metavar="N",
+                       help="start at most N Claude calls per minute (default: no limit)")
+    check.add_argument("--tokens-per-minute", type=float, metavar="N",
+                       help="send at most about N estimated tokens per minute (default: no limit)")
+    check.add_argument("--no-priority", action="store_true",
+                       help="send entries in input order instead of those missing a meaning or pronunciation first")
+    check.add_argument("--metrics", metavar="FILE",
+                       help="append per-batch timings to FILE as JSON lines (summary is always logged)")
+
+    themes = parser.add_argument_group("Theme packages")
+    themes.add_argument("--theme", action="append", default=[], help="build this theme's zip (repeatable)")
+    themes.add_argument("--all-themes", action="store_true", help="build every built-in theme")
+    themes.add_argument("--zip-dir", default=".", help="directory for theme zips (default: current)")
+    themes.add_argument("--compression", type=int, choices=range(10), metavar="0-9",
+                        help="zip deflate level (0 = store, 9 = smallest; default zlib's 6)")
+    themes.add_argument("--shard-size", type=int, metavar="N",
+                        help="split the vocabulary into shards of N entries (package version 2.0)")
+    themes.add_argument("--delta-from", nargs="+", metavar="ZIP",
+                        help="build delta packages instead: changes since this full package "
+                             "(and any delta packages already built on it)")
+
+    parser.add_argument("-q", "--quiet", action="store_true", help="only print errors")
+    return parser
+
+
+def _read_entries(args, log, metrics):
+    """
+    Entries from all input files in order, each read with the reader its contents call for.
+    Several files that will be held in memory anyway (dedupe, resume, --no-check) are read
+    in a process pool; otherwise they are streamed.
+    """
+    paths = expand_import_paths(args.inputs)
+    if not paths:
+        raise FileNotFoundError("No vocabulary files found in: " + ", ".join(args.inputs))
+    held = args.no_check or not args.no_dedupe or args.resume
+    if len(paths) > 1 and args.import_workers != 1 and held:
+        with metrics.stage("bulk_import") as record:
+            entries, _ = bulk_import(paths, max_workers=args.import_workers,
+                                     on_file=lambda report: log(format_import_report(report)))
+            record["count"] = len(entries)
+        return entries
+    return (entry for path in paths for entry in iter_vocabulary(path))
+
+
+def _check(args, entries, log, metrics):
+    """
+    Run the Claude stage. Returns (corrected entries, RunJournal or None); the journal is
+    closed but kept, so the run can be resumed until its output has been written.
+    """
+    from core.claude_integration import (
+        process_all_batches, EnrichmentOptions, BatchProcessingError, AdaptiveBatchSizer, ClaudeSessionEngine,
+        RateLimiter, quarantined_positions,
+    )
+
+    plan = None
+    journal = None
+    if not args.no_dedupe or args.resume:
+        # Both need the whole list up front; otherwise the input is streamed into the batches
+        with metrics.stage("import") as record:
+            entries = list(entries)
+            record["count"] = len(entries)
+        if not args.no_dedupe:
+            with metrics.stage("dedupe", len(entries)):
+                plan = DedupPlan(entries)
+            entries = plan.unique
+            if plan.duplicates:
+                log(f"Merged {plan.duplicates} duplicate rows "
+                    f"(saves about {plan.calls_saved(args.batch_size)} Claude calls).")
+        from core.run_journal import RunJournal
+        journal = RunJournal.for_entries(entries, resume=args.resume)
+        if args.resume:
+            log(f"Resuming: {len(journal)} words already completed.")
+
+    cache = None
+    if not args.no_cache:
+        from core.enrichment_cache import EnrichmentCache
+        cache = EnrichmentCache(args.cache_path)
+
+    dictionary = None
+    if args.dictionary or args.word_list:
+        from core.dictionary_index import DictionaryIndex
+        with metrics.stage("dictionary_load"):
+            dictionary = DictionaryIndex()
+            for path in args.word_list:
+                dictionary.add_word_list(path)
+
+    batch_sizer = AdaptiveBatchSizer(target_tokens=args.token_budget) if args.adaptive else None
+    engine = None
+    if args.sessions:
+        engine = ClaudeSessionEngine(size=args.workers, max_batches_per_session=args.session_batches)
+    options = EnrichmentOptions(
+        max_workers=args.workers,
+        protocol=args.protocol,
+        engine=engine,
+        batch_sizer=batch_sizer,
+        cache=cache,
+        journal=journal,
+        dictionary=dictionary,
+        limiter=RateLimiter(args.requests_per_minute, args.tokens_per_minute),
+        priority=not args.no_priority,
+        retries=args.retries,
+    )
+    stats = {}
+
+    def progress(done, total):
+        log(f"Batch {done}/{total} completed.")
+
+    try:
+        results = process_all_batches(
+            iter_batches(entries, args.batch_size),
+            options=options,
+            progress_callback=progress,
+            metrics_callback=metrics,
+            stats=stats,
+        )
+        if dictionary is not None:
+            log(f"Dictionary: {stats['dictionary_hits']} words answered locally, "
+                f"{stats['suspected_misspellings']} likely misspellings sent first.")
+            # Remember this run's words, except the ones quarantined unchanged
+            dictionary.add_entries(results, skip=quarantined_positions(stats))
+            dictionary.save()
+    except BatchProcessingError:
+        if journal is not None:
+            journal.close()
+            print("Completed batches are saved; run again with --resume to finish.", file=sys.stderr)
+        raise
+    finally:
+        log(format_summary(metrics.summary()))
+        if engine is not None:
+            engine.close()
+        if cache is not None:
+            cache.close()
+        if dictionary is not None:
+            dictionary.close()
+
+    if journal is not None:
+        journal.close()
+    if cache is not None:
+        log(f"Cache: {stats['cache_hits']} hits, {stats['cache_misses']} misses "
+            f"({stats['batches_sent']} batches sent to Claude).")
+    for item in stats.get("quarantined", []):
+        print(f"Quarantined (left unchanged): {item['entry'].get('word', '')} - {item['error']}",
+              file=sys.stderr)
+    return (plan.expand(results) if plan else results), journal
+
+
+def main(argv=None):
+    parser = _build_parser()
+    args = parser.parse_args(argv)
+    if args.delta_from and not (args.theme or args.all_themes):
+        parser.error("--delta-from needs --theme or --all-themes (the themes to build deltas for)")
+
+    def log(message):
+        if not args.quiet:
+            print(message, file=sys.stderr)
+
+    metrics = MetricsLog(args.metrics)
+    try:
+        return _run(args, log, metrics)
+    finally:
+        metrics.close()
+
+
+def _run(args, log, metrics):
+    journal = None
+    try:
+        entries = _read_entries(args, log, metrics)
+        if args.no_check:
+            with metrics.stage("import") as record:
+                results = list(entries)
+                record["count"] = len(results)
+        else:
+            results, journal = _check(args, entries, log, metrics)
+    except Exception as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
+    log(f"{len(results)} words ready.")
+
+    try:
+        status = _write_outputs(args, results, log, metrics)
+    except OSError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        if journal is not None:
+            print("Checked words are saved; run again with --resume to write them without Claude.",
+                  file=sys.stderr)
+        return 1
+    # Only now is the run's work safely on disk; until then it can be resumed
+    if status == 0 and journal is not None:
+        journal.discard()
+    return status
+
+
+def _write_outputs(args, results, log, metrics):
+    """Save the output files and build the theme packages. Returns the exit status."""
+    if args.output_json:
+        with metrics.stage("save_json", len(results)):
+            save_vocabulary_json(results, args.output_json, args.compact)
+        log(f"Saved to {args.output_json}")
+    if args.output_txt:
+        with metrics.stage("save_txt", len(results)):
+            save_vocabulary_txt(results, args.output_txt)
+        log(f"Saved to {args.output_txt}")
+    if args.output_bin:
+        from core.binary_store import write_binary_vocabulary
+        with metrics.stage("save_bin", len(results)):
+            write_binary_vocabulary(results, args.output_bin)
+        log(f"Saved to {args.output_bin}")
+
+    theme_names = list(args.theme)
+    if args.all_themes or theme_names:
+        from core.theme_builder import build_theme_zips, BUILT_IN_THEMES
+        if args.all_themes:
+            theme_names += [name for name in BUILT_IN_THEMES if name not in theme_names]
+        if args.delta_from:
+            return _build_deltas(args, theme_names, results, log)
+        try:
+            # One pass: the vocabulary is encoded and compressed once for all themes
+            with metrics.stage("themes", len(results)):
+                paths = build_theme_zips(theme_names, results, args.zip_dir, compact=args.compact,
+                                         compresslevel=args.compression, shard_size=args.shard_size)
+        except ValueError as e:
+            print(f"Error: {e}", file=sys.stderr)
+            return 2
+        for path in paths.values():
+            log(f"Theme ZIP saved to {path}")
+    return 0
+
+
+def _build_deltas(args, theme_names, results, log):
+    from core.theme_builder import build_delta_zip, order_package_chain
+    try:
+        base, previous = order_package_chain(args.delta_from)
+        os.makedirs(args.zip_dir, exist_ok=True)
+        for name in theme_names:
+            path = os.path.join(args.zip_dir, f"vocabmaster_{name}.delta{len(previous) + 1}.zip")
+            _, summary = build_delta_zip(name, results, base, path, previous, compact=args.compact,
+                                         compresslevel=args.compression)
+            log(f"Delta package saved to {path} ({summary['added']} added, "
+                f"{summary['changed']} changed, {summary['removed']} removed)")
+    except (ValueError, OSError, KeyError) as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 2
+    return 0
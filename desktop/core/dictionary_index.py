@@ -0,0 +1,207 @@
+"""
+Local dictionary index: words we already know, from previously enriched decks and from
+supplied word lists, so process_all_batches can answer correct, known entries itself and
+only send misspelled or incomplete ones to Claude.
+
+Enriched entries are kept in a binary store (entries.vmb) and decoded only when needed;
+plain word lists are kept as one word per line (words.txt). Both live in
+<user data dir>/dictionary by default.
+"""
+import os
+from collections import Counter
+
+from core.binary_store import BinaryVocabulary, write_binary_vocabulary
+from core.entry import FIELDS, VocabEntry
+from core.user_data import user_data_dir
+from core.vocabulary_processor import normalize_word
+
+
+# Edits are tried over at most this many of the most common letters in the index
+MAX_ALPHABET = 64
+
+
+def is_complete(entry):
+    """True if every field Claude would fill in is present."""
+    return all(str(entry.get(field) or "").strip() for field in FIELDS)
+
+
+def _same_text(a, b):
+    return " ".join(str(a).split()).casefold() == " ".join(str(b).split()).casefold()
+
+
+class DictionaryIndex:
+    """
+    Known words and their enriched entries, looked up by normalized word.
+
+    Exact lookups are dict lookups. suggest() finds known words one edit away (a deletion,
+    insertion, substitution or transposition) by generating the edits of the query and
+    testing them against the word set, which keeps lookups well under a millisecond without
+    the memory cost of a precomputed deletion index.
+
+    Args:
+        directory: where entries.vmb and words.txt are kept (defaults to <user data dir>/dictionary)
+    """
+
+    def __init__(self, directory=None):
+        self.directory = directory or user_data_dir("dictionary")
+        self._store = None
+        self._rows = {}       # normalized word -> row in the binary store
+        self._added = {}      # normalized word -> entry added since the last save
+        self._words = set()   # every known normalized word
+        self._extra_words = set()  # words from word lists
+        self._alphabet = ""
+        self._load()
+
+    @property
+    def entries_path(self):
+        return os.path.join(self.directory, "entries.vmb")
+
+    @property
+    def words_path(self):
+        return os.path.join(self.directory, "words.txt")
+
+    def _load(self):
+        if os.path.exists(self.entries_path):
+            self._store = BinaryVocabulary(self.entries_path)
+            for row in range(len(self._store)):
+                self._rows[normalize_word(self._store.field(row, "word"))] = row
+            self._words.update(self._rows)
+        if os.path.exists(self.words_path):
+            with open(self.words_path, "r", encoding="utf-8") as f:
+                self._extra_words.update(line.strip() for line in f if line.strip())
+            self._words.update(self._extra_words)
+        self._alphabet = ""
+
+    def __len__(self):
+        return len(self._words)
+
+    def __contains__(self, word):
+        return normalize_word(word) in self._words
+
+    def add_entries(self, entries, skip=()):
+        """
+        Remember enriched entries; incomplete ones, and those at the positions in `skip`
+        (e.g. quarantined_positions of a run), are left out. Returns how many were added.
+        """
+        added = 0
+        for position, entry in enumerate(entries):
+            if position in skip:
+                continue
+            key = normalize_word(entry.get("word", ""))
+            if key and is_complete(entry):
+                self._added[key] = VocabEntry.from_dict(entry)
+                self._words.add(key)
+                added += 1
+        self._alphabet = ""
+        return added
+
+    def add_words(self, words):
+        """Add correctly spelled words (e.g. a word list); they count as known for spelling only."""
+        for word in words:
+            key = normalize_word(word)
+            if key:
+                self._extra_words.add(key)
+                self._words.add(key)
+        self._alphabet = ""
+
+    def add_word_list(self, path):
+        """Add a word list file: one word per line, '#' comments and anything after '|' or a tab ignored."""
+        with open(path, "r", encoding="utf-8") as f:
+            self.add_words(line.split("|", 1)[0].split("\t", 1)[0] for line in f
+                           if line.strip() and not line.lstrip().startswith("#"))
+
+    def lookup(self, word):
+        """The enriched entry known for `word`, or None."""
+        key = normalize_word(word)
+        if key in self._added:
+            return self._added[key]
+        row = self._rows.get(key)
+        return self._store[row] if row is not None else None
+
+    def _letters(self):
+        if not self._alphabet:
+            counts = Counter()
+            for word in self._words:
+                counts.update(word)
+            self._alphabet = "".join(ch for ch, _ in counts.most_common(MAX_ALPHABET))
+        return self._alphabet
+
+    def suggest(self, word, limit=5):
+        """Known words one edit away from `word` (empty if it is known itself or nothing is close)."""
+        key = normalize_word(word)
+        if not key or key in self._words:
+            return []
+        letters = self._letters()
+        splits = [(key[:i], key[i:]) for i in range(len(key) + 1)]
+        candidates = set()
+        for left, right in splits:
+            if right:
+                candidates.add(left + right[1:])
+                if len(right) > 1:
+                    candidates.add(left + right[1] + right[0] + right[2:])
+                for ch in letters:
+                    candidates.add(left + ch + right[1:])
+            for ch in letters:
+                candidates.add(left + ch + right)
+        return sorted(candidates & self._words)[:limit]
+
+    def complete(self, entry):
+        """
+        Answer an entry locally if possible: a complete entry whose word is known is returned
+        as a copy (never the input object itself), and an entry whose word has a known enriched entry gets its missing
+        fields filled from it, provided the fields it does have agree with that entry (a
+        different meaning may be a different sense of the word, which the stored sentence
+        would not fit). Returns None when the entry should go to Claude.
+        """
+        key = normalize_word(entry.get("word", ""))
+        if not key or key not in self._words:
+            return None
+        if is_complete(entry):
+            return VocabEntry.from_dict(entry)
+        known = self.lookup(key)
+        if known is None:
+            return None
+        for field in FIELDS[1:]:
+            value = str(entry.get(field) or "").strip()
+            if value and not _same_text(value, known.get(field, "")):
+                return None
+        # Fields in the usual order, like Claude's answers, then any other keys
+        completed = VocabEntry(*[entry.get(field) if str(entry.get(field) or "").strip() else known.get(field, "")
+                                 for field in FIELDS])
+        for key, value in entry.items():
+            if key not in completed:
+                completed[key] = value
+        return completed
+
+    def save(self):
+        """Write entries added since loading (merged with the stored ones) and the word list."""
+        os.makedirs(self.directory, exist_ok=True)
+        if self._added:
+            def merged():
+                if self._store is not None:
+                    for row in range(len(self._store)):
+                        entry = self._store[row]
+                        if normalize_word(entry.get("word", "")) not in self._added:
+                            yield entry
+                yield from self._added.values()
+
+            new_path = self.entries_path + ".new"
+            write_binary_vocabulary(merged(), new_path)
+            if self._store is not None:
+                # Windows cannot replace a file that is still mapped
+                self._store.close()
+            os.replace(new_path, self.entries_path)
+            self._store = BinaryVocabulary(self.entries_path)
+            self._rows = {}
+            for row in range(len(self._store)):
+                self._rows[normalize_word(self._store.field(row, "word"))] = row
+            self._added = {}
+        with open(self.words_path + ".new", "w", encoding="utf-8") as f:
+            for word in sorted(self._extra_words):
+                f.write(word + "\n")
+        os.replace(self.words_path + ".new", self.words_path)
+
+    def close(self):
+        if self._store is not None:
+            self._store.close()
+            self._store = None
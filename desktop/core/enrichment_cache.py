@@ -0,0 +1,129 @@
+"""
+Enrichment cache: remember Claude's corrected entries on disk so that words which were
+already checked are answered locally instead of being sent to Claude again.
+Backed by a single SQLite file under the user data dir.
+"""
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+
+from core.entry import to_plain
+from core.user_data import user_data_dir
+
+
+DEFAULT_MAX_ENTRIES = 200_000
+DEFAULT_MAX_AGE_DAYS = 180
+
+
+def normalize_text(text):
+    """Case-fold and collapse whitespace so trivially different inputs share a cache key."""
+    return re.sub(r"\s+", " ", (text or "").strip()).casefold()
+
+
+def cache_key(entry, version):
+    """Key for an input entry: normalized word + meaning + prompt template version."""
+    raw = "\x1f".join([version, normalize_text(entry.get("word")), normalize_text(entry.get("meaning"))])
+    return hashlib.sha1(raw.encode("utf-8")).hexdigest()
+
+
+class EnrichmentCache:
+    """
+    SQLite-backed cache of corrected vocabulary entries.
+
+    Args:
+        path: database file (defaults to <user data dir>/enrichment_cache.sqlite3)
+        max_entries: keep at most this many rows; least recently used rows are evicted first
+        max_age_days: rows not used for this many days are evicted
+    """
+
+    def __init__(self, path=None, max_entries=DEFAULT_MAX_ENTRIES, max_age_days=DEFAULT_MAX_AGE_DAYS):
+        self.path = path or os.path.join(user_data_dir(), "enrichment_cache.sqlite3")
+        self.max_entries = max_entries
+        self.max_age_days = max_age_days
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS entries ("
+            " key TEXT PRIMARY KEY,"
+            " entry TEXT NOT NULL,"
+            " created REAL NOT NULL,"
+            " used REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS entries_used ON entries(used)")
+        self._conn.commit()
+        self.evict()
+
+    def get_many(self, entries, version):
+        """
+        Look up a list of input entries.
+        Returns {index: corrected_entry} for the entries that were found.
+        """
+        keys = [cache_key(entry, version) for entry in entries]
+        found = {}
+        with self._lock:
+            for start in range(0, len(keys), 500):
+                chunk = keys[start:start + 500]
+                rows = self._conn.execute(
+                    f"SELECT key, entry FROM entries WHERE key IN ({','.join('?' * len(chunk))})",
+                    chunk,
+                ).fetchall()
+                found.update(rows)
+            if found:
+                now = time.time()
+                self._conn.executemany("UPDATE entries SET used = ? WHERE key = ?", [(now, k) for k in found])
+                self._conn.commit()
+
+        results = {i: json.loads(found[key]) for i, key in enumerate(keys) if key in found}
+        self.hits += len(results)
+        self.misses += len(entries) - len(results)
+        return results
+
+    def put_many(self, pairs, version):
+        """Store (input_entry, corrected_entry) pairs."""
+        now = time.time()
+        rows = [
+            (cache_key(source, version), json.dumps(to_plain(corrected), ensure_ascii=False), now, now)
+            for source, corrected in pairs
+        ]
+        if not rows:
+            return
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO entries (key, entry, created, used) VALUES (?, ?, ?, ?)",
+                rows,
+            )
+            self._conn.commit()
+
+    def evict(self):
+        """Drop rows older than max_age_days, then the least recently used rows above max_entries."""
+        with self._lock:
+            if self.max_age_days is not None:
+                cutoff = time.time() - self.max_age_days * 86400
+                self._conn.execute("DELETE FROM entries WHERE used < ?", (cutoff,))
+            if self.max_entries is not None:
+                self._conn.execute(
+                    "DELETE FROM entries WHERE key IN ("
+                    " SELECT key FROM entries ORDER BY used DESC LIMIT -1 OFFSET ?)",
+                    (self.max_entries,),
+                )
+            self._conn.commit()
+
+    def clear(self):
+        """Remove every cached entry."""
+        with self._lock:
+            self._conn.execute("DELETE FROM entries")
+            self._conn.commit()
+
+    def __len__(self):
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM entries").fetchone()[0]
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,172 @@
+"""
+Compact vocabulary entry: a mapping with the four vocabulary fields in slots.
+
+A dict per entry costs about twice the memory of the entry's strings once decks reach a
+million words. VocabEntry keeps word, pronunciation, meaning and example_sentence in
+__slots__ and anything else (ids, fields from newer formats) in a small dict that usually
+does not exist. It behaves like the dicts it replaces (get, [], in, items, update, copy,
+dict(entry), == with a dict), so code that reads or edits entries works with either.
+
+JSON cannot encode it directly: pass entry_json_default as an encoder's `default`, or
+convert with to_plain() / to_dict() first (faster on hot paths). Absent fields stay absent,
+so an entry round-trips to the same JSON object (fields in the order above, then the others).
+"""
+from collections.abc import MutableMapping
+
+
+FIELDS = ("word", "pronunciation", "meaning", "example_sentence")
+_FIELD_SET = frozenset(FIELDS)
+_new = object.__new__
+
+
+class VocabEntry(MutableMapping):
+    """
+    One vocabulary entry. A field that is None is absent (not in the mapping); extra keys
+    live in `_extra`.
+
+        VocabEntry(word="abandon", meaning="to give up")
+        VocabEntry.from_dict({"word": "abandon", "meaning": "to give up", "id": 3})
+    """
+
+    __slots__ = FIELDS + ("_extra",)
+
+    def __init__(self, word=None, pronunciation=None, meaning=None, example_sentence=None, extra=None):
+        self.word = word
+        self.pronunciation = pronunciation
+        self.meaning = meaning
+        self.example_sentence = example_sentence
+        self._extra = extra or None
+
+    @classmethod
+    def from_dict(cls, data):
+        """Build an entry from a dict (or another entry); extra keys are kept."""
+        if type(data) is cls:
+            return data.copy()
+        # Slots are filled directly: this runs once per entry read from JSON
+        entry = _new(cls)
+        get = data.get
+        entry.word = get("word")
+        entry.pronunciation = get("pronunciation")
+        entry.meaning = get("meaning")
+        entry.example_sentence = get("example_sentence")
+        if data.keys() <= _FIELD_SET:
+            entry._extra = None
+        else:
+            entry._extra = {key: value for key, value in data.items() if key not in _FIELD_SET}
+        return entry
+
+    def to_dict(self):
+        """A plain dict with the same keys, in JSON order."""
+        data = {}
+        if self.word is not None:
+            data["word"] = self.word
+        if self.pronunciation is not None:
+            data["pronunciation"] = self.pronunciation
+        if self.meaning is not None:
+            data["meaning"] = self.meaning
+        if self.example_sentence is not None:
+            data["example_sentence"] = self.example_sentence
+        if self._extra:
+            data.update(self._extra)
+        return data
+
+    def copy(self):
+        return VocabEntry(self.word, self.pronunciation, self.meaning, self.example_sentence,
+                          dict(self._extra) if self._extra else None)
+
+    def __reduce__(self):
+        # Positional and slot-free, so pickling (e.g. from bulk import workers) stays small
+        return VocabEntry, (self.word, self.pronunciation, self.meaning, self.example_sentence, self._extra)
+
+    def __repr__(self):
+        return f"VocabEntry({self.to_dict()!r})"
+
+    # --- Mapping interface (get and __contains__ are hot; the mixins would go through __getitem__) ---
+
+    def __getitem__(self, key):
+        if key in _FIELD_SET:
+            value = getattr(self, key)
+            if value is not None:
+                return value
+        elif self._extra and key in self._extra:
+            return self._extra[key]
+        raise KeyError(key)
+
+    def get(self, key, default=None):
+        if key in _FIELD_SET:
+            value = getattr(self, key)
+            return default if value is None else value
+        return self._extra.get(key, default) if self._extra else default
+
+    def __contains__(self, key):
+        if key in _FIELD_SET:
+            return getattr(self, key) is not None
+        return bool(self._extra) and key in self._extra
+
+    def __setitem__(self, key, value):
+        if key in _FIELD_SET:
+            if value is None:
+                raise ValueError(f"{key} cannot be None")
+            setattr(self, key, value)
+        else:
+            if self._extra is None:
+                self._extra = {}
+            self._extra[key] = value
+
+    def __delitem__(self, key):
+        if key in _FIELD_SET:
+            if getattr(self, key) is None:
+                raise KeyError(key)
+            setattr(self, key, None)
+        elif self._extra and key in self._extra:
+            del self._extra[key]
+        else:
+            raise KeyError(key)
+
+    # Snapshots rather than live views, but much faster than the mixins' per-key lookups
+    def keys(self):
+        return self.to_dict().keys()
+
+    def items(self):
+        return self.to_dict().items()
+
+    def values(self):
+        return self.to_dict().values()
+
+    def __iter__(self):
+        for field in FIELDS:
+            if getattr(self, field) is not None:
+                yield field
+        if self._extra:
+            yield from self._extra
+
+    def __len__(self):
+        count = (self.word is not None) + (self.pronunciation is not None) \
+            + (self.meaning is not None) + (self.example_sentence is not None)
+        return count + (len(self._extra) if self._extra else 0)
+
+    def __eq__(self, other):
+        if isinstance(other, VocabEntry):
+            return self.to_dict() == other.to_dict()
+        if isinstance(other, dict):
+            return self.to_dict() == other
+        return NotImplemented
+
+    __hash__ = None
+
+
+def as_entry(data):
+    """`data` as a VocabEntry: entries are returned as they are, dicts are converted."""
+    return data if type(data) is VocabEntry else VocabEntry.from_dict(data)
+
+
+def to_plain(obj):
+    """`obj` as json can encode it: a VocabEntry becomes a dict, anything else is returned as is."""
+    return obj.to_dict() if type(obj) is VocabEntry else obj
+
+
+def entry_json_default(obj):
+    """`default` hook for json encoders, so lists of entries can be dumped directly."""
+    if isinstance(obj, VocabEntry):
+        return obj.to_dict()
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
@@ -0,0 +1,127 @@
+"""
+Run metrics: per-batch timing records from process_all_batches, stage timings,
+an optional JSON-lines export and a short summary for the log.
+
+Each batch record is a dict with: batch, entries, attempt (0 for the first try, n for the
+n-th retry), mode ("process" or "session"), spawn_seconds (starting the `claude` process,
+0 when a session was reused), wall_seconds (the whole call, without backoff waits),
+throttle_seconds (time spent waiting for the rate limiter), prompt_bytes, response_bytes,
+parse_seconds, ok and error, plus throttled=True when a rate limit rejected the call.
+Stage records ({"stage": name, "seconds", "count"}) time work around the batches,
+e.g. importing a file or saving the results.
+"""
+import json
+import math
+import threading
+import time
+from contextlib import contextmanager
+
+
+def percentile(values, q):
+    """The q-th percentile (0-100) of values, by nearest rank; None if there are none."""
+    if not values:
+        return None
+    ordered = sorted(values)
+    rank = max(1, math.ceil(q / 100 * len(ordered)))
+    return ordered[rank - 1]
+
+
+def summarize(records, elapsed=None):
+    """
+    Summarize batch records: counts, p50/p95 latency, spawn and parse cost, bytes and
+    throughput. `elapsed` is the run's wall-clock time used for words/min; without it the
+    sum of batch wall times is used (which overstates it when batches ran in parallel).
+    """
+    batches = [r for r in records if "batch" in r]
+    ok = [r for r in batches if r.get("ok")]
+    walls = [r["wall_seconds"] for r in ok]
+    words = sum(r["entries"] for r in ok)
+    if elapsed is None:
+        elapsed = sum(walls)
+    return {
+        "batches": len(batches),
+        "failed": len(batches) - len(ok),
+        "retries": sum(1 for r in batches if r.get("attempt")),
+        "throttled": sum(1 for r in batches if r.get("throttled")),
+        "throttle_seconds": sum(r.get("throttle_seconds", 0) for r in batches),
+        "words": words,
+        "p50_seconds": percentile(walls, 50),
+        "p95_seconds": percentile(walls, 95),
+        "spawn_seconds": sum(r.get("spawn_seconds", 0) for r in batches),
+        "parse_seconds": sum(r.get("parse_seconds", 0) for r in batches),
+        "prompt_bytes": sum(r.get("prompt_bytes", 0) for r in batches),
+        "response_bytes": sum(r.get("response_bytes", 0) for r in batches),
+        "elapsed_seconds": elapsed,
+        "words_per_minute": words * 60 / elapsed if elapsed else None,
+        "stages": {r["stage"]: r["seconds"] for r in records if "stage" in r},
+    }
+
+
+def format_summary(summary):
+    """Render a summary as a few log lines."""
+    if not summary["batches"]:
+        return "No batches were sent to Claude."
+    lines = [
+        f"Batches: {summary['batches']} sent, {summary['failed']} failed, {summary['retries']} retries.",
+    ]
+    if summary["throttled"] or summary["throttle_seconds"] >= 0.05:
+        lines.append(f"Rate limits: {summary['throttled']} calls rejected, "
+                     f"{summary['throttle_seconds']:.1f}s spent waiting for the limiter.")
+    lines += [
+        f"Latency per batch: p50 {summary['p50_seconds'] or 0:.2f}s, p95 {summary['p95_seconds'] or 0:.2f}s "
+        f"(process start {summary['spawn_seconds']:.2f}s, parsing {summary['parse_seconds']:.3f}s in total).",
+        f"Traffic: {summary['prompt_bytes'] / 1024:.1f} KB sent, {summary['response_bytes'] / 1024:.1f} KB received.",
+    ]
+    if summary["words_per_minute"] is not None:
+        lines.append(f"Throughput: {summary['words_per_minute']:.0f} words/min "
+                     f"({summary['words']} words in {summary['elapsed_seconds']:.1f}s).")
+    if summary["stages"]:
+        lines.append("Stages: " + ", ".join(f"{name} {seconds:.2f}s" for name, seconds in summary["stages"].items()))
+    return "\n".join(lines)
+
+
+class MetricsLog:
+    """
+    Collects metric records; pass it as process_all_batches(..., metrics_callback=...).
+    With a `path`, every record is also appended to that file as one JSON line.
+    """
+
+    def __init__(self, path=None):
+        self.records = []
+        self.started = time.monotonic()
+        self._lock = threading.Lock()
+        self._file = open(path, "a", encoding="utf-8") if path else None
+
+    def __call__(self, record):
+        with self._lock:
+            self.records.append(record)
+            if self._file is not None:
+                self._file.write(json.dumps(record, ensure_ascii=False) + "\n")
+                self._file.flush()
+
+    @contextmanager
+    def stage(self, name, count=None):
+        """
+        Time a block of work and record it:
+            with log.stage("import") as record:
+                entries = parse_vocabulary_file(path)
+                record["count"] = len(entries)
+        """
+        record = {"stage": name, "seconds": 0.0, "count": count}
+        started = time.perf_counter()
+        try:
+            yield record
+        finally:
+            record["seconds"] = time.perf_counter() - started
+            self(record)
+
+    def summary(self, elapsed=None):
+        """summarize() the records so far; elapsed defaults to the time since the log was created."""
+        with self._lock:
+            records = list(self.records)
+        return summarize(records, time.monotonic() - self.started if elapsed is None else elapsed)
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
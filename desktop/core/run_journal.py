@@ -0,0 +1,100 @@
+"""
+Run journal: record each completed batch of an enrichment run on disk as it arrives,
+so an interrupted run can be resumed without re-sending the finished batches.
+The journal is a JSON-lines file; every line holds the outputs of one completed batch.
+"""
+import hashlib
+import json
+import os
+
+from core.entry import entry_json_default, to_plain
+from core.user_data import user_data_dir
+
+
+# Same output as json.dumps(..., ensure_ascii=False, sort_keys=True), without its per-call setup
+_FINGERPRINT_ENCODER = json.JSONEncoder(ensure_ascii=False, sort_keys=True)
+
+
+def entry_fingerprint(entry):
+    """Stable hash of an input entry's content."""
+    raw = _FINGERPRINT_ENCODER.encode(to_plain(entry))
+    return hashlib.sha1(raw.encode("utf-8")).hexdigest()
+
+
+def run_id_for(entries):
+    """Identify a run by the vocabulary it processes, so the same list finds its journal again."""
+    digest = hashlib.sha1()
+    for entry in entries:
+        digest.update(entry_fingerprint(entry).encode("ascii"))
+    return digest.hexdigest()[:16]
+
+
+class RunJournal:
+    """
+    Append-only journal of completed batch outputs for one run.
+
+    Outputs are stored per input position together with a fingerprint of the input entry,
+    so a resumed run only reuses an output if the entry at that position is unchanged.
+
+    Args:
+        path: journal file
+        resume: load an existing journal (True) or start a fresh one (False)
+    """
+
+    def __init__(self, path, resume=True):
+        self.path = path
+        self._done = {}  # position -> (fingerprint, outputs)
+        if resume and os.path.exists(path):
+            self._load()
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._file = open(path, "a" if resume else "w", encoding="utf-8")
+
+    @classmethod
+    def for_entries(cls, entries, resume=True):
+        """Open the journal belonging to this vocabulary under the user data dir."""
+        return cls(cls.path_for(entries), resume=resume)
+
+    @staticmethod
+    def path_for(entries):
+        return os.path.join(user_data_dir("journals"), run_id_for(entries) + ".jsonl")
+
+    def _load(self):
+        with open(self.path, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    # A crash can leave a partially written last line
+                    continue
+                for position, fingerprint, outputs in record.get("items", []):
+                    self._done[position] = (fingerprint, outputs)
+
+    def lookup(self, position, entry):
+        """Return the recorded outputs for the entry at `position`, or None if not done yet."""
+        done = self._done.get(position)
+        if done is None or done[0] != entry_fingerprint(entry):
+            return None
+        return done[1]
+
+    def record(self, items):
+        """Append one completed batch: items is a list of (position, input_entry, outputs)."""
+        rows = []
+        for position, entry, outputs in items:
+            fingerprint = entry_fingerprint(entry)
+            self._done[position] = (fingerprint, outputs)
+            rows.append([position, fingerprint, outputs])
+        self._file.write(json.dumps({"items": rows}, ensure_ascii=False, default=entry_json_default) + "\n")
+        self._file.flush()
+
+    def __len__(self):
+        return len(self._done)
+
+    def close(self):
+        if not self._file.closed:
+            self._file.close()
+
+    def discard(self):
+        """Close and delete the journal (after a run completed successfully)."""
+        self.close()
+        if os.path.exists(self.path):
+            os.remove(self.path)
@@ -0,0 +1,147 @@
+"""
+In-memory search index over a loaded vocabulary list, used by the desktop tables' search box.
+
+Queries return positions into the indexed list, in list order, so a view can show the
+matching rows without copying entries.
+"""
+import bisect
+
+
+PREFIX = "prefix"
+SUBSTRING = "substring"
+
+# Filters on fields that are still empty
+MISSING_PRONUNCIATION = "pronunciation"
+MISSING_EXAMPLE = "example_sentence"
+MISSING_FILTERS = (MISSING_PRONUNCIATION, MISSING_EXAMPLE)
+
+SEARCH_FIELDS = ("word", "meaning", "example_sentence")
+
+
+def _fold(value):
+    return str(value or "").strip().casefold()
+
+
+class SearchIndex:
+    """
+    Word, meaning and example sentence of every entry, case-folded, plus the positions whose
+    pronunciation or example sentence is empty.
+
+    Prefix queries match the start of the word and use a sorted list of (word, position)
+    pairs, so they cost a binary search plus the matches. Substring queries match anywhere in
+    the word, meaning or example sentence and scan one folded string per entry; when a query
+    extends the previous one (the usual case while typing) only the previous matches are
+    scanned again.
+
+    Entries are added with add() as they load and refreshed with update() when they are
+    enriched or edited; neither rebuilds the index.
+    """
+
+    def __init__(self, entries=()):
+        self._words = []
+        self._texts = []
+        self._missing = {name: set() for name in MISSING_FILTERS}
+        self._sorted = []  # (folded word, position), sorted; may hold stale pairs
+        self._pending = []  # pairs added since _sorted was last sorted
+        self._stale = 0
+        self._generation = 0
+        self._last = None  # (generation, query, matches) of the last substring query
+        self.add(entries)
+
+    def __len__(self):
+        return len(self._words)
+
+    def _index_entry(self, position, entry):
+        word = _fold(entry.get("word"))
+        text = "\n".join(_fold(entry.get(field)) for field in SEARCH_FIELDS)
+        for name, positions in self._missing.items():
+            if _fold(entry.get(name)):
+                positions.discard(position)
+            else:
+                positions.add(position)
+        self._pending.append((word, position))
+        return word, text
+
+    def add(self, entries):
+        """Index entries appended to the end of the list."""
+        for entry in entries:
+            word, text = self._index_entry(len(self._words), entry)
+            self._words.append(word)
+            self._texts.append(text)
+        if len(self._pending) * 8 > len(self._sorted):
+            # Sort while loading rather than on the first query; growing by an eighth keeps this linear per step
+            self._sorted_words()
+        self._generation += 1
+
+    def update(self, position, entry):
+        """Re-index the entry at a position after it was enriched or edited."""
+        word, text = self._index_entry(position, entry)
+        if word != self._words[position]:
+            self._stale += 1
+        else:
+            # Already in the sorted list under the same word
+            self._pending.pop()
+        self._words[position] = word
+        self._texts[position] = text
+        self._generation += 1
+
+    def _sorted_words(self):
+        if self._stale > len(self._words) // 2:
+            # Drop pairs whose word has since changed
+            words = self._words
+            self._sorted = [pair for pair in self._sorted if words[pair[1]] == pair[0]]
+            self._pending = [pair for pair in self._pending if words[pair[1]] == pair[0]]
+            self._stale = 0
+        if self._pending:
+            if len(self._pending) * 32 < len(self._sorted):
+                for pair in self._pending:
+                    bisect.insort(self._sorted, pair)
+            else:
+                self._sorted.extend(self._pending)
+                self._sorted.sort()
+            self._pending = []
+        return self._sorted
+
+    def _prefix(self, query):
+        pairs = self._sorted_words()
+        words = self._words
+        matches = set()
+        for i in range(bisect.bisect_left(pairs, (query,)), len(pairs)):
+            word, position = pairs[i]
+            if not word.startswith(query):
+                break
+            if words[position] == word:
+                matches.add(position)
+        # A word changed back and forth can leave the same pair in the list twice
+        return sorted(matches)
+
+    def _substring(self, query):
+        texts = self._texts
+        last = self._last
+        if last is not None and last[0] == self._generation and query.startswith(last[1]):
+            matches = [position for position in last[2] if query in texts[position]]
+        else:
+            matches = [position for position, text in enumerate(texts) if query in text]
+        self._last = (self._generation, query, matches)
+        return matches
+
+    def search(self, query="", mode=SUBSTRING, missing=()):
+        """
+        Positions of the matching entries, in list order.
+
+        Args:
+            query: text to look for (case-insensitive); empty matches every entry
+            mode: PREFIX (start of the word) or SUBSTRING (anywhere in word, meaning or example)
+            missing: any of MISSING_FILTERS; entries must have all of those fields empty
+        """
+        query = _fold(query)
+        if not query:
+            matches = range(len(self._words))
+        elif mode == PREFIX:
+            matches = self._prefix(query)
+        else:
+            matches = self._substring(query)
+        for name in missing:
+            positions = self._missing[name]
+            matches = [position for position in matches if position in positions]
+        return list(matches)
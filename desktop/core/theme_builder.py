@@ -1,10 +1,21 @@
 """
 Theme builder: create themed zip files containing vocabulary data + theme config + assets.
 """
+import io
 import json
 import os
 import shutil
+import tempfile
 import zipfile
+from concurrent.futures import ThreadPoolExecutor
+
+from core.atomic_file import atomic_output
+from core.entry import entry_json_default
+from core.vocabulary_processor import (
+    iter_batches, iter_vocabulary_json_chunks, write_vocabulary_json,
+    VocabularyIndex, diff_vocabulary, apply_delta_to_index, index_version,
+)
+from core.theme_reader import ThemePackageReader
 
 
 BUILT_IN_THEMES = {
@@ -83,49 +94,257 @@ BUILT_IN_THEMES = {
 }
 
 
-def build_theme_zip(theme_name, vocabulary_data, output_path, custom_theme=None):
+# manifest.json "version" of packages whose vocabulary is split into shards
+SHARDED_VERSION = "2.0"
+
+THEMES_DIR = os.path.join(os.path.dirname(__file__), "..", "themes")
+
+
+def _theme_config(theme_name, custom_theme=None):
+    if custom_theme:
+        return custom_theme
+    if theme_name in BUILT_IN_THEMES:
+        return BUILT_IN_THEMES[theme_name]
+    raise ValueError(f"Unknown theme: {theme_name}. Available: {list(BUILT_IN_THEMES.keys())}")
+
+
+def _dumps(data, compact):
+    if compact:
+        return json.dumps(data, ensure_ascii=False, separators=(",", ":"), default=entry_json_default)
+    return json.dumps(data, ensure_ascii=False, indent=2, default=entry_json_default)
+
+
+def _compression(compresslevel):
+    return zipfile.ZIP_STORED if compresslevel == 0 else zipfile.ZIP_DEFLATED
+
+
+def _write_assets(zf, theme_name):
+    """Add themes/<theme_name>/* under assets/, if the theme has an assets directory."""
+    theme_assets_dir = os.path.join(THEMES_DIR, theme_name)
+    if os.path.isdir(theme_assets_dir):
+        for root, dirs, files in os.walk(theme_assets_dir):
+            for file in files:
+                file_path = os.path.join(root, file)
+                arcname = os.path.join("assets", os.path.relpath(file_path, theme_assets_dir))
+                zf.write(file_path, arcname)
+
+
+def _write_theme_zip(path, theme_name, theme_config, write_vocabulary, compact, compresslevel, payload=None):
+    """
+    Write one package: theme.json, the vocabulary members (by write_vocabulary(zf), which
+    returns their manifest fields), manifest.json and assets.
+    With `payload`, the package starts as a copy of that zip, which already holds the
+    vocabulary members, and the other members are appended to it.
+    """
+    with atomic_output(path) as tmp_path:
+        mode = "w"
+        if payload is not None:
+            shutil.copyfile(payload, tmp_path)
+            mode = "a"
+        with zipfile.ZipFile(tmp_path, mode, _compression(compresslevel), compresslevel=compresslevel) as zf:
+            zf.writestr("theme.json", _dumps(theme_config, compact))
+            vocabulary_fields = write_vocabulary(zf)
+            manifest = {
+                "version": SHARDED_VERSION if "shards" in vocabulary_fields else "1.0",
+                "theme": theme_name,
+            }
+            manifest.update(vocabulary_fields)
+            zf.writestr("manifest.json", _dumps(manifest, compact))
+            _write_assets(zf, theme_name)
+    return path
+
+
+def shard_name(index):
+    return f"vocabulary/{index:05d}.json"
+
+
+def _write_vocabulary(zf, vocabulary_data, compact, shard_size=None):
+    """
+    Write the vocabulary into zf and return its manifest fields.
+    The fields always hold word_count and content_version (see VocabularyIndex), which delta
+    packages built on this one refer to. Per-entry hashes are not stored: build_delta_zip
+    recomputes them from the package's vocabulary, so the manifest stays small.
+    Without shard_size the vocabulary is streamed into a single vocabulary.json.
+    With shard_size the entries are split into vocabulary/NNNNN.json members of that many
+    entries each, every one a complete {"vocabulary": [...]} document, and the fields
+    include the shard index: {"shard_size", "shards": [{"file", "offset", "count",
+    "first_word", "last_word"}, ...]}.
+    """
+    index = VocabularyIndex()
+    vocabulary_data = index.indexing(vocabulary_data)
+    if not shard_size:
+        with zf.open("vocabulary.json", "w") as member:
+            with io.TextIOWrapper(member, encoding="utf-8") as f:
+                word_count = write_vocabulary_json(vocabulary_data, f, compact)
+        return {"word_count": word_count, "content_version": index.version}
+
+    shards = []
+    offset = 0
+    for shard in iter_batches(vocabulary_data, shard_size):
+        name = shard_name(len(shards))
+        zf.writestr(name, "".join(iter_vocabulary_json_chunks(shard, compact)))
+        shards.append({
+            "file": name,
+            "offset": offset,
+            "count": len(shard),
+            "first_word": shard[0].get("word", ""),
+            "last_word": shard[-1].get("word", ""),
+        })
+        offset += len(shard)
+    return {"word_count": offset, "content_version": index.version,
+            "shard_size": shard_size, "shards": shards}
+
+
+def build_theme_zip(theme_name, vocabulary_data, output_path, custom_theme=None,
+                    compact=False, compresslevel=None, shard_size=None):
     """
     Build a themed zip file.
+    vocabulary.json is streamed into the archive one entry at a time, and the zip is
+    written to a temporary file that replaces output_path only once it is complete.
 
     Args:
         theme_name: key from BUILT_IN_THEMES or 'custom'
-        vocabulary_data: list of vocabulary entry dicts
+        vocabulary_data: list (or any iterable) of vocabulary entry dicts
         output_path: where to save the .zip file
         custom_theme: dict with theme config (if theme_name is 'custom')
+        compact: write minified JSON instead of indented JSON
+        compresslevel: deflate level 0-9 (None for zlib's default); 0 stores members uncompressed
+        shard_size: if set, build a sharded package (version 2.0): the vocabulary is split into
+            members of this many entries, indexed in manifest.json, so readers can load one
+            shard at a time (see core.theme_reader)
     """
-    if custom_theme:
-        theme_config = custom_theme
-    elif theme_name in BUILT_IN_THEMES:
-        theme_config = BUILT_IN_THEMES[theme_name]
-    else:
-        raise ValueError(f"Unknown theme: {theme_name}. Available: {list(BUILT_IN_THEMES.keys())}")
-
-    with zipfile.ZipFile(output_path, "w", zipfile.ZIP_DEFLATED) as zf:
-        # Write theme config
-        zf.writestr("theme.json", json.dumps(theme_config, ensure_ascii=False, indent=2))
-
-        # Write vocabulary data
-        vocab_data = {"vocabulary": vocabulary_data}
-        zf.writestr("vocabulary.json", json.dumps(vocab_data, ensure_ascii=False, indent=2))
-
-        # Write a manifest
-        manifest = {
-            "version": "1.0",
-            "theme": theme_name,
-            "word_count": len(vocabulary_data),
-        }
-        zf.writestr("manifest.json", json.dumps(manifest, ensure_ascii=False, indent=2))
-
-        # Add theme-specific assets directory if exists
-        theme_assets_dir = os.path.join(os.path.dirname(__file__), "..", "themes", theme_name)
-        if os.path.isdir(theme_assets_dir):
-            for root, dirs, files in os.walk(theme_assets_dir):
-                for file in files:
-                    file_path = os.path.join(root, file)
-                    arcname = os.path.join("assets", os.path.relpath(file_path, theme_assets_dir))
-                    zf.write(file_path, arcname)
-
-    return output_path
+    theme_config = _theme_config(theme_name, custom_theme)
+    return _write_theme_zip(output_path, theme_name, theme_config,
+                            lambda zf: _write_vocabulary(zf, vocabulary_data, compact, shard_size),
+                            compact, compresslevel)
+
+
+def order_package_chain(paths):
+    """
+    Sort a set of packages into (base_package, [delta packages in apply order]), following
+    each delta's base_version to the content_version it builds on.
+    Raises ValueError if there is not exactly one full package or the deltas do not form a chain.
+    """
+    manifests = {}
+    for path in paths:
+        with zipfile.ZipFile(path) as zf:
+            try:
+                manifests[path] = json.loads(zf.read("manifest.json"))
+            except KeyError:
+                manifests[path] = {}
+    bases = [path for path, manifest in manifests.items() if manifest.get("type") != "delta"]
+    if len(bases) != 1:
+        raise ValueError("Select exactly one full package (plus any delta packages built on it)")
+    by_base = {manifest.get("base_version"): path for path, manifest in manifests.items()
+               if manifest.get("type") == "delta"}
+    chain = []
+    version = manifests[bases[0]].get("content_version")
+    while version in by_base:
+        chain.append(by_base.pop(version))
+        version = manifests[chain[-1]]["content_version"]
+    if by_base:
+        raise ValueError(f"Delta packages do not continue the chain: {', '.join(sorted(by_base.values()))}")
+    return bases[0], chain
+
+
+def _package_index(path):
+    """
+    The [key, content hash] pairs of a full package's vocabulary, checked against the
+    content_version in its manifest.
+    """
+    with ThemePackageReader(path) as package:
+        if package.is_delta:
+            raise ValueError(f"{path} is a delta package, not a full package")
+        version = package.manifest.get("content_version")
+        if version is None:
+            raise ValueError(f"{path} has no content version; build a full package with this version first")
+        # Packages from earlier builds carried the hashes in their manifest
+        index_entries = package.manifest.get("entries")
+        if index_entries is None:
+            index_entries = VocabularyIndex(package.iter_entries()).entries
+    if index_version(index_entries) != version:
+        raise ValueError(f"{path}: vocabulary does not match its manifest's content_version")
+    return index_entries
+
+
+def build_delta_zip(theme_name, vocabulary_data, base_package, output_path, previous_deltas=(),
+                    custom_theme=None, compact=False, compresslevel=None):
+    """
+    Build a delta package: only the entries added, changed or removed since an earlier build,
+    so small edits to a big deck give a small file. The package holds theme.json, delta.json
+    (see diff_vocabulary) and a manifest with type "delta", base_version and content_version.
+    Apply a chain of deltas with vocabulary_processor.apply_vocabulary_deltas.
+
+    Args:
+        theme_name, custom_theme, compact, compresslevel: as for build_theme_zip
+        vocabulary_data: the current vocabulary (list or any iterable)
+        base_package: the full package the chain starts from; its vocabulary is read to
+            recompute the entry hashes the delta is diffed against
+        previous_deltas: delta packages already built on top of it, oldest first; the new
+            delta continues from the last of them
+        output_path: where to save the delta .zip
+    Returns (output_path, {"added", "changed", "removed"} counts).
+    """
+    theme_config = _theme_config(theme_name, custom_theme)
+    base_index = _package_index(base_package)
+    for path in previous_deltas:
+        with zipfile.ZipFile(path) as previous:
+            base_index = apply_delta_to_index(base_index, json.loads(previous.read("delta.json")))
+
+    delta = diff_vocabulary(base_index, vocabulary_data)
+    with atomic_output(output_path) as tmp_path:
+        with zipfile.ZipFile(tmp_path, "w", _compression(compresslevel), compresslevel=compresslevel) as zf:
+            zf.writestr("theme.json", _dumps(theme_config, compact))
+            zf.writestr("delta.json", _dumps(delta, compact))
+            manifest = {
+                "version": "1.0",
+                "type": "delta",
+                "theme": theme_name,
+                "base_version": delta["base_version"],
+                "content_version": delta["version"],
+                "word_count": delta["word_count"],
+            }
+            zf.writestr("manifest.json", _dumps(manifest, compact))
+    summary = {name: len(delta[name]) for name in ("added", "changed", "removed")}
+    return output_path, summary
+
+
+def build_theme_zips(theme_names, vocabulary_data, output_dir, compact=False, compresslevel=None,
+                     max_workers=None, shard_size=None):
+    """
+    Build packages for several themes from the same vocabulary in one pass.
+    The vocabulary members are encoded and compressed once, into a temporary zip; every
+    package starts as a copy of it and gets its theme members appended, in parallel.
+    Each goes to output_dir/vocabmaster_<theme>.zip, with the same content build_theme_zip gives.
+
+    Args:
+        theme_names: keys from BUILT_IN_THEMES (None for all of them)
+        vocabulary_data: list (or any iterable) of vocabulary entry dicts
+        output_dir: directory for the zip files
+        compact, compresslevel, shard_size: as for build_theme_zip
+        max_workers: parallel builds (default: one per theme)
+    Returns {theme_name: output_path}.
+    """
+    theme_names = list(BUILT_IN_THEMES) if theme_names is None else list(theme_names)
+    configs = {name: _theme_config(name) for name in theme_names}
+    os.makedirs(output_dir, exist_ok=True)
+
+    fd, payload_path = tempfile.mkstemp(prefix="vocabulary-", suffix=".zip", dir=output_dir)
+    os.close(fd)
+    try:
+        with zipfile.ZipFile(payload_path, "w", _compression(compresslevel), compresslevel=compresslevel) as zf:
+            vocabulary_fields = _write_vocabulary(zf, vocabulary_data, compact, shard_size)
+
+        def build(name):
+            path = os.path.join(output_dir, f"vocabmaster_{name}.zip")
+            return _write_theme_zip(path, name, configs[name], lambda zf: vocabulary_fields,
+                                    compact, compresslevel, payload=payload_path)
+
+        with ThreadPoolExecutor(max_workers=max_workers or max(1, len(theme_names))) as pool:
+            paths = list(pool.map(build, theme_names))
+    finally:
+        os.remove(payload_path)
+    return dict(zip(theme_names, paths))
 
 
 def list_themes():
@@ -0,0 +1,107 @@
+"""
+Theme package reader: open a theme zip and load its vocabulary, either whole or one shard
+at a time for sharded (version 2.0) packages, where manifest.json indexes the shards,
+or the changes stored in a delta package.
+Only the members that are asked for are decompressed and parsed.
+"""
+import bisect
+import json
+import zipfile
+
+from core.entry import VocabEntry
+
+
+class ThemePackageReader:
+    """
+    Read a package written by build_theme_zip / build_theme_zips.
+    Version 1.0 packages (a single vocabulary.json) are presented as one shard, so callers
+    can use the same shard API for both. Use as a context manager or call close().
+
+        with ThemePackageReader(path) as package:
+            first_cards = package.load_shard(0)
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._zip = zipfile.ZipFile(path)
+        try:
+            self.manifest = self._read_json("manifest.json")
+        except KeyError:
+            self.manifest = {"version": "1.0"}
+        if "shards" in self.manifest:
+            self.shards = self.manifest["shards"]
+        else:
+            # Unsharded: the whole vocabulary.json is shard 0; its size is only known once loaded
+            count = self.manifest.get("word_count")
+            self.shards = [{"file": "vocabulary.json", "offset": 0, "count": count,
+                            "first_word": None, "last_word": None}]
+        self._offsets = [shard["offset"] for shard in self.shards]
+
+    def _read_json(self, name):
+        with self._zip.open(name) as f:
+            return json.load(f)
+
+    @property
+    def theme(self):
+        """The package's theme.json config, or None if it has none."""
+        try:
+            return self._read_json("theme.json")
+        except KeyError:
+            return None
+
+    @property
+    def is_delta(self):
+        """True for delta packages (build_delta_zip), which hold changes instead of a vocabulary."""
+        return self.manifest.get("type") == "delta"
+
+    def load_delta(self):
+        """The delta.json of a delta package, for vocabulary_processor.apply_vocabulary_deltas."""
+        if not self.is_delta:
+            raise ValueError(f"{self.path} is not a delta package")
+        return self._read_json("delta.json")
+
+    @property
+    def word_count(self):
+        return self.manifest.get("word_count")
+
+    @property
+    def shard_count(self):
+        return len(self.shards)
+
+    def load_shard(self, index):
+        """Decode one shard and return its list of entries (VocabEntry)."""
+        shard = self.shards[index]
+        try:
+            data = self._read_json(shard["file"])
+        except KeyError:
+            raise ValueError(f"Package is missing {shard['file']}")
+        return [VocabEntry.from_dict(entry) for entry in data.get("vocabulary", [])]
+
+    def shard_for(self, position):
+        """Index of the shard holding the entry at `position` in the whole deck."""
+        # Shards are in deck order, so the last one starting at or before `position` holds it
+        index = bisect.bisect_right(self._offsets, position) - 1
+        if index >= 0 and position >= 0:
+            count = self.shards[index]["count"]
+            if count is None or position < self.shards[index]["offset"] + count:
+                return index
+        raise IndexError(f"Entry {position} is outside the package ({self.word_count} words)")
+
+    def entry(self, position):
+        """Load the entry at `position`, decoding only the shard that contains it."""
+        index = self.shard_for(position)
+        return self.load_shard(index)[position - self.shards[index]["offset"]]
+
+    def iter_entries(self):
+        """Yield every entry in deck order, holding one shard in memory at a time."""
+        for index in range(self.shard_count):
+            yield from self.load_shard(index)
+
+    def close(self):
+        self._zip.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
@@ -0,0 +1,27 @@
+"""
+Locations for per-user data (cache, run journals) outside the install directory.
+"""
+import os
+import sys
+
+
+def user_data_dir(*parts):
+    """
+    Return (and create) a directory under the per-user VocabMaster data folder.
+      - Windows: %LOCALAPPDATA%\\VocabMaster
+      - macOS:   ~/Library/Application Support/VocabMaster
+      - Linux:   $XDG_DATA_HOME/vocabmaster (default ~/.local/share/vocabmaster)
+    Set VOCABMASTER_DATA_DIR to override.
+    """
+    base = os.environ.get("VOCABMASTER_DATA_DIR")
+    if not base:
+        if sys.platform.startswith("win"):
+            base = os.path.join(os.environ.get("LOCALAPPDATA") or os.path.expanduser("~"), "VocabMaster")
+        elif sys.platform == "darwin":
+            base = os.path.expanduser("~/Library/Application Support/VocabMaster")
+        else:
+            xdg = os.environ.get("XDG_DATA_HOME") or os.path.expanduser("~/.local/share")
+            base = os.path.join(xdg, "vocabmaster")
+    path = os.path.join(base, *parts)
+    os.makedirs(path, exist_ok=True)
+    return path
@@ -1,38 +1,133 @@
 """
 Vocabulary processor: import txt files, parse, divide into batches.
 """
+import bisect
+import hashlib
 import json
 import os
 import re
 
+from core.atomic_file import atomic_output
+from core.entry import VocabEntry, as_entry, to_plain
+from core.run_journal import entry_fingerprint
 
-def parse_vocabulary_file(filepath):
+
+def _looks_like_pronunciation(text):
+    """True for IPA-style notation such as /ˈwɜːd/ or [wɜːd]."""
+    return len(text) > 1 and text[0] in "/[" and text[-1] in "/]"
+
+
+def _split_columns(line, separator):
     """
-    Parse a vocabulary txt file. Supports formats:
-      - One word per line
-      - word | meaning
-      - word \t meaning
-    Returns list of dicts: [{"word": ..., "meaning": ...}, ...]
+    Split a line at each separator, except where it is escaped as "\\|" (a backslash itself
+    as "\\\\"); escapes are undone in the returned columns.
+    """
+    if "\\" not in line:
+        return line.split(separator)
+    columns = []
+    current = []
+    i = 0
+    while i < len(line):
+        ch = line[i]
+        if ch == "\\" and line[i + 1:i + 2] in ("\\", "|"):
+            current.append(line[i + 1])
+            i += 2
+            continue
+        if ch == separator:
+            columns.append("".join(current))
+            current = []
+        else:
+            current.append(ch)
+        i += 1
+    columns.append("".join(current))
+    return columns
+
+
+def _escape_column(text):
+    """Escape text for one column of save_vocabulary_txt (see _split_columns)."""
+    if "|" in text or "\\" in text:
+        return text.replace("\\", "\\\\").replace("|", "\\|")
+    return text
+
+
+def parse_vocabulary_line(line):
+    """
+    Parse one stripped, non-empty line into a VocabEntry. Columns are separated by "|" or,
+    failing that, a tab; "\\|" is a literal "|" and "\\\\" a literal backslash:
+      - word
+      - word | meaning (everything after the first separator, so a meaning may contain "|")
+      - word | pronunciation | meaning | sentence (exactly four columns; what
+        save_vocabulary_txt writes)
+      - word | pronunciation | meaning (older exports that left out an empty sentence;
+        only when the second column looks like IPA, e.g. /əˈbændən/)
+    """
+    separator = "\t" if "\t" in line and "|" not in line else "|"
+    columns = _split_columns(line, separator)
+    parts = [column.strip() for column in columns]
+    if len(parts) == 1:
+        return VocabEntry(parts[0], meaning="")
+    if len(parts) == 4:
+        word, pronunciation, meaning, sentence = parts
+        return VocabEntry(word, pronunciation or None, meaning, sentence or None)
+    if len(parts) == 3 and _looks_like_pronunciation(parts[1]):
+        word, pronunciation, meaning = parts
+        return VocabEntry(word, pronunciation, meaning)
+    return VocabEntry(parts[0], meaning=separator.join(columns[1:]).strip())
+
+
+def iter_vocabulary_file(filepath):
     """
-    entries = []
-    with open(filepath, "r", encoding="utf-8") as f:
+    Read a vocabulary txt file lazily, yielding one VocabEntry per line.
+    Blank lines and lines starting with "#" are skipped; see parse_vocabulary_line for the
+    column layouts.
+    """
+    with open(filepath, "r", encoding="utf-8-sig") as f:
         for line in f:
             line = line.strip()
             if not line or line.startswith("#"):
                 continue
+            yield parse_vocabulary_line(line)
+
+
+def parse_vocabulary_file(filepath):
+    """
+    Parse a vocabulary txt file. Supports formats:
+      - One word per line
+      - word | meaning
+      - word | pronunciation | meaning | sentence
+      - the same with tabs instead of "|"
+    (see parse_vocabulary_line for the details).
+    Returns a list of VocabEntry (mappings like {"word": ..., "meaning": ...})
+    """
+    return list(iter_vocabulary_file(filepath))
+
+
+def detect_vocabulary_format(filepath):
+    """
+    Tell a vocabulary file's format from its first bytes rather than its name:
+    "vmb" (binary store), "json" or "txt".
+    """
+    from core.binary_store import MAGIC
+    with open(filepath, "rb") as f:
+        head = f.read(512)
+    if head.startswith(MAGIC):
+        return "vmb"
+    if head.lstrip(b"\xef\xbb\xbf \t\r\n").startswith(b"{"):
+        return "json"
+    return "txt"
 
-            # Try pipe-separated
-            if "|" in line:
-                parts = [p.strip() for p in line.split("|", 1)]
-                entries.append({"word": parts[0], "meaning": parts[1] if len(parts) > 1 else ""})
-            # Try tab-separated
-            elif "\t" in line:
-                parts = [p.strip() for p in line.split("\t", 1)]
-                entries.append({"word": parts[0], "meaning": parts[1] if len(parts) > 1 else ""})
-            # Just a word
-            else:
-                entries.append({"word": line, "meaning": ""})
-    return entries
+
+def iter_vocabulary(filepath):
+    """Yield the entries of a .txt, .json or .vmb vocabulary file, whichever it turns out to be."""
+    kind = detect_vocabulary_format(filepath)
+    if kind == "json":
+        yield from iter_vocabulary_json(filepath)
+    elif kind == "vmb":
+        from core.binary_store import BinaryVocabulary
+        with BinaryVocabulary(filepath) as store:
+            yield from store
+    else:
+        yield from iter_vocabulary_file(filepath)
 
 
 def divide_into_batches(entries, batch_size=15):
@@ -40,18 +135,442 @@ def divide_into_batches(entries, batch_size=15):
     return [entries[i:i + batch_size] for i in range(0, len(entries), batch_size)]
 
 
-def save_vocabulary_json(entries, filepath):
-    """Save vocabulary entries to a JSON file."""
-    data = {"vocabulary": entries}
-    with open(filepath, "w", encoding="utf-8") as f:
-        json.dump(data, f, ensure_ascii=False, indent=2)
+def iter_batches(entries, batch_size=15):
+    """
+    Lazily group any iterable of entries into batches.
+    Unlike divide_into_batches this never holds more than one batch, so it can feed
+    process_all_batches straight from iter_vocabulary_file / iter_vocabulary_json.
+    """
+    batch = []
+    for entry in entries:
+        batch.append(entry)
+        if len(batch) >= batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+_INDENTED_ENCODER = json.JSONEncoder(ensure_ascii=False, indent=2)
+_COMPACT_ENCODER = json.JSONEncoder(ensure_ascii=False, separators=(",", ":"))
+
+
+def iter_vocabulary_json_chunks(entries, compact=False, chunk_entries=512):
+    """
+    Encode {"vocabulary": entries} as JSON text piece by piece, `chunk_entries` entries
+    at a time, so a large list is never turned into one big string.
+    The default output is the same as json.dumps(..., indent=2); with `compact` it is
+    minified (no indentation, "," and ":" separators).
+    `entries` may be any iterable.
+    """
+    if compact:
+        yield '{"vocabulary":['
+        separator = ""
+        for chunk in iter_batches(map(to_plain, entries), chunk_entries):
+            # Strip the list's brackets: "[a,b]" -> "a,b"
+            yield separator + _COMPACT_ENCODER.encode(chunk)[1:-1]
+            separator = ","
+        yield "]}"
+        return
+
+    yield '{\n  "vocabulary": ['
+    separator = "\n"
+    for chunk in iter_batches(map(to_plain, entries), chunk_entries):
+        # "[\n  {...},\n  {...}\n]" -> the items, indented one more level
+        body = _INDENTED_ENCODER.encode(chunk)[2:-2].replace("\n", "\n  ")
+        yield separator + "  " + body
+        separator = ",\n"
+    yield "]\n}" if separator == "\n" else "\n  ]\n}"
+
+
+def write_vocabulary_json(entries, f, compact=False):
+    """Stream {"vocabulary": entries} into the open text file `f`. Returns the number of entries."""
+    count = 0
+
+    def counted():
+        nonlocal count
+        for entry in entries:
+            count += 1
+            yield entry
+
+    for chunk in iter_vocabulary_json_chunks(counted(), compact):
+        f.write(chunk)
+    return count
+
+
+def save_vocabulary_json(entries, filepath, compact=False):
+    """
+    Save vocabulary entries to a JSON file.
+    Entries are encoded one at a time and the file is replaced atomically when complete.
+    With `compact` the JSON is minified instead of indented.
+    """
+    with atomic_output(filepath) as tmp_path, open(tmp_path, "w", encoding="utf-8") as f:
+        write_vocabulary_json(entries, f, compact)
+
+
+def save_vocabulary_txt(entries, filepath):
+    """
+    Save vocabulary entries as pipe-separated lines: word | pronunciation | meaning | sentence.
+    Entries with only a word and meaning are written as "word | meaning"; otherwise all four
+    columns are written, empty ones included. A "|" inside a field is written as "\\|" (and a
+    backslash as "\\\\"), so parse_vocabulary_file reads every entry back as is.
+    """
+    with atomic_output(filepath) as tmp_path, open(tmp_path, "w", encoding="utf-8") as f:
+        for entry in entries:
+            word = _escape_column(entry.get("word", ""))
+            meaning = _escape_column(entry.get("meaning") or "")
+            pronunciation = _escape_column(entry.get("pronunciation") or "")
+            sentence = _escape_column(entry.get("example_sentence") or "")
+            if pronunciation or sentence:
+                line = f"{word} | {pronunciation} | {meaning} | {sentence}"
+            elif meaning:
+                line = f"{word} | {meaning}"
+            else:
+                line = word
+            f.write(line.rstrip() + "\n")
+
+
+# Characters that can continue a number: a value followed by one of these was cut off by the chunk boundary
+_NUMBER_CHARS = frozenset("0123456789.eE+-")
+
+
+class _JsonStreamScanner:
+    """Pull JSON values one at a time from a text file, reading it in chunks."""
+
+    def __init__(self, f, chunk_size):
+        self.f = f
+        self.chunk_size = chunk_size
+        self.decoder = json.JSONDecoder()
+        self.buf = ""
+        self.pos = 0
+        self.eof = False
+
+    def _fill(self):
+        chunk = self.f.read(self.chunk_size)
+        self.buf = self.buf[self.pos:] + chunk
+        self.pos = 0
+        self.eof = not chunk
+
+    def peek(self):
+        """Return the next non-whitespace character without consuming it ('' at end of file)."""
+        while True:
+            while self.pos < len(self.buf) and self.buf[self.pos] in " \t\r\n":
+                self.pos += 1
+            if self.pos < len(self.buf) or self.eof:
+                return self.buf[self.pos:self.pos + 1]
+            self._fill()
+
+    def next_char(self):
+        ch = self.peek()
+        self.pos += 1
+        return ch
+
+    def value(self):
+        """Decode the next complete JSON value."""
+        self.peek()
+        while True:
+            try:
+                value, end = self.decoder.raw_decode(self.buf, self.pos)
+            except json.JSONDecodeError:
+                if self.eof:
+                    raise
+                self._fill()
+                continue
+            # A number running into the end of the buffer may continue in the next chunk; "1." or
+            # "1e" decodes as 1 and stops before the "." or "e", so check the next character too
+            if not self.eof and (end == len(self.buf) or self.buf[end] in _NUMBER_CHARS):
+                self._fill()
+                continue
+            self.pos = end
+            return value
+
+
+def iter_vocabulary_json(filepath, chunk_size=1 << 16):
+    """
+    Read a vocabulary JSON file lazily, yielding the entries of its top-level
+    "vocabulary" array one at a time (as VocabEntry) without loading the whole document.
+    """
+    # utf-8-sig, like detect_vocabulary_format, so files saved with a BOM load too
+    with open(filepath, "r", encoding="utf-8-sig") as f:
+        scanner = _JsonStreamScanner(f, chunk_size)
+        if scanner.next_char() != "{":
+            raise ValueError(f"{filepath}: expected a JSON object with a 'vocabulary' array")
+        if scanner.peek() == "}":
+            return
+        while True:
+            key = scanner.value()
+            if scanner.next_char() != ":":
+                raise ValueError(f"{filepath}: malformed JSON object")
+            if key == "vocabulary" and scanner.peek() == "[":
+                scanner.next_char()
+                if scanner.peek() == "]":
+                    scanner.next_char()
+                else:
+                    while True:
+                        value = scanner.value()
+                        if not isinstance(value, dict):
+                            raise ValueError(f"{filepath}: 'vocabulary' items must be objects")
+                        yield VocabEntry.from_dict(value)
+                        ch = scanner.next_char()
+                        if ch == "]":
+                            break
+                        if ch != ",":
+                            raise ValueError(f"{filepath}: malformed 'vocabulary' array")
+            else:
+                scanner.value()
+            ch = scanner.next_char()
+            if ch == "}":
+                return
+            if ch != ",":
+                raise ValueError(f"{filepath}: malformed JSON object")
 
 
 def load_vocabulary_json(filepath):
     """Load vocabulary from a JSON file."""
-    with open(filepath, "r", encoding="utf-8") as f:
-        data = json.load(f)
-    return data.get("vocabulary", [])
+    return list(iter_vocabulary_json(filepath))
+
+
+_QUOTES = "\"'\u201c\u201d\u2018\u2019"
+_TRAILING_PUNCTUATION = ".,;:!?\u3002\uff0c\uff1b\uff1a\uff01\uff1f"
+
+
+def clean_word(word):
+    """Collapse whitespace and strip surrounding quotes and trailing punctuation from a word."""
+    word = re.sub(r"\s+", " ", (word or "").strip())
+    return word.strip(_QUOTES).rstrip(_TRAILING_PUNCTUATION).strip()
+
+
+def normalize_word(word):
+    """Key under which near-duplicate words (case, whitespace, punctuation) are considered equal."""
+    return clean_word(word).casefold()
+
+
+class DedupPlan:
+    """
+    Collapse duplicate and near-duplicate entries into one canonical request per word,
+    and fan the enriched results back out to every original row afterwards.
+
+    Rows with the same normalized word share one request. The canonical entry takes the
+    first row's word (cleaned) and the first non-empty value of every other field; rows
+    whose own meaning differs from it keep that meaning when the results are expanded.
+    """
+
+    def __init__(self, entries):
+        self.unique = []
+        self.row_to_unique = []
+        self.own_meanings = {}  # row -> its original meaning, where it differs from the canonical one
+        index = {}
+        for entry in entries:
+            key = normalize_word(entry.get("word"))
+            u = index.get(key)
+            if u is None:
+                u = index[key] = len(self.unique)
+                canonical = VocabEntry.from_dict(entry)
+                canonical["word"] = clean_word(entry.get("word"))
+                self.unique.append(canonical)
+            else:
+                canonical = self.unique[u]
+                for field, value in entry.items():
+                    if value and not canonical.get(field):
+                        canonical[field] = value
+            self.row_to_unique.append(u)
+
+        for row, u in enumerate(self.row_to_unique):
+            meaning = entries[row].get("meaning") or ""
+            if meaning.strip() and normalize_word(meaning) != normalize_word(self.unique[u].get("meaning")):
+                self.own_meanings[row] = meaning.strip()
+
+    @property
+    def duplicates(self):
+        """Number of rows that did not need a request of their own."""
+        return len(self.row_to_unique) - len(self.unique)
+
+    def calls_saved(self, batch_size):
+        """Claude calls avoided at a fixed batch size."""
+        def calls(n):
+            return -(-n // batch_size)
+        return calls(len(self.row_to_unique)) - calls(len(self.unique))
+
+    def expand(self, results):
+        """
+        Fan results for `unique` (same length and order) back out to the original rows,
+        in their original order.
+        """
+        if len(results) != len(self.unique):
+            raise ValueError(f"Expected {len(self.unique)} results to expand, got {len(results)}")
+        expanded = []
+        for row, u in enumerate(self.row_to_unique):
+            entry = VocabEntry.from_dict(results[u])
+            if row in self.own_meanings:
+                entry["meaning"] = self.own_meanings[row]
+            expanded.append(entry)
+        return expanded
+
+
+def entry_content_hash(entry):
+    """Short, stable hash of an entry's content (all fields, key order ignored): a prefix of its journal fingerprint."""
+    return entry_fingerprint(entry)[:16]
+
+
+class VocabularyIndex:
+    """
+    Per-entry identity and content hashes of a vocabulary, as stored in package manifests.
+    An entry's key is its normalized word, with "#2", "#3", ... appended for repeats, so the
+    same entry keeps its key when its content (or the capitalization of its word) changes.
+    Entries are added one at a time, so the index can be built while a list is streamed out.
+    """
+
+    def __init__(self, entries=()):
+        self.entries = []   # [key, content hash] in deck order
+        self._seen = {}
+        for entry in entries:
+            self.add(entry)
+
+    def add(self, entry):
+        """Index the next entry; returns its key."""
+        word = normalize_word(entry.get("word", ""))
+        n = self._seen.get(word, 0) + 1
+        self._seen[word] = n
+        key = word if n == 1 else f"{word}#{n}"
+        self.entries.append([key, entry_content_hash(entry)])
+        return key
+
+    def indexing(self, entries):
+        """Pass entries through, indexing each on the way."""
+        for entry in entries:
+            self.add(entry)
+            yield entry
+
+    @property
+    def keys(self):
+        return [key for key, _ in self.entries]
+
+    @property
+    def version(self):
+        """Content version: changes whenever any entry, or the order of entries, changes."""
+        return index_version(self.entries)
+
+
+def index_version(index_entries):
+    """Content version for a list of [key, hash] pairs (see VocabularyIndex.version)."""
+    digest = hashlib.sha1()
+    for key, content_hash in index_entries:
+        digest.update(f"{key}\0{content_hash}\n".encode("utf-8"))
+    return digest.hexdigest()[:16]
+
+
+def _stable_positions(values):
+    """Indexes of one longest increasing subsequence of `values` (patience sorting, O(n log n))."""
+    tail_values = []    # tail_values[k]: smallest value ending an increasing run of length k + 1
+    tails = []          # index of that value
+    previous = [None] * len(values)
+    for i, value in enumerate(values):
+        k = bisect.bisect_left(tail_values, value)
+        if k:
+            previous[i] = tails[k - 1]
+        if k == len(tails):
+            tail_values.append(value)
+            tails.append(i)
+        else:
+            tail_values[k] = value
+            tails[k] = i
+    stable = set()
+    i = tails[-1] if tails else None
+    while i is not None:
+        stable.add(i)
+        i = previous[i]
+    return stable
+
+
+def diff_vocabulary(base_index, entries, index=None):
+    """
+    Compute the delta that turns a vocabulary with index `base_index` (list of [key, hash],
+    e.g. from a package manifest) into `entries`. Only the index of the base is needed.
+    Returns {"base_version", "version", "word_count", "added": [{"index", "key", "entry"}],
+    "changed": [{"key", "entry"}], "removed": [key, ...]}. An entry that moved relative to
+    the others is sent as removed and added again, so the delta stays proportional to the
+    edit rather than to the deck.
+    Pass an empty VocabularyIndex as `index` to get the new vocabulary's index as well.
+    """
+    base_positions = {key: i for i, (key, _) in enumerate(base_index)}
+    if index is None:
+        index = VocabularyIndex()
+    current = []
+    for entry in entries:
+        index.add(entry)
+        current.append(entry)
+
+    kept = [i for i, (key, _) in enumerate(index.entries) if key in base_positions]
+    in_order = _stable_positions([base_positions[index.entries[i][0]] for i in kept])
+    moved = {kept[k] for k in range(len(kept)) if k not in in_order}
+
+    added, changed = [], []
+    for position, (key, content_hash) in enumerate(index.entries):
+        if key not in base_positions or position in moved:
+            added.append({"index": position, "key": key, "entry": current[position]})
+        elif base_index[base_positions[key]][1] != content_hash:
+            changed.append({"key": key, "entry": current[position]})
+    stays = {index.entries[i][0] for i in kept if i not in moved}
+    removed = [key for key, _ in base_index if key not in stays]
+
+    return {
+        "base_version": index_version(base_index),
+        "version": index.version,
+        "word_count": len(index.entries),
+        "added": added,
+        "changed": changed,
+        "removed": removed,
+    }
+
+
+def _apply_delta(items, keys, delta, changed_item, added_item):
+    """
+    Rearrange `items` (one per key in `keys`) as a delta describes. changed_item(change)
+    and added_item(addition) build the replacement/new items from the delta's records.
+    """
+    replaced = {change["key"]: changed_item(change) for change in delta["changed"]}
+    removed = set(delta["removed"])
+    kept = (replaced.get(key, item) for key, item in zip(keys, items) if key not in removed)
+    added = {addition["index"]: addition for addition in delta["added"]}
+    return [added_item(added[i]) if i in added else next(kept) for i in range(delta["word_count"])]
+
+
+def apply_delta_to_index(index_entries, delta):
+    """
+    Advance a [key, hash] index by one delta without the entries themselves, e.g. to diff
+    against the state a chain of delta packages has reached. Raises ValueError if the delta
+    does not start from this index's version.
+    """
+    if delta["base_version"] != index_version(index_entries):
+        raise ValueError(f"Delta applies to version {delta['base_version']}, "
+                         f"but the index is at version {index_version(index_entries)}")
+    return _apply_delta(
+        index_entries, [key for key, _ in index_entries], delta,
+        lambda change: [change["key"], entry_content_hash(change["entry"])],
+        lambda addition: [addition["key"], entry_content_hash(addition["entry"])],
+    )
+
+
+def apply_vocabulary_deltas(base_entries, deltas):
+    """
+    Apply a chain of deltas (from diff_vocabulary / delta packages, oldest first) to the base
+    vocabulary and return the resulting list. Each delta must start from the version the
+    previous step produced, and the result is checked against the last delta's version;
+    a mismatch raises ValueError.
+    """
+    entries = list(map(as_entry, base_entries))
+    index = VocabularyIndex(entries)
+    for step, delta in enumerate(deltas, 1):
+        if delta["base_version"] != index.version:
+            raise ValueError(f"Delta {step} applies to version {delta['base_version']}, "
+                             f"but the vocabulary is at version {index.version}")
+        entries = _apply_delta(entries, index.keys, delta,
+                               lambda change: VocabEntry.from_dict(change["entry"]),
+                               lambda addition: VocabEntry.from_dict(addition["entry"]))
+        index = VocabularyIndex(entries)
+        if index.version != delta["version"]:
+            raise ValueError(f"Delta {step} did not produce version {delta['version']}")
+    return entries
 
 
 def merge_batches(batch_results):
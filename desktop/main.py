@@ -2,17 +2,20 @@
 VocabMaster Desktop - Main entry point.
 Vocabulary processor with Claude integration and theme builder.
 """
+import multiprocessing
 import sys
 import os
 
 # Ensure the desktop directory is on the path
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
-from PyQt6.QtWidgets import QApplication
-from ui.main_window import MainWindow
-
 
 def main():
+    # Imported here rather than at the top: bulk import's pool workers re-run this module
+    # when they are spawned (Windows, frozen builds), and must not load PyQt and the UI
+    from PyQt6.QtWidgets import QApplication
+    from ui.main_window import MainWindow
+
     app = QApplication(sys.argv)
     app.setApplicationName("VocabMaster")
     app.setStyle("Fusion")
@@ -24,4 +27,6 @@ def main():
 
 
 if __name__ == "__main__":
+    # A frozen executable is also the pool workers' executable; this turns it into a worker
+    multiprocessing.freeze_support()
     main()
@@ -0,0 +1,75 @@
+"""Binary store (.vmb): round trips, absent fields and older/foreign files."""
+import json
+import struct
+
+import pytest
+
+from core.binary_store import BinaryVocabulary, binary_to_json, json_to_binary, write_binary_vocabulary
+
+
+ENTRIES = [
+    {"word": "abandon", "pronunciation": "/əˈbændən/", "meaning": "to give up", "example_sentence": "They left."},
+    {"word": "café", "meaning": ""},
+    {"word": "emoji 😀", "example_sentence": "", "rank": 3, "tags": ["a", "b"]},
+    {"meaning": "no word at all"},
+    {},
+    {"word": "", "pronunciation": "", "meaning": "", "example_sentence": "", "note": None},
+]
+
+
+def _write(tmp_path, entries=ENTRIES):
+    path = tmp_path / "deck.vmb"
+    assert write_binary_vocabulary(entries, path) == len(entries)
+    return path
+
+
+def test_round_trip_keeps_absent_and_empty_fields_apart(tmp_path):
+    with BinaryVocabulary(_write(tmp_path)) as store:
+        assert len(store) == len(ENTRIES)
+        assert [dict(entry) for entry in store] == ENTRIES
+        assert dict(store[-1]) == ENTRIES[-1]
+        assert [dict(entry) for entry in store[1:3]] == ENTRIES[1:3]
+        assert store.field(0, "meaning") == "to give up"
+        assert store.field(1, "pronunciation") == ""
+        with pytest.raises(IndexError):
+            store[len(ENTRIES)]
+
+
+def test_json_to_binary_to_json_gives_the_same_objects(tmp_path):
+    source = tmp_path / "deck.json"
+    source.write_text(json.dumps({"vocabulary": ENTRIES}, ensure_ascii=False), encoding="utf-8")
+    json_to_binary(source, tmp_path / "deck.vmb")
+    binary_to_json(tmp_path / "deck.vmb", tmp_path / "back.json")
+    assert json.loads((tmp_path / "back.json").read_text(encoding="utf-8")) == {"vocabulary": ENTRIES}
+
+
+def test_empty_store(tmp_path):
+    with BinaryVocabulary(_write(tmp_path, [])) as store:
+        assert len(store) == 0
+        assert list(store) == []
+
+
+def test_format_1_files_read_every_field_as_present(tmp_path):
+    path = _write(tmp_path)
+    data = bytearray(path.read_bytes())
+    struct.pack_into("<H", data, 4, 1)  # format 1 header: same fields, no presence table
+    path.write_bytes(bytes(data))
+    with BinaryVocabulary(path) as store:
+        assert dict(store[1]) == {"word": "café", "pronunciation": "", "meaning": "", "example_sentence": ""}
+
+
+def test_other_files_are_rejected(tmp_path):
+    path = tmp_path / "other.vmb"
+    path.write_bytes(b"not a store")
+    with pytest.raises(ValueError):
+        BinaryVocabulary(path)
+    path.write_bytes(b"\0" * 64)
+    with pytest.raises(ValueError):
+        BinaryVocabulary(path)
+
+    newer = _write(tmp_path)
+    data = bytearray(newer.read_bytes())
+    struct.pack_into("<H", data, 4, 99)
+    newer.write_bytes(bytes(data))
+    with pytest.raises(ValueError, match="format 99"):
+        BinaryVocabulary(newer)
@@ -0,0 +1,55 @@
+"""Matching Claude's answers to the batch they were sent for, with the CLI call replaced."""
+import json
+
+import pytest
+
+from core import claude_integration
+from core.claude_integration import (
+    EnrichmentOptions, IncompleteResponseError, RateLimiter, process_all_batches, process_batch_with_claude,
+)
+
+BATCH = [{"word": "a", "meaning": "1"}, {"word": "b", "meaning": "2"}, {"word": "c", "meaning": "3"}]
+
+
+def _answer(monkeypatch, *responses):
+    """Make the CLI return `responses` in turn (the last one repeats)."""
+    responses = list(responses)
+
+    def run(prompt, on_text=None, metrics=None):
+        text = responses.pop(0) if len(responses) > 1 else responses[0]
+        if on_text is not None:
+            on_text(text)
+        return text
+    monkeypatch.setattr(claude_integration, "_run_claude_once", run)
+
+
+def _full(entries):
+    return "Here you go:\n" + json.dumps(entries) + "\nDone."
+
+
+def test_full_answer_missing_an_entry_is_rejected(monkeypatch):
+    _answer(monkeypatch, _full([{"word": "a", "meaning": "1"}, {"word": "", "meaning": "?"},
+                                {"word": "c", "meaning": "3"}]))
+    with pytest.raises(ValueError):
+        process_batch_with_claude(BATCH, protocol="full")
+
+
+def test_full_answer_is_retried_instead_of_shifting_rows(monkeypatch):
+    good = [dict(entry, example_sentence=f"With {entry['word']}.") for entry in BATCH]
+    _answer(monkeypatch, _full([good[0], {"word": "", "meaning": "?"}, good[2]]), _full(good))
+    results = []
+    stats = {}
+    output = process_all_batches([BATCH], options=EnrichmentOptions(protocol="full", backoff=0.01,
+                                                                    limiter=RateLimiter(backoff=0.01)),
+                                 results_callback=results.extend, stats=stats)
+    assert output == results == good
+    assert stats["retried"] == [0, 1, 2]
+
+
+def test_compact_answer_reports_the_missing_ids(monkeypatch):
+    _answer(monkeypatch, '[{"id":0,"s":"x"},{"id":2},{"id":7,"w":"stray"}]')
+    with pytest.raises(IncompleteResponseError) as caught:
+        process_batch_with_claude(BATCH)
+    assert caught.value.missing == [1]
+    assert sorted(caught.value.entries) == [0, 2]
+    assert caught.value.entries[0]["example_sentence"] == "x"
@@ -0,0 +1,105 @@
+"""Delta updates: diff_vocabulary / apply_vocabulary_deltas and delta packages built on a full package."""
+import random
+
+import pytest
+
+from core.theme_builder import build_delta_zip, build_theme_zip, order_package_chain
+from core.theme_reader import ThemePackageReader
+from core.vocabulary_processor import (
+    VocabularyIndex, apply_delta_to_index, apply_vocabulary_deltas, diff_vocabulary,
+)
+
+
+def _deck(n):
+    return [{"word": f"word{i}", "meaning": f"meaning {i}"} for i in range(n)]
+
+
+def _edit(entries, rng):
+    """A copy of `entries` with some entries changed, removed, added, duplicated and moved."""
+    entries = [dict(entry) for entry in entries]
+    for entry in rng.sample(entries, 5):
+        entry["meaning"] += " (revised)"
+        entry["pronunciation"] = "/x/"
+    for entry in rng.sample(entries, 3):
+        entries.remove(entry)
+    for i in range(4):
+        entries.insert(rng.randrange(len(entries) + 1), {"word": f"new{rng.random()}", "meaning": "added"})
+    entries.insert(rng.randrange(len(entries) + 1), dict(entries[0]))  # a repeated word gets key "word#2"
+    entries.insert(rng.randrange(len(entries) + 1), entries.pop(rng.randrange(len(entries))))
+    return entries
+
+
+def _plain(entries):
+    return [dict(entry) for entry in entries]
+
+
+@pytest.mark.parametrize("seed", range(10))
+def test_diff_and_apply_round_trip(seed):
+    rng = random.Random(seed)
+    base = _deck(60)
+    current = _edit(base, rng)
+    delta = diff_vocabulary(VocabularyIndex(base).entries, current)
+    assert _plain(apply_vocabulary_deltas(base, [delta])) == current
+    assert len(delta["added"]) + len(delta["changed"]) + len(delta["removed"]) < len(base)
+
+
+def test_chain_of_deltas_and_index_only_application():
+    rng = random.Random(1)
+    versions = [_deck(40)]
+    for _ in range(3):
+        versions.append(_edit(versions[-1], rng))
+    deltas = []
+    index = VocabularyIndex(versions[0]).entries
+    for current in versions[1:]:
+        deltas.append(diff_vocabulary(index, current))
+        index = apply_delta_to_index(index, deltas[-1])
+        assert index == VocabularyIndex(current).entries
+    assert _plain(apply_vocabulary_deltas(versions[0], deltas)) == versions[-1]
+
+
+def test_unchanged_vocabulary_gives_an_empty_delta():
+    base = _deck(10)
+    delta = diff_vocabulary(VocabularyIndex(base).entries, base)
+    assert delta["base_version"] == delta["version"]
+    assert (delta["added"], delta["changed"], delta["removed"]) == ([], [], [])
+
+
+def test_delta_for_another_version_is_rejected():
+    base = _deck(10)
+    delta = diff_vocabulary(VocabularyIndex(base).entries, _deck(11))
+    with pytest.raises(ValueError):
+        apply_vocabulary_deltas(_deck(9), [delta])
+    with pytest.raises(ValueError):
+        apply_delta_to_index(VocabularyIndex(_deck(9)).entries, delta)
+
+
+@pytest.mark.parametrize("shard_size", [None, 7])
+def test_delta_packages_on_a_full_package(tmp_path, shard_size):
+    rng = random.Random(2)
+    base = _deck(30)
+    first = _edit(base, rng)
+    second = _edit(first, rng)
+    base_zip = str(tmp_path / "base.zip")
+    build_theme_zip("simple", base, base_zip, shard_size=shard_size)
+    first_zip, _ = build_delta_zip("simple", first, base_zip, str(tmp_path / "delta1.zip"))
+    second_zip, summary = build_delta_zip("simple", second, base_zip, str(tmp_path / "delta2.zip"),
+                                          previous_deltas=[first_zip])
+    assert sum(summary.values()) > 0
+
+    package, chain = order_package_chain([second_zip, base_zip, first_zip])
+    assert (package, chain) == (base_zip, [first_zip, second_zip])
+    with ThemePackageReader(package) as reader:
+        entries = list(reader.iter_entries())
+    deltas = []
+    for path in chain:
+        with ThemePackageReader(path) as reader:
+            deltas.append(reader.load_delta())
+    assert _plain(apply_vocabulary_deltas(entries, deltas)) == second
+
+
+def test_delta_needs_a_full_base_package(tmp_path):
+    base_zip = str(tmp_path / "base.zip")
+    build_theme_zip("simple", _deck(5), base_zip)
+    delta_zip, _ = build_delta_zip("simple", _deck(6), base_zip, str(tmp_path / "delta.zip"))
+    with pytest.raises(ValueError):
+        build_delta_zip("simple", _deck(7), delta_zip, str(tmp_path / "other.zip"))
@@ -0,0 +1,37 @@
+"""Local dictionary: which entries it answers, and that answers never share the input objects."""
+from core.claude_integration import EnrichmentOptions, process_all_batches
+from core.dictionary_index import DictionaryIndex
+from core.entry import VocabEntry
+
+KNOWN = VocabEntry("abandon", "/əˈbændən/", "to give up", "They had to abandon the car.")
+
+
+def _dictionary(tmp_path):
+    dictionary = DictionaryIndex(str(tmp_path / "dictionary"))
+    dictionary.add_entries([KNOWN])
+    return dictionary
+
+
+def test_complete_entries_are_returned_as_copies(tmp_path):
+    dictionary = _dictionary(tmp_path)
+    entry = KNOWN.copy()
+    completed = dictionary.complete(entry)
+    assert completed == entry
+    assert completed is not entry
+    completed["meaning"] = "edited"
+    assert entry["meaning"] == "to give up"
+
+
+def test_missing_fields_are_filled_only_when_the_rest_agrees(tmp_path):
+    dictionary = _dictionary(tmp_path)
+    assert dictionary.complete(VocabEntry("Abandon", meaning="to give up")) == dict(KNOWN, word="Abandon")
+    assert dictionary.complete(VocabEntry("abandon", meaning="a carefree manner")) is None
+    assert dictionary.complete(VocabEntry("unknown", meaning="x")) is None
+
+
+def test_run_results_do_not_share_input_objects(tmp_path):
+    dictionary = _dictionary(tmp_path)
+    entries = [KNOWN.copy(), KNOWN.copy()]
+    results = process_all_batches([entries], options=EnrichmentOptions(dictionary=dictionary))
+    assert results == entries
+    assert all(result is not entry for result, entry in zip(results, entries))
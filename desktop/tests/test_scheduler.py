@@ -0,0 +1,170 @@
+"""process_all_batches scheduling: throttling, re-queues, splitting and priority, against a stand-in for Claude."""
+import threading
+
+import pytest
+
+from core import claude_integration
+from core.claude_integration import (
+    BatchProcessingError, EnrichmentOptions, IncompleteResponseError, RateLimiter, RateLimitError,
+    process_all_batches, quarantined_positions,
+)
+from core.entry import VocabEntry
+from core.vocabulary_processor import divide_into_batches
+
+
+def _deck(n):
+    return [VocabEntry(f"word{i}", meaning=f"meaning {i}") for i in range(n)]
+
+
+def _corrected(entry):
+    return dict(entry, example_sentence=f"An example with {entry['word']}.")
+
+
+class FakeClaude:
+    """Replaces process_batch_with_claude; `fail(batch, call)` may raise for a call."""
+
+    def __init__(self, fail=None):
+        self.fail = fail
+        self.calls = []
+        self._lock = threading.Lock()
+
+    def __call__(self, batch, engine=None, on_entry=None, protocol="compact", metrics=None):
+        with self._lock:
+            call = len(self.calls)
+            self.calls.append([entry["word"] for entry in batch])
+        if self.fail is not None:
+            self.fail(batch, call)
+        return [_corrected(entry) for entry in batch]
+
+
+@pytest.fixture
+def claude(monkeypatch):
+    fake = FakeClaude()
+    monkeypatch.setattr(claude_integration, "process_batch_with_claude", fake)
+    return fake
+
+
+def _options(**kwargs):
+    kwargs.setdefault("limiter", RateLimiter(backoff=0.01))
+    kwargs.setdefault("backoff", 0.01)
+    return EnrichmentOptions(**kwargs)
+
+
+@pytest.mark.parametrize("workers", [1, 4])
+def test_results_come_back_in_input_order(claude, workers):
+    entries = _deck(50)
+    progress = []
+    results = process_all_batches(divide_into_batches(entries, 7), options=_options(max_workers=workers),
+                                  progress_callback=lambda done, total: progress.append((done, total)))
+    assert results == [_corrected(entry) for entry in entries]
+    assert progress[-1] == (8, 8)
+
+
+def test_baseline_call_with_positional_progress_callback(claude):
+    entries = _deck(10)
+    progress = []
+    results = process_all_batches(divide_into_batches(entries, 4), lambda done, total: progress.append(done))
+    assert results == [_corrected(entry) for entry in entries]
+    assert progress[-1] == 3
+    with pytest.raises(TypeError):
+        process_all_batches(divide_into_batches(entries, 4), None, _options())
+
+
+def test_throttled_calls_are_resent_without_using_a_retry(claude):
+    def fail(batch, call):
+        if call < 3:
+            raise RateLimitError("rate limit exceeded")
+    claude.fail = fail
+    entries = _deck(20)
+    stats = {}
+    results = process_all_batches(divide_into_batches(entries, 5),
+                                  options=_options(retries=0, split_failures=False), stats=stats)
+    assert results == [_corrected(entry) for entry in entries]
+    assert stats["throttled"] == 3
+    assert stats["retried"] == []
+    assert claude.calls[:4] == [claude.calls[0]] * 4
+
+
+def test_endless_throttling_fails_the_batch(claude):
+    def fail(batch, call):
+        raise RateLimitError("overloaded")
+    claude.fail = fail
+    with pytest.raises(BatchProcessingError) as caught:
+        process_all_batches(divide_into_batches(_deck(4), 2),
+                            options=_options(retries=0, split_failures=False, throttle_retries=2))
+    assert set(caught.value.failures) == {0}
+    assert len(claude.calls) == 3
+
+
+def test_failing_entry_is_split_out_and_quarantined(claude):
+    def fail(batch, call):
+        if any(entry["word"] == "word5" for entry in batch):
+            raise RuntimeError("Claude CLI error")
+    claude.fail = fail
+    entries = _deck(12)
+    stats = {}
+    results = process_all_batches(divide_into_batches(entries, 4), options=_options(retries=1), stats=stats)
+    assert results == [entry if entry["word"] == "word5" else _corrected(entry) for entry in entries]
+    assert quarantined_positions(stats) == {5}
+    assert results[5] is not entries[5]
+    assert [item["position"] for item in stats["quarantined"]] == [5]
+    assert ["word5"] in claude.calls
+
+
+def test_only_missing_entries_are_requested_again(claude):
+    def fail(batch, call):
+        if call == 0:
+            raise IncompleteResponseError({0: _corrected(batch[0]), 2: _corrected(batch[2])}, [1])
+    claude.fail = fail
+    entries = _deck(3)
+    results = process_all_batches(divide_into_batches(entries, 3), options=_options())
+    assert results == [_corrected(entry) for entry in entries]
+    assert claude.calls == [["word0", "word1", "word2"], ["word1"]]
+
+
+def test_cli_that_cannot_start_fails_its_input_batch(claude):
+    def fail(batch, call):
+        raise FileNotFoundError("claude")
+    claude.fail = fail
+    with pytest.raises(BatchProcessingError) as caught:
+        process_all_batches(divide_into_batches(_deck(6), 3), _options())
+    assert set(caught.value.failures) == {0}
+    assert "1 of" in str(caught.value)
+
+
+def test_entries_without_a_meaning_go_first(claude):
+    entries = _deck(6)
+    entries[4]["meaning"] = ""
+    entries[2].pop("meaning")
+    results = process_all_batches(divide_into_batches(entries, 2), options=_options())
+    assert results == [_corrected(entry) for entry in entries]
+    assert sorted(claude.calls[0]) == ["word2", "word4"]
+
+    claude.calls.clear()
+    process_all_batches(divide_into_batches(entries, 2), options=_options(priority=False))
+    assert claude.calls[0] == ["word0", "word1"]
+
+
+def test_limiter_backoff_doubles_with_jitter_and_resets():
+    limiter = RateLimiter(backoff=0.01, max_backoff=0.03)
+    first = limiter.throttled()
+    assert 0.005 <= first <= 0.01
+    # Throttles reported during the pause do not escalate it
+    assert limiter.throttled() <= first
+    assert limiter.consecutive == 1
+    limiter.paused_until = 0.0
+    assert 0.01 <= limiter.throttled() <= 0.02
+    limiter.paused_until = 0.0
+    assert 0.015 <= limiter.throttled() <= 0.03  # capped at max_backoff
+    assert limiter.throttled(retry_after=5) <= 0.03  # still paused: the running pause stands
+    limiter.succeeded()
+    assert limiter.consecutive == 0
+
+
+def test_limiter_slows_down_after_a_throttle():
+    limiter = RateLimiter(requests_per_minute=600, backoff=0.01)
+    limiter.throttled()
+    assert limiter.requests.rate < limiter.requests.limit
+    for _ in range(40):
+        limiter.succeeded()
+    assert limiter.requests.rate == limiter.requests.limit
@@ -0,0 +1,73 @@
+"""Pipe/tab-separated TXT files: column layouts and the save_vocabulary_txt round trip."""
+import pytest
+
+from core.vocabulary_processor import parse_vocabulary_file, parse_vocabulary_line, save_vocabulary_txt
+
+
+@pytest.mark.parametrize("line, expected", [
+    ("abandon", {"word": "abandon", "meaning": ""}),
+    ("abandon | to give up", {"word": "abandon", "meaning": "to give up"}),
+    ("abandon\tto give up", {"word": "abandon", "meaning": "to give up"}),
+    ("pipe | a | b", {"word": "pipe", "meaning": "a | b"}),
+    ("either | this | or | that | or both", {"word": "either", "meaning": "this | or | that | or both"}),
+    ("abandon | /əˈbændən/ | to give up",
+     {"word": "abandon", "pronunciation": "/əˈbændən/", "meaning": "to give up"}),
+    ("abandon | /əˈbændən/ | to give up | They left.",
+     {"word": "abandon", "pronunciation": "/əˈbændən/", "meaning": "to give up", "example_sentence": "They left."}),
+    ("abandon |  | to give up | They left.",
+     {"word": "abandon", "meaning": "to give up", "example_sentence": "They left."}),
+    ("abandon | /əˈbændən/ | to give up | ",
+     {"word": "abandon", "pronunciation": "/əˈbændən/", "meaning": "to give up"}),
+    (r"x | a \| b \| c", {"word": "x", "meaning": "a | b | c"}),
+    (r"x |  | a \| b | s", {"word": "x", "meaning": "a | b", "example_sentence": "s"}),
+    (r"C:\ | drive", {"word": "C:\\", "meaning": "drive"}),
+    (r"back\\slash\| | x", {"word": "back\\slash|", "meaning": "x"}),
+])
+def test_column_layouts(line, expected):
+    assert dict(parse_vocabulary_line(line)) == expected
+
+
+ENTRIES = [
+    {"word": "abandon", "pronunciation": "/əˈbændən/", "meaning": "to give up completely",
+     "example_sentence": "They had to abandon the car."},
+    {"word": "benevolent", "meaning": "kind", "example_sentence": "A benevolent smile."},
+    {"word": "candid", "pronunciation": "/ˈkændɪd/", "meaning": "frank"},
+    {"word": "pipe", "meaning": "a tube | a smoking device"},
+    {"word": "deft", "meaning": ""},
+    {"word": "naïve café", "meaning": "ünïcödé"},
+    {"word": "x", "meaning": "a | b | c"},
+    {"word": "x", "meaning": "a | b", "example_sentence": "s"},
+    {"word": "back\\slash", "pronunciation": "/a|b/", "meaning": "ends with \\", "example_sentence": "|"},
+]
+
+
+def test_save_and_parse_round_trip(tmp_path):
+    path = tmp_path / "deck.txt"
+    save_vocabulary_txt(ENTRIES, path)
+    assert [dict(entry) for entry in parse_vocabulary_file(path)] == ENTRIES
+
+
+def test_saved_lines_use_four_columns_when_needed(tmp_path):
+    path = tmp_path / "deck.txt"
+    save_vocabulary_txt(ENTRIES[1:4], path)
+    assert path.read_text(encoding="utf-8").splitlines() == [
+        "benevolent |  | kind | A benevolent smile.",
+        "candid | /ˈkændɪd/ | frank |",
+        r"pipe | a tube \| a smoking device",
+    ]
+
+
+def test_separators_inside_fields_are_escaped(tmp_path):
+    path = tmp_path / "deck.txt"
+    save_vocabulary_txt(ENTRIES[6:], path)
+    assert path.read_text(encoding="utf-8").splitlines() == [
+        r"x | a \| b \| c",
+        r"x |  | a \| b | s",
+        r"back\\slash | /a\|b/ | ends with \\ | \|",
+    ]
+
+
+def test_comments_blank_lines_and_byte_order_mark(tmp_path):
+    path = tmp_path / "deck.txt"
+    path.write_text("# header\n\nabandon | to give up\n   \n# trailer\n", encoding="utf-8-sig")
+    assert [dict(entry) for entry in parse_vocabulary_file(path)] == [{"word": "abandon", "meaning": "to give up"}]
@@ -0,0 +1,56 @@
+"""Streaming JSON reader: the entries must not depend on where the chunk boundaries fall."""
+import json
+
+import pytest
+
+from core.vocabulary_processor import iter_vocabulary_json, load_vocabulary_json
+
+
+DOCUMENT = {
+    "version": 1.5e3,
+    "title": "Deck with \"quotes\", escapes \\ and ünïcödé",
+    "vocabulary": [
+        {"word": "abandon", "pronunciation": "/əˈbændən/", "meaning": "to give up | leave",
+         "example_sentence": "They had to abandon the car."},
+        {"word": "café", "meaning": "a small restaurant", "rank": 12, "score": -0.25},
+        {"word": "naïve", "meaning": "", "tags": ["a", {"b": [1, 2.5e-3]}], "seen": None},
+        {"word": "emoji 😀", "meaning": "brace } and bracket ] inside a string"},
+    ],
+    "trailer": [1, 22, 333, -4.0E+2, True, False, None],
+}
+
+
+def _write(tmp_path, text, encoding="utf-8"):
+    path = tmp_path / "deck.json"
+    path.write_text(text, encoding=encoding)
+    return path
+
+
+@pytest.mark.parametrize("indent", [None, 2])
+def test_every_chunk_size_gives_the_same_entries(tmp_path, indent):
+    text = json.dumps(DOCUMENT, ensure_ascii=False, indent=indent)
+    path = _write(tmp_path, text)
+    for chunk_size in range(1, len(text) + 2):
+        entries = [dict(entry) for entry in iter_vocabulary_json(path, chunk_size=chunk_size)]
+        assert entries == DOCUMENT["vocabulary"], f"chunk_size={chunk_size}"
+
+
+def test_numbers_cut_by_a_chunk_boundary(tmp_path):
+    vocabulary = [{"word": f"w{i}", "rank": 10 ** i, "ratio": i + 0.125, "exp": 1.5e10} for i in range(8)]
+    text = json.dumps({"vocabulary": vocabulary}, separators=(",", ":"))
+    path = _write(tmp_path, text)
+    for chunk_size in range(1, 40):
+        assert [dict(e) for e in iter_vocabulary_json(path, chunk_size=chunk_size)] == vocabulary
+
+
+def test_byte_order_mark_and_empty_documents(tmp_path):
+    path = _write(tmp_path, json.dumps({"vocabulary": [{"word": "a", "meaning": "b"}]}), "utf-8-sig")
+    assert [dict(e) for e in load_vocabulary_json(path)] == [{"word": "a", "meaning": "b"}]
+    assert load_vocabulary_json(_write(tmp_path, "{}")) == []
+    assert load_vocabulary_json(_write(tmp_path, '{"vocabulary": []}')) == []
+
+
+@pytest.mark.parametrize("text", ["[]", '{"vocabulary": [1]}', '{"vocabulary": [{"word": "a"} {}]}'])
+def test_malformed_documents_are_rejected(tmp_path, text):
+    with pytest.raises(ValueError):
+        load_vocabulary_json(_write(tmp_path, text))
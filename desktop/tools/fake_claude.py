@@ -0,0 +1,161 @@
+"""
+Offline stand-in for the `claude` CLI, for trying the Claude integration without network access.
+
+It understands the ways claude_integration calls the CLI:
+  - one-shot:  fake_claude.py -p "<prompt>" [--output-format stream-json]
+  - session:   fake_claude.py -p --input-format stream-json --output-format stream-json
+               (one user message per stdin line, answered with stream-json events)
+With --include-partial-messages the answer is also streamed as small text deltas.
+
+Instead of checking anything it echoes the entries from the prompt back, filling in
+pronunciation and example sentence (for compact-protocol prompts, only the added fields). Behaviour can be tuned with environment variables:
+  FAKE_CLAUDE_DELAY        seconds to wait before answering each prompt (default 0)
+  FAKE_CLAUDE_CRASH_AFTER  session mode: exit after answering this many prompts
+  FAKE_CLAUDE_DROP         probability of leaving an entry out of the answer
+  FAKE_CLAUDE_JITTER       extra random delay of up to this many seconds per prompt
+  FAKE_CLAUDE_FAIL_RATE    probability of failing a prompt with an "overloaded" error
+  FAKE_CLAUDE_PAD          characters of filler appended to each generated example sentence
+  FAKE_CLAUDE_RATE_LIMIT   prompts per minute accepted across all fake processes; the rest
+                           fail with a "429 rate limit" error (counted in a file in the temp dir)
+
+Use it with:  VOCABMASTER_CLAUDE_CMD="python tools/fake_claude.py" python main.py
+"""
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+
+
+class FakeFailure(Exception):
+    """A simulated API error for this prompt."""
+
+
+def enrich(entry):
+    word = entry.get("word", "")
+    pad = int(os.environ.get("FAKE_CLAUDE_PAD", "0"))
+    return {
+        "word": word,
+        "pronunciation": entry.get("pronunciation") or f"/{word}/",
+        "meaning": entry.get("meaning") or f"meaning of {word}",
+        "example_sentence": entry.get("example_sentence") or f"This is an example with {word}." + " ~" * (pad // 2),
+    }
+
+
+def enrich_compact(row):
+    """Compact protocol: return the id plus only the short keys that were added."""
+    full = enrich({"word": row.get("w", ""), "pronunciation": row.get("p", ""),
+                   "meaning": row.get("m", ""), "example_sentence": row.get("s", "")})
+    diff = {"id": row["id"]}
+    for code, field in (("p", "pronunciation"), ("m", "meaning"), ("s", "example_sentence")):
+        if not row.get(code):
+            diff[code] = full[field]
+    return diff
+
+
+def over_rate_limit():
+    """True if FAKE_CLAUDE_RATE_LIMIT prompts were already accepted in the last minute."""
+    limit = float(os.environ.get("FAKE_CLAUDE_RATE_LIMIT", "0"))
+    if not limit:
+        return False
+    # Shared by every fake process; unlocked, so the limit is approximate
+    path = os.path.join(tempfile.gettempdir(), "fake_claude_rate.json")
+    now = time.time()
+    try:
+        with open(path, encoding="utf-8") as f:
+            accepted = [t for t in json.load(f) if t > now - 60]
+    except (OSError, ValueError):
+        accepted = []
+    if len(accepted) >= limit:
+        return True
+    accepted.append(now)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(accepted, f)
+    return False
+
+
+def answer(prompt):
+    """Build the response text for a prompt: the JSON array of enriched entries (or diffs)."""
+    time.sleep(float(os.environ.get("FAKE_CLAUDE_DELAY", "0"))
+               + random.uniform(0, float(os.environ.get("FAKE_CLAUDE_JITTER", "0"))))
+    if random.random() < float(os.environ.get("FAKE_CLAUDE_FAIL_RATE", "0")):
+        raise FakeFailure("API Error: 529 Overloaded")
+    if over_rate_limit():
+        raise FakeFailure("API Error: 429 Rate limit exceeded, please try again later")
+    # The vocabulary payload is the last JSON array in the prompt
+    payload = prompt[prompt.rindex("\n[") + 1:]
+    entries = json.loads(payload)
+    drop = float(os.environ.get("FAKE_CLAUDE_DROP", "0"))
+    if entries and "id" in entries[0]:
+        diffs = [enrich_compact(row) for row in entries if random.random() >= drop]
+        return json.dumps(diffs, ensure_ascii=False, separators=(",", ":"))
+    return json.dumps([enrich(entry) for entry in entries if random.random() >= drop], ensure_ascii=False)
+
+
+def emit(event):
+    sys.stdout.write(json.dumps(event, ensure_ascii=False) + "\n")
+    sys.stdout.flush()
+
+
+def emit_answer(text, partial):
+    """Write the stream-json events for one answer."""
+    if partial:
+        for start in range(0, len(text), 64):
+            emit({
+                "type": "stream_event",
+                "event": {"type": "content_block_delta", "index": 0,
+                          "delta": {"type": "text_delta", "text": text[start:start + 64]}},
+            })
+    emit({"type": "assistant", "message": {"role": "assistant", "content": [{"type": "text", "text": text}]}})
+    emit({"type": "result", "subtype": "success", "is_error": False, "result": text})
+
+
+def run_session(partial):
+    crash_after = int(os.environ.get("FAKE_CLAUDE_CRASH_AFTER", "0"))
+    emit({"type": "system", "subtype": "init", "session_id": f"fake-{os.getpid()}"})
+    answered = 0
+    for line in sys.stdin:
+        if not line.strip():
+            continue
+        message = json.loads(line)["message"]
+        content = message["content"]
+        if isinstance(content, list):
+            content = "".join(block.get("text", "") for block in content)
+        try:
+            emit_answer(answer(content), partial)
+        except FakeFailure as e:
+            emit({"type": "result", "subtype": "error_during_execution", "is_error": True, "result": str(e)})
+        answered += 1
+        if crash_after and answered >= crash_after:
+            sys.exit(1)
+
+
+def option(argv, name):
+    return argv[argv.index(name) + 1] if name in argv[:-1] else None
+
+
+def main(argv):
+    partial = "--include-partial-messages" in argv
+    if option(argv, "--input-format") == "stream-json":
+        run_session(partial)
+        return 0
+    prompt = option(argv, "-p")
+    if prompt is None:
+        sys.stderr.write("usage: fake_claude.py -p PROMPT\n")
+        return 2
+    try:
+        text = answer(prompt)
+    except FakeFailure as e:
+        sys.stderr.write(f"{e}\n")
+        return 1
+    if option(argv, "--output-format") == "stream-json":
+        emit({"type": "system", "subtype": "init", "session_id": f"fake-{os.getpid()}"})
+        emit_answer(text, partial)
+    else:
+        print(text)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -1,40 +1,146 @@
 """
 Main window for VocabMaster Desktop.
 """
+import os
+import time
+import zipfile
+
 from PyQt6.QtWidgets import (
     QMainWindow, QWidget, QVBoxLayout, QHBoxLayout, QTabWidget,
     QPushButton, QLabel, QFileDialog, QTextEdit, QProgressBar,
-    QComboBox, QSpinBox, QGroupBox, QMessageBox, QTableWidget,
-    QTableWidgetItem, QHeaderView, QStatusBar,
+    QComboBox, QSpinBox, QGroupBox, QMessageBox, QTableView,
+    QHeaderView, QStatusBar, QCheckBox,
 )
 from PyQt6.QtCore import Qt, QThread, pyqtSignal
 from PyQt6.QtGui import QFont
 
 from core.vocabulary_processor import (
-    parse_vocabulary_file, divide_into_batches,
-    save_vocabulary_json, load_vocabulary_json, merge_batches,
+    divide_into_batches, save_vocabulary_json, save_vocabulary_txt, merge_batches, DedupPlan,
+)
+from core.bulk_import import bulk_import, format_import_report
+from core.claude_integration import (
+    process_all_batches, EnrichmentOptions, BatchProcessingError, AdaptiveBatchSizer, ClaudeSessionEngine,
+    quarantined_positions,
+)
+from core.dictionary_index import DictionaryIndex
+from core.enrichment_cache import EnrichmentCache
+from core.metrics import MetricsLog, format_summary
+from core.run_journal import RunJournal
+from core.user_data import user_data_dir
+from core.theme_builder import (
+    build_theme_zip, build_theme_zips, build_delta_zip, order_package_chain, list_themes, BUILT_IN_THEMES,
 )
-from core.claude_integration import process_all_batches
-from core.theme_builder import build_theme_zip, list_themes, BUILT_IN_THEMES
+from ui.search_bar import SearchBar
+from ui.vocabulary_table_model import VocabularyTableModel
 
 
 class ClaudeWorker(QThread):
     """Background thread for Claude processing."""
     progress = pyqtSignal(int, int)  # current, total
+    entries = pyqtSignal(list)  # corrected entries, in order, as they become available
     finished = pyqtSignal(list)
     error = pyqtSignal(str)
 
-    def __init__(self, batches):
+    def __init__(self, batches, options, metrics=None, load_dictionary=False):
         super().__init__()
         self.batches = batches
+        self.options = options  # EnrichmentOptions
+        self.metrics = metrics or MetricsLog()
+        self.load_dictionary = load_dictionary  # open the DictionaryIndex here if none was given
+        self.dictionary_error = None
+        self.stats = {}
+        self.partial_results = []
 
     def run(self):
+        if self.options.dictionary is None and self.load_dictionary:
+            # Loading a large dictionary takes a second or more, so it is done off the GUI thread
+            try:
+                self.options.dictionary = DictionaryIndex()
+            except Exception as e:
+                self.dictionary_error = str(e)
         try:
             results = process_all_batches(
                 self.batches,
+                options=self.options,
                 progress_callback=lambda cur, tot: self.progress.emit(cur, tot),
+                results_callback=lambda entries: self.entries.emit(entries),
+                metrics_callback=self.metrics,
+                stats=self.stats,
             )
+            dictionary = self.options.dictionary
+            if dictionary is not None:
+                # Remember this run's words (not the ones quarantined unchanged) for next time
+                dictionary.add_entries(results, skip=quarantined_positions(self.stats))
+                dictionary.save()
             self.finished.emit(results)
+        except BatchProcessingError as e:
+            self.partial_results = e.results
+            self.error.emit(str(e))
+        except Exception as e:
+            self.error.emit(str(e))
+
+
+class ExportWorker(QThread):
+    """Background thread for saving files and building zips, so large exports do not freeze the window."""
+    done = pyqtSignal(str)  # message for the status bar
+    error = pyqtSignal(str)
+
+    def __init__(self, task, message, success_text=None):
+        super().__init__()
+        self.task = task
+        self.message = message
+        self.success_text = success_text
+
+    def run(self):
+        try:
+            self.task()
+            self.done.emit(self.message)
+        except Exception as e:
+            self.error.emit(str(e))
+
+
+class PlanWorker(QThread):
+    """
+    Background thread for the dedup plan and run journal path of the vocabulary list; both
+    read every entry, which takes seconds for large lists.
+    """
+
+    def __init__(self, key, vocabulary, dedupe):
+        super().__init__()
+        self.key = key
+        self.vocabulary = vocabulary
+        self.dedupe = dedupe
+        self.plan = None  # (entries, dedup plan or None, journal path), once run
+
+    def run(self):
+        try:
+            self.plan = _dispatch_plan(self.vocabulary, self.dedupe)
+        except Exception:
+            # An edit in the table can race with the scan; the list is planned again on its next change
+            self.plan = None
+
+
+def _dispatch_plan(vocabulary, dedupe):
+    """The entries to send to Claude, the dedup plan that produced them (or None) and their journal path."""
+    plan = DedupPlan(vocabulary) if dedupe else None
+    entries = plan.unique if plan is not None else vocabulary
+    return entries, plan, RunJournal.path_for(entries)
+
+
+class ImportWorker(QThread):
+    """Background thread for reading vocabulary files (several at once in a process pool)."""
+    file_done = pyqtSignal(dict)  # per-file report, in input order
+    finished = pyqtSignal(list, list)  # entries, reports
+    error = pyqtSignal(str)
+
+    def __init__(self, sources):
+        super().__init__()
+        self.sources = sources
+
+    def run(self):
+        try:
+            entries, reports = bulk_import(self.sources, on_file=self.file_done.emit)
+            self.finished.emit(entries, reports)
         except Exception as e:
             self.error.emit(str(e))
 
@@ -47,6 +153,18 @@ class MainWindow(QMainWindow):
         self.vocabulary = []
         self.processed_vocabulary = []
         self.worker = None
+        self.export_worker = None
+        self.import_worker = None
+        self.word_list_worker = None
+        self.cache = None
+        self.dictionary = None
+        self.dedup_plan = None
+        # The dispatch plan is cached per (vocabulary version, dedupe) and computed on a PlanWorker
+        self.vocabulary_version = 0
+        self.plan_cache = None  # (key, (entries, plan, journal path))
+        self.plan_worker = None
+        self.ui_seconds = 0.0
+        self.import_started = 0.0
 
         self._setup_ui()
 
@@ -87,6 +205,11 @@ class MainWindow(QMainWindow):
         self.btn_import_json = QPushButton("Import JSON File")
         self.btn_import_json.clicked.connect(self._import_json)
         btn_row.addWidget(self.btn_import_json)
+
+        self.btn_import_folder = QPushButton("Import Folder")
+        self.btn_import_folder.setToolTip("Import every .txt, .json and .vmb file in a folder, in name order")
+        self.btn_import_folder.clicked.connect(self._import_folder)
+        btn_row.addWidget(self.btn_import_folder)
         import_layout.addLayout(btn_row)
 
         self.lbl_import_status = QLabel("No file loaded")
@@ -97,9 +220,13 @@ class MainWindow(QMainWindow):
         preview_group = QGroupBox("Vocabulary Preview")
         preview_layout = QVBoxLayout(preview_group)
 
-        self.table_preview = QTableWidget()
-        self.table_preview.setColumnCount(2)
-        self.table_preview.setHorizontalHeaderLabels(["Word", "Meaning"])
+        self.preview_model = VocabularyTableModel([("word", "Word"), ("meaning", "Meaning")], self.vocabulary)
+        self.preview_model.dataChanged.connect(lambda *args: self._vocabulary_changed())
+        self.search_preview = SearchBar(self.preview_model)
+        preview_layout.addWidget(self.search_preview)
+        self.table_preview = QTableView()
+        self.table_preview.setModel(self.preview_model)
+        self.table_preview.setSortingEnabled(True)
         self.table_preview.horizontalHeader().setSectionResizeMode(QHeaderView.ResizeMode.Stretch)
         preview_layout.addWidget(self.table_preview)
         layout.addWidget(preview_group)
@@ -112,14 +239,71 @@ class MainWindow(QMainWindow):
 
         # Settings
         settings_group = QGroupBox("Processing Settings")
-        settings_layout = QHBoxLayout(settings_group)
+        settings_box = QVBoxLayout(settings_group)
 
-        settings_layout.addWidget(QLabel("Batch size:"))
+        sizing_layout = QHBoxLayout()
+        sizing_layout.addWidget(QLabel("Batch sizing:"))
+        self.combo_sizing = QComboBox()
+        self.combo_sizing.addItem("Fixed entry count", "fixed")
+        self.combo_sizing.addItem("Adaptive (token budget)", "adaptive")
+        sizing_layout.addWidget(self.combo_sizing)
+
+        sizing_layout.addWidget(QLabel("Batch size:"))
         self.spin_batch = QSpinBox()
         self.spin_batch.setRange(5, 50)
         self.spin_batch.setValue(15)
-        settings_layout.addWidget(self.spin_batch)
+        sizing_layout.addWidget(self.spin_batch)
+
+        sizing_layout.addWidget(QLabel("Start budget (tokens):"))
+        self.spin_tokens = QSpinBox()
+        self.spin_tokens.setRange(200, 12000)
+        self.spin_tokens.setSingleStep(100)
+        self.spin_tokens.setValue(1500)
+        sizing_layout.addWidget(self.spin_tokens)
+        sizing_layout.addStretch()
+        settings_box.addLayout(sizing_layout)
+        self.combo_sizing.currentIndexChanged.connect(self._update_sizing_controls)
+        self._update_sizing_controls()
+
+        settings_layout = QHBoxLayout()
+        settings_layout.addWidget(QLabel("Parallel requests:"))
+        self.spin_workers = QSpinBox()
+        self.spin_workers.setRange(1, 8)
+        self.spin_workers.setValue(3)
+        settings_layout.addWidget(self.spin_workers)
+
+        self.chk_cache = QCheckBox("Reuse previously checked words (local cache)")
+        self.chk_cache.setChecked(True)
+        settings_layout.addWidget(self.chk_cache)
+
+        self.chk_dedupe = QCheckBox("Merge duplicate words")
+        self.chk_dedupe.setChecked(True)
+        self.chk_dedupe.setToolTip("Send each word once even if it appears in several rows")
+        self.chk_dedupe.toggled.connect(lambda checked: self._update_resume_button())
+        settings_layout.addWidget(self.chk_dedupe)
+
+        self.chk_sessions = QCheckBox("Keep Claude sessions open")
+        self.chk_sessions.setToolTip("Reuse running claude processes instead of starting one per batch")
+        settings_layout.addWidget(self.chk_sessions)
+
+        self.chk_dictionary = QCheckBox("Use local dictionary")
+        self.chk_dictionary.setChecked(True)
+        self.chk_dictionary.setToolTip("Complete, correctly spelled words already known from earlier runs or "
+                                       "word lists are filled in locally instead of being sent to Claude")
+        settings_layout.addWidget(self.chk_dictionary)
+
+        self.btn_word_list = QPushButton("Add Word List...")
+        self.btn_word_list.setToolTip("Add a file of correctly spelled words (one per line) to the local dictionary")
+        self.btn_word_list.clicked.connect(self._add_word_list)
+        settings_layout.addWidget(self.btn_word_list)
+
+        self.chk_metrics = QCheckBox("Save batch metrics")
+        self.chk_metrics.setToolTip(
+            f"Append per-batch timings as JSON lines to {os.path.join(user_data_dir(), 'metrics.jsonl')}"
+        )
+        settings_layout.addWidget(self.chk_metrics)
         settings_layout.addStretch()
+        settings_box.addLayout(settings_layout)
         layout.addWidget(settings_group)
 
         # Process button
@@ -128,6 +312,11 @@ class MainWindow(QMainWindow):
         self.btn_process.clicked.connect(self._start_processing)
         layout.addWidget(self.btn_process)
 
+        self.btn_resume = QPushButton("Resume Interrupted Run")
+        self.btn_resume.setEnabled(False)
+        self.btn_resume.clicked.connect(self._resume_processing)
+        layout.addWidget(self.btn_resume)
+
         # Progress
         self.progress_bar = QProgressBar()
         layout.addWidget(self.progress_bar)
@@ -143,9 +332,16 @@ class MainWindow(QMainWindow):
         # Result table
         result_group = QGroupBox("Processed Vocabulary")
         result_layout = QVBoxLayout(result_group)
-        self.table_result = QTableWidget()
-        self.table_result.setColumnCount(4)
-        self.table_result.setHorizontalHeaderLabels(["Word", "Pronunciation", "Meaning", "Example Sentence"])
+        self.result_model = VocabularyTableModel(
+            [("word", "Word"), ("pronunciation", "Pronunciation"),
+             ("meaning", "Meaning"), ("example_sentence", "Example Sentence")],
+            self.processed_vocabulary,
+        )
+        self.search_result = SearchBar(self.result_model)
+        result_layout.addWidget(self.search_result)
+        self.table_result = QTableView()
+        self.table_result.setModel(self.result_model)
+        self.table_result.setSortingEnabled(True)
         self.table_result.horizontalHeader().setSectionResizeMode(QHeaderView.ResizeMode.Stretch)
         result_layout.addWidget(self.table_result)
         layout.addWidget(result_group)
@@ -167,6 +363,29 @@ class MainWindow(QMainWindow):
         save_layout.addWidget(self.btn_save_txt)
         layout.addWidget(save_group)
 
+        options_group = QGroupBox("Output Options")
+        options_layout = QHBoxLayout(options_group)
+        self.chk_compact_json = QCheckBox("Compact JSON (no indentation)")
+        self.chk_compact_json.setToolTip("Smaller and faster to write; applies to saved JSON and theme packages")
+        options_layout.addWidget(self.chk_compact_json)
+        options_layout.addWidget(QLabel("ZIP compression level:"))
+        self.spin_compression = QSpinBox()
+        self.spin_compression.setRange(0, 9)
+        self.spin_compression.setValue(6)
+        self.spin_compression.setToolTip("0 = store only (fastest), 9 = smallest")
+        options_layout.addWidget(self.spin_compression)
+        options_layout.addWidget(QLabel("Shard size:"))
+        self.spin_shard = QSpinBox()
+        self.spin_shard.setRange(0, 100000)
+        self.spin_shard.setSingleStep(500)
+        self.spin_shard.setValue(0)
+        self.spin_shard.setSpecialValueText("Single file")
+        self.spin_shard.setToolTip("Split large decks into shards of this many words so the app can show "
+                                   "the first cards before loading the rest")
+        options_layout.addWidget(self.spin_shard)
+        options_layout.addStretch()
+        layout.addWidget(options_group)
+
         # Theme builder
         theme_group = QGroupBox("Build Themed Package (.zip)")
         theme_layout = QVBoxLayout(theme_group)
@@ -192,6 +411,16 @@ class MainWindow(QMainWindow):
         self.btn_build_zip.clicked.connect(self._build_zip)
         theme_layout.addWidget(self.btn_build_zip)
 
+        self.btn_build_all = QPushButton("Build All Themes...")
+        self.btn_build_all.setToolTip("Build one package per built-in theme into a folder, in a single pass")
+        self.btn_build_all.clicked.connect(self._build_all_zips)
+        theme_layout.addWidget(self.btn_build_all)
+
+        self.btn_build_delta = QPushButton("Build Update (Delta)...")
+        self.btn_build_delta.setToolTip("Package only the words added, changed or removed since a previous build")
+        self.btn_build_delta.clicked.connect(self._build_delta_zip)
+        theme_layout.addWidget(self.btn_build_delta)
+
         layout.addWidget(theme_group)
         layout.addStretch()
 
@@ -200,78 +429,310 @@ class MainWindow(QMainWindow):
     # --- Actions ---
 
     def _import_txt(self):
-        path, _ = QFileDialog.getOpenFileName(self, "Open Vocabulary TXT", "", "Text Files (*.txt);;All Files (*)")
-        if not path:
-            return
-        try:
-            self.vocabulary = parse_vocabulary_file(path)
-            self._refresh_preview_table()
-            self.lbl_import_status.setText(f"Loaded {len(self.vocabulary)} words from {path}")
-            self.statusBar().showMessage(f"Imported {len(self.vocabulary)} words")
-        except Exception as e:
-            QMessageBox.critical(self, "Import Error", str(e))
+        paths, _ = QFileDialog.getOpenFileNames(self, "Open Vocabulary TXT", "", "Text Files (*.txt);;All Files (*)")
+        if paths:
+            self._run_import(paths)
 
     def _import_json(self):
-        path, _ = QFileDialog.getOpenFileName(self, "Open Vocabulary JSON", "", "JSON Files (*.json);;All Files (*)")
+        paths, _ = QFileDialog.getOpenFileNames(self, "Open Vocabulary JSON", "", "JSON Files (*.json);;All Files (*)")
+        if paths:
+            self._run_import(paths)
+
+    def _import_folder(self):
+        path = QFileDialog.getExistingDirectory(self, "Import Vocabulary Folder")
+        if path:
+            self._run_import([path])
+
+    def _import_buttons(self):
+        return [self.btn_import_txt, self.btn_import_json, self.btn_import_folder]
+
+    def _run_import(self, sources):
+        """Read the files on a worker thread; the current list stays until they are all loaded."""
+        for button in self._import_buttons():
+            button.setEnabled(False)
+        self.lbl_import_status.setText("Loading...")
+        self.import_started = time.perf_counter()
+        self.import_worker = ImportWorker(sources)
+        self.import_worker.file_done.connect(self._on_import_file)
+        self.import_worker.finished.connect(self._on_import_done)
+        self.import_worker.error.connect(self._on_import_error)
+        self.import_worker.start()
+
+    def _on_import_file(self, report):
+        self.statusBar().showMessage(f"Loaded {format_import_report(report)}")
+
+    def _on_import_done(self, entries, reports):
+        for button in self._import_buttons():
+            button.setEnabled(True)
+        seconds = time.perf_counter() - self.import_started
+        self.vocabulary = entries
+        self._refresh_preview_table()
+        source = reports[0]["path"] if len(reports) == 1 else f"{len(reports)} files"
+        self.lbl_import_status.setText(f"Loaded {len(entries)} words from {source} in {seconds:.2f}s")
+        if len(reports) > 1:
+            self.lbl_import_status.setToolTip("\n".join(format_import_report(report) for report in reports))
+        else:
+            self.lbl_import_status.setToolTip("")
+        self.statusBar().showMessage(f"Imported {len(entries)} words")
+
+    def _on_import_error(self, error_msg):
+        for button in self._import_buttons():
+            button.setEnabled(True)
+        self.lbl_import_status.setText("Import failed")
+        QMessageBox.critical(self, "Import Error", error_msg)
+
+    def _add_word_list(self):
+        if self.worker is not None and self.worker.isRunning():
+            QMessageBox.warning(self, "Busy", "Wait for the current run to finish before changing the dictionary.")
+            return
+        path, _ = QFileDialog.getOpenFileName(self, "Open Word List", "", "Text Files (*.txt);;All Files (*)")
         if not path:
             return
-        try:
-            self.vocabulary = load_vocabulary_json(path)
-            self._refresh_preview_table()
-            self.lbl_import_status.setText(f"Loaded {len(self.vocabulary)} words from {path}")
-            self.statusBar().showMessage(f"Imported {len(self.vocabulary)} words")
-        except Exception as e:
-            QMessageBox.critical(self, "Import Error", str(e))
+        loaded = [self.dictionary]
+
+        def add_words():
+            # Opening and saving the dictionary take seconds for large ones, so this runs on a worker
+            if loaded[0] is None:
+                loaded[0] = DictionaryIndex()
+            loaded[0].add_word_list(path)
+            loaded[0].save()
+
+        def done(message):
+            self.dictionary = loaded[0]
+            self.btn_word_list.setEnabled(True)
+            self.statusBar().showMessage(f"{message} ({len(self.dictionary)} words known)")
+
+        def failed(error_msg):
+            self.btn_word_list.setEnabled(True)
+            QMessageBox.critical(self, "Dictionary Error", error_msg)
+
+        self.btn_word_list.setEnabled(False)
+        self.statusBar().showMessage("Adding word list...")
+        self.word_list_worker = ExportWorker(add_words, f"Added {os.path.basename(path)} to the local dictionary")
+        self.word_list_worker.done.connect(done)
+        self.word_list_worker.error.connect(failed)
+        self.word_list_worker.start()
 
     def _refresh_preview_table(self):
-        self.table_preview.setRowCount(len(self.vocabulary))
-        for i, entry in enumerate(self.vocabulary):
-            self.table_preview.setItem(i, 0, QTableWidgetItem(entry.get("word", "")))
-            self.table_preview.setItem(i, 1, QTableWidgetItem(entry.get("meaning", "")))
+        self.preview_model.set_entries(self.vocabulary)
+        self._vocabulary_changed()
+
+    def _vocabulary_changed(self):
+        """The list was replaced or edited: its dispatch plan has to be worked out again."""
+        self.vocabulary_version += 1
+        self._update_resume_button()
+
+    def _update_sizing_controls(self):
+        adaptive = self.combo_sizing.currentData() == "adaptive"
+        self.spin_batch.setEnabled(not adaptive)
+        self.spin_tokens.setEnabled(adaptive)
+
+    def _plan_key(self):
+        return self.vocabulary_version, self.chk_dedupe.isChecked()
+
+    def _cached_plan(self):
+        if self.plan_cache is not None and self.plan_cache[0] == self._plan_key():
+            return self.plan_cache[1]
+        return None
+
+    def _dispatch_plan(self):
+        """(entries to send to Claude, dedup plan or None, journal path), from the cache if it is current."""
+        plan = self._cached_plan()
+        if plan is None:
+            # Processing was started before the PlanWorker finished
+            plan = _dispatch_plan(self.vocabulary, self.chk_dedupe.isChecked())
+            self.plan_cache = (self._plan_key(), plan)
+        return plan
+
+    def _start_plan_worker(self):
+        if self.plan_worker is not None and self.plan_worker.isRunning():
+            return  # _on_plan_ready starts another one if the list changed meanwhile
+        self.plan_worker = PlanWorker(self._plan_key(), self.vocabulary, self.chk_dedupe.isChecked())
+        self.plan_worker.finished.connect(self._on_plan_ready)
+        self.plan_worker.start()
+
+    def _on_plan_ready(self):
+        if self.plan_worker.plan is not None:
+            self.plan_cache = (self.plan_worker.key, self.plan_worker.plan)
+        if self.plan_worker.key == self._plan_key():
+            self._update_resume_button()
+        elif self.vocabulary:
+            self._start_plan_worker()
+
+    def _update_resume_button(self):
+        has_journal = False
+        if self.vocabulary:
+            plan = self._cached_plan()
+            if plan is None:
+                self._start_plan_worker()
+            else:
+                has_journal = os.path.exists(plan[2])
+        self.btn_resume.setEnabled(has_journal and self.btn_process.isEnabled())
 
     def _start_processing(self):
+        self._run_processing(resume=False)
+
+    def _resume_processing(self):
+        self._run_processing(resume=True)
+
+    def _run_processing(self, resume):
         if not self.vocabulary:
             QMessageBox.warning(self, "No Data", "Please import vocabulary first (Tab 1).")
             return
 
+        if self.word_list_worker is not None and self.word_list_worker.isRunning():
+            QMessageBox.warning(self, "Busy", "Wait for the word list to be added to the dictionary.")
+            return
+
         batch_size = self.spin_batch.value()
-        batches = divide_into_batches(self.vocabulary, batch_size)
+        entries, self.dedup_plan, journal_path = self._dispatch_plan()
+        batches = divide_into_batches(entries, batch_size)
 
         self.txt_log.clear()
-        self.txt_log.append(f"Processing {len(self.vocabulary)} words in {len(batches)} batches...")
+        self.txt_log.append(f"Processing {len(entries)} words in {len(batches)} batches...")
+        if self.dedup_plan and self.dedup_plan.duplicates:
+            self.txt_log.append(
+                f"Merged {self.dedup_plan.duplicates} duplicate rows "
+                f"(saves about {self.dedup_plan.calls_saved(batch_size)} Claude calls)."
+            )
         self.progress_bar.setMaximum(len(batches))
         self.progress_bar.setValue(0)
         self.btn_process.setEnabled(False)
+        self.btn_resume.setEnabled(False)
+
+        journal = RunJournal(journal_path, resume=resume)
+        if resume:
+            self.txt_log.append(f"Resuming: {len(journal)} words already completed in the previous run.")
+
+        cache = None
+        if self.chk_cache.isChecked():
+            try:
+                if self.cache is None:
+                    self.cache = EnrichmentCache()
+                cache = self.cache
+            except Exception as e:
+                self.txt_log.append(f"Cache unavailable, continuing without it: {e}")
+
+        batch_sizer = None
+        if self.combo_sizing.currentData() == "adaptive":
+            batch_sizer = AdaptiveBatchSizer(target_tokens=self.spin_tokens.value())
+
+        engine = None
+        if self.chk_sessions.isChecked():
+            engine = ClaudeSessionEngine(size=self.spin_workers.value())
+
+        metrics = None
+        if self.chk_metrics.isChecked():
+            try:
+                metrics = MetricsLog(os.path.join(user_data_dir(), "metrics.jsonl"))
+            except OSError as e:
+                self.txt_log.append(f"Cannot write metrics file, keeping them in memory: {e}")
+        self.ui_seconds = 0.0
+
+        options = EnrichmentOptions(
+            max_workers=self.spin_workers.value(),
+            engine=engine,
+            batch_sizer=batch_sizer,
+            cache=cache,
+            journal=journal,
+            dictionary=self.dictionary if self.chk_dictionary.isChecked() else None,
+        )
+        self.worker = ClaudeWorker(batches, options, metrics=metrics,
+                                   load_dictionary=self.chk_dictionary.isChecked())
+        self.processed_vocabulary = []
+        self.result_model.set_entries(self.processed_vocabulary)
 
-        self.worker = ClaudeWorker(batches)
         self.worker.progress.connect(self._on_progress)
+        self.worker.entries.connect(self._on_entries)
         self.worker.finished.connect(self._on_finished)
         self.worker.error.connect(self._on_error)
         self.worker.start()
 
     def _on_progress(self, current, total):
+        self.progress_bar.setMaximum(total)
         self.progress_bar.setValue(current)
         self.lbl_progress.setText(f"Batch {current}/{total}")
         self.txt_log.append(f"Batch {current}/{total} completed.")
 
+    def _on_entries(self, entries):
+        # Rows are appended live, so results can be reviewed (and saved) while the run continues
+        # The model shares processed_vocabulary, so this extends both
+        started = time.perf_counter()
+        self.result_model.append_entries(entries)
+        self.ui_seconds += time.perf_counter() - started
+
+    def _log_metrics(self):
+        """Write the run's latency/throughput summary to the log and close its metrics file."""
+        self.worker.metrics.close()
+        self.txt_log.append(format_summary(self.worker.metrics.summary()))
+        self.txt_log.append(f"Updating the result table took {self.ui_seconds:.2f}s.")
+
+    def _keep_dictionary(self):
+        """Keep the dictionary the worker opened for later runs, and report if it could not be opened."""
+        if self.worker.options.dictionary is not None:
+            self.dictionary = self.worker.options.dictionary
+        if self.worker.dictionary_error:
+            self.txt_log.append(f"Dictionary unavailable, continued without it: {self.worker.dictionary_error}")
+
     def _on_finished(self, results):
-        self.processed_vocabulary = results
+        # processed_vocabulary already holds the same entries (streamed in through _on_entries)
+        # and may have been edited in the table meanwhile, so it is kept as is
+        journal = self.worker.options.journal
+        self._keep_dictionary()
+        if self.worker.options.engine is not None:
+            self.worker.options.engine.close()
         self.btn_process.setEnabled(True)
+        self.progress_bar.setValue(self.progress_bar.maximum())
+        expanded = True
+        if self.dedup_plan and self.dedup_plan.duplicates:
+            try:
+                self.processed_vocabulary = self.dedup_plan.expand(self.processed_vocabulary)
+                self.result_model.set_entries(self.processed_vocabulary)
+                results = self.processed_vocabulary
+            except ValueError as e:
+                expanded = False
+                self.txt_log.append(f"Could not copy results back to duplicate rows: {e}")
+        if expanded:
+            journal.discard()
+        else:
+            # Keep the journal so the run can be resumed instead of sent to Claude again
+            journal.close()
+        self._update_resume_button()
         self.lbl_progress.setText(f"Done! {len(results)} words processed.")
         self.txt_log.append(f"All batches completed. {len(results)} words ready.")
+        stats = self.worker.stats if self.worker else {}
+        if self.chk_cache.isChecked() and stats:
+            self.txt_log.append(
+                f"Cache: {stats['cache_hits']} hits, {stats['cache_misses']} misses "
+                f"({stats['batches_sent']} batches sent to Claude)."
+            )
+        if self.worker.options.dictionary is not None and stats:
+            self.txt_log.append(f"Dictionary: {stats['dictionary_hits']} words filled in locally, "
+                                f"{stats['suspected_misspellings']} likely misspellings sent first.")
+        if stats.get("retried"):
+            self.txt_log.append(f"{len(stats['retried'])} words needed a retry or a smaller batch.")
+        for item in stats.get("quarantined", []):
+            self.txt_log.append(
+                f"Quarantined (left unchanged): {item['entry'].get('word', '')} - {item['error']}"
+            )
+        if self.worker.options.batch_sizer is not None:
+            self.txt_log.append(f"Adaptive batch budget ended at {self.worker.options.batch_sizer.target_tokens} tokens.")
+        self._log_metrics()
         self.statusBar().showMessage("Processing complete!")
 
-        # Fill result table
-        self.table_result.setRowCount(len(results))
-        for i, entry in enumerate(results):
-            self.table_result.setItem(i, 0, QTableWidgetItem(entry.get("word", "")))
-            self.table_result.setItem(i, 1, QTableWidgetItem(entry.get("pronunciation", "")))
-            self.table_result.setItem(i, 2, QTableWidgetItem(entry.get("meaning", "")))
-            self.table_result.setItem(i, 3, QTableWidgetItem(entry.get("example_sentence", "")))
-
     def _on_error(self, error_msg):
+        self.worker.options.journal.close()
+        self._keep_dictionary()
+        if self.worker.options.engine is not None:
+            self.worker.options.engine.close()
         self.btn_process.setEnabled(True)
+        self._update_resume_button()
         self.txt_log.append(f"ERROR: {error_msg}")
+        self._log_metrics()
+        if self.worker and self.worker.partial_results:
+            self.txt_log.append(f"{len(self.worker.partial_results)} words from completed batches were returned before the failure.")
+        if self.btn_resume.isEnabled():
+            self.txt_log.append("Completed batches are saved. Use 'Resume Interrupted Run' to finish the rest.")
         QMessageBox.critical(self, "Processing Error", error_msg)
 
     def _save_json(self):
@@ -281,8 +742,9 @@ class MainWindow(QMainWindow):
             return
         path, _ = QFileDialog.getSaveFileName(self, "Save JSON", "vocabulary.json", "JSON Files (*.json)")
         if path:
-            save_vocabulary_json(data, path)
-            self.statusBar().showMessage(f"Saved to {path}")
+            entries = list(data)
+            compact = self.chk_compact_json.isChecked()
+            self._run_export(lambda: save_vocabulary_json(entries, path, compact), f"Saved to {path}")
 
     def _save_txt(self):
         data = self.processed_vocabulary or self.vocabulary
@@ -291,17 +753,41 @@ class MainWindow(QMainWindow):
             return
         path, _ = QFileDialog.getSaveFileName(self, "Save TXT", "vocabulary.txt", "Text Files (*.txt)")
         if path:
-            with open(path, "w", encoding="utf-8") as f:
-                for entry in data:
-                    parts = [entry.get("word", "")]
-                    if entry.get("pronunciation"):
-                        parts.append(entry["pronunciation"])
-                    if entry.get("meaning"):
-                        parts.append(entry["meaning"])
-                    if entry.get("example_sentence"):
-                        parts.append(entry["example_sentence"])
-                    f.write(" | ".join(parts) + "\n")
-            self.statusBar().showMessage(f"Saved to {path}")
+            entries = list(data)
+            self._run_export(lambda: save_vocabulary_txt(entries, path), f"Saved to {path}")
+
+    def _run_export(self, task, message, success_text=None):
+        """
+        Run a save/build task on an ExportWorker; export buttons are disabled until it ends.
+        `message` goes to the status bar when it succeeds, `success_text` (if any) to a dialog.
+        """
+        # The task works on a snapshot of the list, so the tables stay usable meanwhile
+        for button in self._export_buttons():
+            button.setEnabled(False)
+        self.statusBar().showMessage("Exporting...")
+        self.export_worker = ExportWorker(task, message, success_text)
+        self.export_worker.done.connect(self._on_export_done)
+        self.export_worker.error.connect(self._on_export_error)
+        self.export_worker.start()
+
+    def _export_buttons(self):
+        return (self.btn_save_json, self.btn_save_txt, self.btn_build_zip, self.btn_build_all,
+                self.btn_build_delta)
+
+    def _export_finished(self):
+        for button in self._export_buttons():
+            button.setEnabled(True)
+
+    def _on_export_done(self, message):
+        self._export_finished()
+        self.statusBar().showMessage(message)
+        if self.export_worker.success_text:
+            QMessageBox.information(self, "Success", self.export_worker.success_text)
+
+    def _on_export_error(self, error_msg):
+        self._export_finished()
+        self.statusBar().showMessage("Export failed")
+        QMessageBox.critical(self, "Export Error", error_msg)
 
     def _update_theme_preview(self):
         key = self.combo_theme.currentData()
@@ -323,9 +809,56 @@ class MainWindow(QMainWindow):
         default_name = f"vocabmaster_{theme_key}.zip"
         path, _ = QFileDialog.getSaveFileName(self, "Save Theme ZIP", default_name, "ZIP Files (*.zip)")
         if path:
-            try:
-                build_theme_zip(theme_key, data, path)
-                self.statusBar().showMessage(f"Theme ZIP saved to {path}")
-                QMessageBox.information(self, "Success", f"Theme package built!\n{path}")
-            except Exception as e:
-                QMessageBox.critical(self, "Build Error", str(e))
+            entries = list(data)
+            compact = self.chk_compact_json.isChecked()
+            level = self.spin_compression.value()
+            shard_size = self.spin_shard.value() or None
+            self._run_export(lambda: build_theme_zip(theme_key, entries, path, compact=compact, compresslevel=level,
+                                                     shard_size=shard_size),
+                             f"Theme ZIP saved to {path}", f"Theme package built!\n{path}")
+
+    def _build_all_zips(self):
+        data = self.processed_vocabulary or self.vocabulary
+        if not data:
+            QMessageBox.warning(self, "No Data", "No vocabulary to package. Import or process first.")
+            return
+
+        folder = QFileDialog.getExistingDirectory(self, "Folder for Theme ZIPs")
+        if folder:
+            entries = list(data)
+            compact = self.chk_compact_json.isChecked()
+            level = self.spin_compression.value()
+            names = list(BUILT_IN_THEMES)
+            shard_size = self.spin_shard.value() or None
+            self._run_export(lambda: build_theme_zips(names, entries, folder, compact=compact, compresslevel=level,
+                                                      shard_size=shard_size),
+                             f"{len(names)} theme ZIPs saved to {folder}",
+                             f"Built {len(names)} theme packages in\n{folder}")
+
+    def _build_delta_zip(self):
+        data = self.processed_vocabulary or self.vocabulary
+        if not data:
+            QMessageBox.warning(self, "No Data", "No vocabulary to package. Import or process first.")
+            return
+
+        previous, _ = QFileDialog.getOpenFileNames(
+            self, "Select the previous full package and any updates built on it", "", "ZIP Files (*.zip)"
+        )
+        if not previous:
+            return
+        try:
+            base, deltas = order_package_chain(previous)
+        except (ValueError, OSError, KeyError, zipfile.BadZipFile) as e:
+            QMessageBox.critical(self, "Build Error", str(e))
+            return
+
+        theme_key = self.combo_theme.currentData()
+        default_name = f"vocabmaster_{theme_key}.delta{len(deltas) + 1}.zip"
+        path, _ = QFileDialog.getSaveFileName(self, "Save Update ZIP", default_name, "ZIP Files (*.zip)")
+        if path:
+            entries = list(data)
+            compact = self.chk_compact_json.isChecked()
+            level = self.spin_compression.value()
+            self._run_export(lambda: build_delta_zip(theme_key, entries, base, path, deltas,
+                                                     compact=compact, compresslevel=level),
+                             f"Update package saved to {path}", f"Update package built!\n{path}")
@@ -0,0 +1,145 @@
+"""
+Search box that filters a VocabularyTableModel through a SearchIndex.
+"""
+import time
+
+from PyQt6.QtWidgets import QWidget, QHBoxLayout, QLineEdit, QComboBox, QCheckBox, QLabel
+from PyQt6.QtCore import QTimer
+
+from core.search_index import SearchIndex, PREFIX, SUBSTRING, MISSING_PRONUNCIATION, MISSING_EXAMPLE
+
+
+class SearchBar(QWidget):
+    """
+    Query box, match mode and "missing field" filters above a vocabulary table.
+
+    The index follows the model: it is rebuilt when the model is reset to a new list, grows
+    when entries are appended and re-indexes rows edited in the table. Rebuilding indexes a
+    slice of entries per event-loop turn so loading a large deck never freezes the window;
+    queries are debounced while typing and take milliseconds, so they run on the GUI thread.
+
+    Args:
+        model: the VocabularyTableModel to filter
+    """
+
+    CHUNK = 5000  # entries indexed per event-loop turn while rebuilding
+    DEBOUNCE_MS = 150
+
+    def __init__(self, model, parent=None):
+        super().__init__(parent)
+        self.model = model
+        self.index = SearchIndex()
+        self._rebuild = 0  # bumped on every reset, so an older rebuild stops
+        self._filtering = False
+
+        layout = QHBoxLayout(self)
+        layout.setContentsMargins(0, 0, 0, 0)
+
+        self.txt_query = QLineEdit()
+        self.txt_query.setPlaceholderText("Search word, meaning or example...")
+        self.txt_query.setClearButtonEnabled(True)
+        self.txt_query.textChanged.connect(self._schedule)
+        layout.addWidget(self.txt_query, 1)
+
+        self.combo_mode = QComboBox()
+        self.combo_mode.addItem("Contains", SUBSTRING)
+        self.combo_mode.addItem("Word starts with", PREFIX)
+        self.combo_mode.currentIndexChanged.connect(self._apply)
+        layout.addWidget(self.combo_mode)
+
+        self.chk_no_pronunciation = QCheckBox("No pronunciation")
+        self.chk_no_pronunciation.toggled.connect(self._apply)
+        layout.addWidget(self.chk_no_pronunciation)
+
+        self.chk_no_example = QCheckBox("No example")
+        self.chk_no_example.toggled.connect(self._apply)
+        layout.addWidget(self.chk_no_example)
+
+        self.lbl_matches = QLabel("")
+        layout.addWidget(self.lbl_matches)
+
+        self._timer = QTimer(self)
+        self._timer.setSingleShot(True)
+        self._timer.setInterval(self.DEBOUNCE_MS)
+        self._timer.timeout.connect(self._apply)
+
+        model.modelReset.connect(self._on_reset)
+        model.entries_appended.connect(self._on_appended)
+        model.dataChanged.connect(self._on_data_changed)
+        self._on_reset()
+
+    def is_active(self):
+        """True if any query or filter narrows the table."""
+        return bool(self.txt_query.text().strip() or self._missing())
+
+    def _missing(self):
+        missing = []
+        if self.chk_no_pronunciation.isChecked():
+            missing.append(MISSING_PRONUNCIATION)
+        if self.chk_no_example.isChecked():
+            missing.append(MISSING_EXAMPLE)
+        return missing
+
+    def _schedule(self):
+        self._timer.start()
+
+    def _schedule_once(self):
+        # Unlike typing, a stream of appends must not keep postponing the refresh
+        if not self._timer.isActive():
+            self._timer.start()
+
+    # --- Keeping the index in step with the model ---
+
+    def _on_reset(self):
+        if self._filtering:
+            return
+        # A new list (or the same one refilled): index it from scratch, then re-apply the query
+        self._rebuild += 1
+        self.index = SearchIndex()
+        self._index_more(self._rebuild)
+
+    def _index_more(self, rebuild):
+        if rebuild != self._rebuild:
+            return  # superseded by another reset
+        entries = self.model.entries
+        start = len(self.index)
+        self.index.add(entries[start:start + self.CHUNK])
+        if len(self.index) < len(entries):
+            QTimer.singleShot(0, lambda: self._index_more(rebuild))
+        elif self.is_active():
+            self._apply()
+
+    def _on_appended(self, first, last):
+        if len(self.index) < first:
+            return  # still rebuilding; _index_more will reach these
+        self.index.add(self.model.entries[len(self.index):last + 1])
+        if self.is_active():
+            self._schedule_once()
+
+    def _on_data_changed(self, top_left, bottom_right, roles=()):
+        entries = self.model.entries
+        for row in range(top_left.row(), bottom_right.row() + 1):
+            position = self.model.entry_position(row)
+            if position < len(self.index):
+                self.index.update(position, entries[position])
+
+    # --- Querying ---
+
+    def _apply(self):
+        self._timer.stop()
+        if not self.is_active():
+            self._set_filter(None)
+            self.lbl_matches.setText("")
+            return
+        started = time.perf_counter()
+        positions = self.index.search(self.txt_query.text(), self.combo_mode.currentData(), self._missing())
+        seconds = time.perf_counter() - started
+        self._set_filter(positions)
+        self.lbl_matches.setText(f"{len(positions)} of {len(self.model.entries)} ({seconds * 1000:.0f} ms)")
+
+    def _set_filter(self, positions):
+        self._filtering = True
+        try:
+            self.model.set_filter(positions)
+        finally:
+            self._filtering = False
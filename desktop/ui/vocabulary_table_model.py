@@ -0,0 +1,141 @@
+"""
+Table model that shows a vocabulary list without copying it into per-cell items.
+"""
+from PyQt6.QtCore import Qt, QAbstractTableModel, QModelIndex, pyqtSignal
+
+
+class VocabularyTableModel(QAbstractTableModel):
+    """
+    Model/view adapter over a list of vocabulary entry dicts.
+
+    Cells are read straight from the list when the view paints them, so only the visible
+    rows cost anything. The model keeps a row order (indices into the list) on top of the
+    data, which sorting rearranges and filtering narrows without touching the list itself.
+    Edits are written back into the entry dicts in place.
+
+    Args:
+        columns: list of (field, header) pairs, e.g. [("word", "Word"), ("meaning", "Meaning")]
+        entries: the list to show (shared, not copied)
+    """
+
+    entries_appended = pyqtSignal(int, int)  # first, last position in the list
+
+    def __init__(self, columns, entries=None, parent=None):
+        super().__init__(parent)
+        self.columns = list(columns)
+        self.entries = entries if entries is not None else []
+        self._rows = list(range(len(self.entries)))
+        self._filtered = False
+        self._sort_order = None  # (column, order) last sorted by
+
+    # --- Data access ---
+
+    def set_entries(self, entries):
+        """Show a different list."""
+        self.beginResetModel()
+        self.entries = entries
+        self._rows = list(range(len(entries)))
+        self._filtered = False
+        self.endResetModel()
+
+    def append_entries(self, new_entries):
+        """
+        Append entries to the list and the view without rebuilding existing rows.
+
+        While a filter is set the new entries are only added to the list; whoever set the
+        filter decides (on entries_appended) whether they match.
+        """
+        if not new_entries:
+            return
+        start = len(self.entries)
+        if self._filtered:
+            self.entries.extend(new_entries)
+        else:
+            first = len(self._rows)
+            self.beginInsertRows(QModelIndex(), first, first + len(new_entries) - 1)
+            self.entries.extend(new_entries)
+            self._rows.extend(range(start, len(self.entries)))
+            self.endInsertRows()
+        self.entries_appended.emit(start, len(self.entries) - 1)
+
+    def set_filter(self, positions):
+        """
+        Show only the entries at these list positions (None shows them all).
+
+        The rows keep the column order last chosen with sort().
+        """
+        self.beginResetModel()
+        self._filtered = positions is not None
+        self._rows = list(positions) if self._filtered else list(range(len(self.entries)))
+        if self._sort_order is not None:
+            self._sort_rows(*self._sort_order)
+        self.endResetModel()
+
+    def entry_at(self, row):
+        """The entry dict shown in a view row."""
+        return self.entries[self._rows[row]]
+
+    def entry_position(self, row):
+        """Position in the list of the entry shown in a view row."""
+        return self._rows[row]
+
+    # --- QAbstractTableModel interface ---
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self._rows)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.columns)
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid():
+            return None
+        if role in (Qt.ItemDataRole.DisplayRole, Qt.ItemDataRole.EditRole, Qt.ItemDataRole.ToolTipRole):
+            field = self.columns[index.column()][0]
+            return self.entry_at(index.row()).get(field, "")
+        return None
+
+    def headerData(self, section, orientation, role=Qt.ItemDataRole.DisplayRole):
+        if role != Qt.ItemDataRole.DisplayRole:
+            return None
+        if orientation == Qt.Orientation.Horizontal:
+            return self.columns[section][1]
+        return section + 1
+
+    def flags(self, index):
+        if not index.isValid():
+            return Qt.ItemFlag.NoItemFlags
+        return Qt.ItemFlag.ItemIsEnabled | Qt.ItemFlag.ItemIsSelectable | Qt.ItemFlag.ItemIsEditable
+
+    def setData(self, index, value, role=Qt.ItemDataRole.EditRole):
+        if not index.isValid() or role != Qt.ItemDataRole.EditRole:
+            return False
+        field = self.columns[index.column()][0]
+        self.entry_at(index.row())[field] = str(value).strip()
+        self.dataChanged.emit(index, index, [Qt.ItemDataRole.DisplayRole, Qt.ItemDataRole.EditRole])
+        return True
+
+    def sort(self, column, order=Qt.SortOrder.AscendingOrder):
+        """Reorder the rows by a column (case-insensitive); rows appended later go to the end."""
+        self.layoutAboutToBeChanged.emit()
+        old_indexes = self.persistentIndexList()
+        old_entries = [self._rows[index.row()] for index in old_indexes]
+
+        self._sort_order = (column, order)
+        self._sort_rows(column, order)
+
+        if old_indexes:
+            new_row = {entry: row for row, entry in enumerate(self._rows)}
+            self.changePersistentIndexList(
+                old_indexes,
+                [self.index(new_row[entry], index.column()) for entry, index in zip(old_entries, old_indexes)],
+            )
+        self.layoutChanged.emit()
+
+    def _sort_rows(self, column, order):
+        field = self.columns[column][0]
+        entries = self.entries
+        self._rows.sort(
+            key=lambda i: str(entries[i].get(field, "")).casefold(),
+            reverse=order == Qt.SortOrder.DescendingOrder,
+        )
@@ -25,6 +25,8 @@ class HomeScreen extends StatefulWidget {
 class _HomeScreenState extends State<HomeScreen> {
   List<VocabularyEntry> _vocabulary = [];
   String _statusMessage = 'No vocabulary loaded';
+  // Bumped by every load, so a theme package still loading its shards stops when replaced
+  int _loadCount = 0;
 
   Future<void> _loadTxtFile() async {
     final result = await FilePicker.platform.pickFiles(
@@ -36,6 +38,7 @@ class _HomeScreenState extends State<HomeScreen> {
     final file = File(result.files.single.path!);
     final content = await file.readAsString();
     final entries = VocabularyService.parseTxtFile(content);
+    _loadCount++;
 
     setState(() {
       _vocabulary = entries;
@@ -53,6 +56,7 @@ class _HomeScreenState extends State<HomeScreen> {
     final file = File(result.files.single.path!);
     final content = await file.readAsString();
     final entries = VocabularyService.parseJsonFile(content);
+    _loadCount++;
 
     setState(() {
       _vocabulary = entries;
@@ -69,16 +73,37 @@ class _HomeScreenState extends State<HomeScreen> {
 
     final file = File(result.files.single.path!);
     final loaded = await VocabularyService.loadThemeZip(file);
+    final package = loaded.package;
+    final load = ++_loadCount;
 
     widget.onThemeChanged(loaded.theme);
 
     setState(() {
-      if (loaded.vocabulary.isNotEmpty) {
-        _vocabulary = loaded.vocabulary;
+      if (package.shardCount > 0) {
+        _vocabulary = List.of(loaded.vocabulary);
+        _statusMessage = _themeStatus(loaded.theme, package);
+      } else {
+        _statusMessage = 'Theme "${loaded.theme.name}" loaded with 0 words';
       }
-      _statusMessage =
-          'Theme "${loaded.theme.name}" loaded with ${loaded.vocabulary.length} words';
     });
+
+    // The first shard is on screen; decode the rest one shard per frame
+    for (var index = 1; index < package.shardCount; index++) {
+      await Future<void>.delayed(Duration.zero);
+      if (!mounted || load != _loadCount) return;
+      final entries = package.loadShard(index);
+      setState(() {
+        _vocabulary.addAll(entries);
+        _statusMessage = _themeStatus(loaded.theme, package);
+      });
+    }
+  }
+
+  String _themeStatus(AppThemeData theme, ThemePackage package) {
+    final total = package.wordCount;
+    final count = _vocabulary.length;
+    final words = total != null && count < total ? '$count of $total' : '$count';
+    return 'Theme "${theme.name}" loaded with $words words';
   }
 
   @override
@@ -45,38 +45,79 @@ class VocabularyService {
     return list.map((e) => VocabularyEntry.fromJson(e)).toList();
   }
 
-  /// Load a theme zip file. Returns (theme, vocabulary).
-  static Future<({AppThemeData theme, List<VocabularyEntry> vocabulary})>
-      loadThemeZip(File zipFile) async {
-    final bytes = await zipFile.readAsBytes();
-    final archive = ZipDecoder().decodeBytes(bytes);
+  /// Load a theme zip file. Returns (theme, vocabulary, package).
+  /// Only the first shard is decoded here, so the first cards can show right away;
+  /// load the others from `package` (see ThemePackage.loadShard).
+  static Future<
+      ({
+        AppThemeData theme,
+        List<VocabularyEntry> vocabulary,
+        ThemePackage package,
+      })> loadThemeZip(File zipFile) async {
+    final package = await ThemePackage.open(zipFile);
 
-    AppThemeData? theme;
-    List<VocabularyEntry>? vocabulary;
-
-    for (final file in archive) {
-      if (file.isFile) {
-        final content = utf8.decode(file.content as List<int>);
-
-        if (file.name == 'theme.json') {
-          theme = AppThemeData.fromJson(jsonDecode(content));
-        } else if (file.name == 'vocabulary.json') {
-          vocabulary = parseJsonFile(content);
-        }
-
-        // Extract asset files to local storage
-        if (file.name.startsWith('assets/')) {
-          final dir = await getApplicationDocumentsDirectory();
-          final outFile = File('${dir.path}/theme_assets/${file.name}');
-          await outFile.parent.create(recursive: true);
-          await outFile.writeAsBytes(file.content as List<int>);
-        }
+    // Extract asset files to local storage
+    final dir = await getApplicationDocumentsDirectory();
+    for (final file in package.archive) {
+      if (file.isFile && file.name.startsWith('assets/')) {
+        final outFile = File('${dir.path}/theme_assets/${file.name}');
+        await outFile.parent.create(recursive: true);
+        await outFile.writeAsBytes(file.content as List<int>);
       }
     }
 
     return (
-      theme: theme ?? AppThemeData.defaultTheme(),
-      vocabulary: vocabulary ?? [],
+      theme: package.theme,
+      vocabulary: package.shardCount > 0 ? package.loadShard(0) : <VocabularyEntry>[],
+      package: package,
     );
   }
 }
+
+/// An opened theme zip. The archive and manifest.json are read once; vocabulary
+/// members are only decompressed and parsed when a shard is asked for.
+/// Sharded packages (manifest version 2.0) list vocabulary/NNNNN.json members under
+/// "shards"; an unsharded package has one shard, the whole vocabulary.json.
+class ThemePackage {
+  final Archive archive;
+  final Map<String, dynamic> manifest;
+  final AppThemeData theme;
+  final List<String> shardFiles;
+
+  ThemePackage._(this.archive, this.manifest, this.theme, this.shardFiles);
+
+  static Future<ThemePackage> open(File zipFile) async {
+    final bytes = await zipFile.readAsBytes();
+    final archive = ZipDecoder().decodeBytes(bytes);
+
+    Map<String, dynamic> manifest = {};
+    final manifestFile = archive.findFile('manifest.json');
+    if (manifestFile != null) {
+      manifest = jsonDecode(utf8.decode(manifestFile.content as List<int>));
+    }
+
+    AppThemeData theme = AppThemeData.defaultTheme();
+    final themeFile = archive.findFile('theme.json');
+    if (themeFile != null) {
+      theme = AppThemeData.fromJson(jsonDecode(utf8.decode(themeFile.content as List<int>)));
+    }
+
+    final shards = manifest['shards'] as List?;
+    final shardFiles = shards != null
+        ? [for (final shard in shards) shard['file'] as String]
+        : [if (archive.findFile('vocabulary.json') != null) 'vocabulary.json'];
+    return ThemePackage._(archive, manifest, theme, shardFiles);
+  }
+
+  int get shardCount => shardFiles.length;
+
+  /// Words in the whole package, if the manifest records it.
+  int? get wordCount => manifest['word_count'] as int?;
+
+  /// Decode one shard's entries.
+  List<VocabularyEntry> loadShard(int index) {
+    final file = archive.findFile(shardFiles[index]);
+    if (file == null) return [];
+    return VocabularyService.parseJsonFile(utf8.decode(file.content as List<int>));
+  }
+}